@@ -1,13 +1,20 @@
 """Command-line interface for BARQUE"""
 
 import click
+import json
 from pathlib import Path
 import sys
+from typing import Optional
 
 from ..core.generator import PDFGenerator
 from ..core.config import BarqueConfig
+from ..core.index import INDEX_FORMATS
+from ..core.metadata import MetadataExtractor
+from ..core.store import MetadataStore
+from ..core.analytics import corpus_stats, export_format, export_metadata
 from ..core.email import EmailSender, EmailConfig, EmailProvider, EmailMessage
 from ..core.user_config import UserConfig
+from .dashboard import BatchDashboard
 
 
 @click.group()
@@ -30,6 +37,8 @@ def main(ctx):
       barque generate document.md                  # Generate PDF (both themes)
       barque generate doc.md --theme light         # Generate light theme only
       barque batch docs/ --workers 8               # Process directory with 8 workers
+      barque scan docs/                            # Collect statistics only (no PDFs)
+      barque search "fourier transform"            # Search generated documents
       barque send doc.md --to user@example.com     # Generate PDF and email it
       barque email file.pdf --to user@example.com  # Send existing file via email
                            --subject "Report"
@@ -115,6 +124,7 @@ def generate(file, theme, output, config):
 
     # Create generator
     generator = PDFGenerator(barque_config)
+    _report_renderer(generator)
 
     # Generate PDF
     with click.progressbar(
@@ -142,6 +152,20 @@ def generate(file, theme, output, config):
             click.echo(f"  Sections: {meta.get('section_count', 0)}")
             if meta.get('has_math'):
                 click.echo(f"  Math formulas: Yes 📐")
+
+        # Show where the time went
+        if result.usage.stages:
+            click.echo(f"\n⏱  Timing ({result.duration:.2f}s):")
+            for name, usage in result.usage.stages.items():
+                click.echo(f"  {name:<9} {usage.wall:6.2f}s wall  {usage.cpu:6.2f}s cpu")
+            if result.usage.peak_rss:
+                click.echo(f"  Peak child RSS: {MetadataExtractor.format_bytes(result.usage.peak_rss)}")
+            for theme_name, size in result.output_bytes.items():
+                pages = result.pages.get(theme_name)
+                click.echo(
+                    f"  {theme_name} PDF: {MetadataExtractor.format_bytes(size)}"
+                    + (f", {pages} pages" if pages else "")
+                )
     else:
         click.secho(f"\n✗ Error: {result.error}", fg="red", bold=True)
         sys.exit(1)
@@ -171,12 +195,17 @@ def generate(file, theme, output, config):
     default='**/*.md',
     help='File pattern to match (default: **/*.md)'
 )
+@click.option(
+    '--backend',
+    type=click.Choice(['threads', 'processes']),
+    help='Parallel execution backend (default: from config, threads)'
+)
 @click.option(
     '--config',
     type=click.Path(exists=True),
     help='Custom config file path'
 )
-def batch(directory, output, theme, workers, pattern, config):
+def batch(directory, output, theme, workers, pattern, backend, config):
     """Process all markdown files in directory"""
     input_dir = Path(directory)
 
@@ -196,13 +225,17 @@ def batch(directory, output, theme, workers, pattern, config):
         barque_config.output_dir = Path(output)
     if workers:
         barque_config.workers = workers
+    if backend:
+        barque_config.backend = backend
+
+    click.echo(f"   Backend: {barque_config.backend}")
 
     # Create generator
     generator = PDFGenerator(barque_config)
+    _report_renderer(generator)
 
-    # Find markdown files
-    md_files = list(input_dir.glob(pattern))
-    total_files = len(md_files)
+    # Count markdown files (paths are streamed to the generator, not kept)
+    total_files = sum(1 for _ in input_dir.glob(pattern))
 
     if total_files == 0:
         click.secho(f"\n⚠️  No markdown files found matching '{pattern}'", fg="yellow")
@@ -210,27 +243,27 @@ def batch(directory, output, theme, workers, pattern, config):
 
     click.echo(f"\n🔍 Found {total_files} files to process\n")
 
-    # Process files with progress bar
+    # Process files in parallel, reporting each result as it completes
     success_count = 0
+    skipped_count = 0
+    duplicate_count = 0
     error_count = 0
 
-    with click.progressbar(
-        md_files,
-        label='Processing files',
-        show_pos=True
-    ) as files:
-        results = []
-        for md_file in files:
-            result = generator.generate(
-                input_file=md_file,
-                theme=theme
-            )
-            results.append(result)
+    dashboard = BatchDashboard(total_files, barque_config.workers)
+    for result in generator.iter_generate(input_dir.glob(pattern), theme=theme):
+        dashboard.update(result)
+        if result.duplicate_of:
+            duplicate_count += 1
+        if result.skipped:
+            skipped_count += 1
+        elif result.success:
+            success_count += 1
+        else:
+            error_count += 1
+    dashboard.finish()
 
-            if result.success:
-                success_count += 1
-            else:
-                error_count += 1
+    # Outputs of deleted sources are pruned by the incremental build
+    pruned = generator.finalize_batch(input_dir)
 
     # Generate index if enabled
     if barque_config.create_index:
@@ -244,12 +277,298 @@ def batch(directory, output, theme, workers, pattern, config):
     click.echo("=" * 60)
     click.echo(f"  Total files: {total_files}")
     click.secho(f"  Successful: {success_count}", fg="green")
+    if skipped_count > 0:
+        click.echo(f"  Up to date: {skipped_count}")
+    if duplicate_count > 0:
+        click.echo(f"  Deduplicated: {duplicate_count} (identical to another source, not re-rendered)")
+    if pruned:
+        click.echo(f"  Pruned: {len(pruned)}")
     if error_count > 0:
         click.secho(f"  Errors: {error_count}", fg="red")
+    for name, error in generator.metadata_store.rejected:
+        click.secho(f"  Metadata not stored for {name}: {error}", fg="yellow")
     click.echo(f"\n📂 Output directory: {barque_config.output_dir}")
     click.echo("=" * 60 + "\n")
 
 
+@main.command()
+@click.argument('directory', type=click.Path(exists=True))
+@click.option(
+    '--output',
+    type=click.Path(),
+    help='Output directory holding the metadata store (default: ./output)'
+)
+@click.option(
+    '--workers',
+    type=int,
+    help='Number of worker processes (default: from config, 4)'
+)
+@click.option(
+    '--pattern',
+    default='**/*.md',
+    help='File pattern to match (default: **/*.md)'
+)
+@click.option(
+    '--index/--no-index',
+    default=True,
+    help='Regenerate the index afterwards (default: on)'
+)
+@click.option(
+    '--config',
+    type=click.Path(exists=True),
+    help='Custom config file path'
+)
+def scan(directory, output, workers, pattern, index, config):
+    """Collect document statistics without rendering PDFs"""
+    input_dir = Path(directory)
+
+    # Load configuration
+    if config:
+        barque_config = BarqueConfig.load(Path(config))
+    else:
+        barque_config = BarqueConfig.load()
+
+    # Override settings if specified
+    if output:
+        barque_config.output_dir = Path(output)
+    if workers:
+        barque_config.workers = workers
+
+    click.echo(f"\n🔍 Scanning: {input_dir}")
+    click.echo(f"   Pattern: {pattern}")
+    click.echo(f"   Workers: {barque_config.workers}\n")
+
+    generator = PDFGenerator(barque_config)
+
+    def progress(result):
+        rate = result.files / result.duration if result.duration else 0.0
+        click.echo(
+            f"\r  {result.files:,} files  {result.scanned:,} scanned  "
+            f"{result.cached:,} unchanged  {rate:,.0f} files/sec",
+            nl=False
+        )
+
+    result = generator.scan(input_dir, pattern=pattern, on_progress=progress)
+    click.echo()
+
+    if barque_config.create_index and index:
+        index_file = generator.generate_index()
+        click.secho(f"✓ Index created: {index_file}", fg="green")
+
+    totals = generator.metadata_store.totals()
+
+    # Display summary
+    click.echo("\n" + "=" * 60)
+    click.secho("📊 Scan Complete!", fg="green", bold=True)
+    click.echo("=" * 60)
+    click.echo(f"  Files: {result.files:,}")
+    click.echo(f"  Scanned: {result.scanned:,}")
+    click.echo(f"  Unchanged: {result.cached:,}")
+    if result.errors:
+        click.secho(f"  Errors: {len(result.errors):,}", fg="red")
+        for path, error in result.errors[:5]:
+            click.echo(f"    {path}: {error}")
+    click.echo(f"  Time: {result.duration:.2f}s")
+    click.echo(f"\n  Documents in store: {totals['documents']:,}")
+    click.echo(f"  Total words: {totals['word_count']:,}")
+    click.echo(f"  Total size: {MetadataExtractor.format_bytes(totals['file_size'])}")
+    click.echo("=" * 60 + "\n")
+
+
+@main.command()
+@click.argument('query', nargs=-1, required=True)
+@click.option(
+    '--output',
+    type=click.Path(),
+    help='Output directory to search (default: from config, ./output)'
+)
+@click.option(
+    '--limit',
+    default=10,
+    type=int,
+    help='Maximum number of results (default: 10)'
+)
+@click.option(
+    '--config',
+    type=click.Path(exists=True),
+    help='Custom config file path'
+)
+def search(query, output, limit, config):
+    """Search generated documents (words must all match; end a word with * for a prefix)"""
+    # Load configuration
+    if config:
+        barque_config = BarqueConfig.load(Path(config))
+    else:
+        barque_config = BarqueConfig.load()
+
+    output_dir = Path(output) if output else barque_config.output_dir
+    store = _open_store(output_dir)
+    if store is None:
+        click.secho(f"⚠️  No search index in {output_dir} (run 'barque batch' first)", fg="yellow")
+        return
+
+    hits = store.search(" ".join(query), limit=limit, highlight=("\x1b[1m", "\x1b[0m"))
+    store.close()
+
+    if not hits:
+        click.secho("No matching documents.", fg="yellow")
+        return
+
+    click.echo(f"\n🔎 {len(hits)} result{'s' if len(hits) != 1 else ''}\n")
+    for rank, hit in enumerate(hits, 1):
+        click.secho(f"{rank}. {hit['title']}", bold=True)
+        click.echo(f"   {hit['snippet']}")
+        for theme, pdf in hit["pdf_files"].items():
+            if pdf:
+                click.echo(f"   📑 {theme}: {output_dir / pdf}")
+        click.echo()
+
+
+@main.group(name='metadata')
+def metadata_group():
+    """Work with the metadata of generated documents"""
+
+
+@metadata_group.command(name='export')
+@click.argument('destination', type=click.Path())
+@click.option(
+    '--format', 'fmt',
+    type=click.Choice(['parquet', 'arrow', 'csv']),
+    help='File format (default: from the file extension, else parquet)'
+)
+@click.option(
+    '--output',
+    type=click.Path(),
+    help='Output directory holding the metadata (default: from config, ./output)'
+)
+@click.option(
+    '--config',
+    type=click.Path(exists=True),
+    help='Custom config file path'
+)
+def metadata_export(destination, fmt, output, config):
+    """
+    Export document metadata to a columnar file
+
+    \b
+    Examples:
+      barque metadata export corpus.parquet
+      barque metadata export corpus.arrow
+      barque metadata export corpus.csv
+    """
+    # Load configuration
+    if config:
+        barque_config = BarqueConfig.load(Path(config))
+    else:
+        barque_config = BarqueConfig.load()
+
+    output_dir = Path(output) if output else barque_config.output_dir
+    store = _open_store(output_dir)
+    if store is None:
+        click.secho(f"⚠️  No metadata in {output_dir} (run 'barque batch' or 'barque scan' first)",
+                    fg="yellow")
+        return
+
+    requested_fmt = export_format(Path(destination), fmt)
+    written, written_fmt = export_metadata(store, Path(destination), fmt)
+    documents = store.totals()["documents"]
+    store.close()
+    if written_fmt != requested_fmt:
+        click.secho(f"⚠️  pyarrow is not installed, wrote CSV instead of {requested_fmt}",
+                    fg="yellow")
+    click.secho(f"✓ Exported {documents:,} documents ({written_fmt}): {written}", fg="green")
+
+
+@main.command()
+@click.option(
+    '--output',
+    type=click.Path(),
+    help='Output directory holding the metadata (default: from config, ./output)'
+)
+@click.option(
+    '--top',
+    default=10,
+    type=int,
+    help='Number of largest and slowest documents to list (default: 10)'
+)
+@click.option(
+    '--json', 'as_json',
+    is_flag=True,
+    help='Print the statistics as JSON'
+)
+@click.option(
+    '--config',
+    type=click.Path(exists=True),
+    help='Custom config file path'
+)
+def stats(output, top, as_json, config):
+    """Show corpus statistics: word counts, sizes, render times"""
+    # Load configuration
+    if config:
+        barque_config = BarqueConfig.load(Path(config))
+    else:
+        barque_config = BarqueConfig.load()
+
+    output_dir = Path(output) if output else barque_config.output_dir
+    store = _open_store(output_dir)
+    if store is None:
+        click.secho(f"⚠️  No metadata in {output_dir} (run 'barque batch' or 'barque scan' first)",
+                    fg="yellow")
+        return
+
+    corpus = corpus_stats(store, top=top)
+    store.close()
+
+    if as_json:
+        click.echo(json.dumps(corpus, indent=2, ensure_ascii=False))
+        return
+
+    click.echo("\n" + "=" * 60)
+    click.secho("📊 Corpus Statistics", fg="green", bold=True)
+    click.echo("=" * 60)
+    click.echo(f"  Documents: {corpus['documents']:,}")
+    click.echo(f"  Total words: {corpus['words']:,}")
+    click.echo(f"  Total size: {MetadataExtractor.format_bytes(corpus['size_bytes'])}")
+    click.echo(f"  With math: {corpus['with_math']:,}")
+
+    words = corpus["word_count"]
+    click.echo("\n📝 Words per document")
+    click.echo(
+        f"  mean {words['mean']:,.0f}  p50 {words['p50']:,}  p90 {words['p90']:,}"
+        f"  p99 {words['p99']:,}  max {words['max']:,}"
+    )
+
+    sizes = corpus["file_size"]
+    click.echo("\n📦 Source size")
+    click.echo(
+        f"  p50 {MetadataExtractor.format_bytes(sizes['p50'])}"
+        f"  p90 {MetadataExtractor.format_bytes(sizes['p90'])}"
+        f"  p99 {MetadataExtractor.format_bytes(sizes['p99'])}"
+        f"  max {MetadataExtractor.format_bytes(sizes['max'])}"
+    )
+
+    renders = corpus["render_seconds"]
+    if renders["count"]:
+        click.echo(f"\n⏱  Render time ({renders['count']:,} rendered)")
+        click.echo(
+            f"  mean {renders['mean']:.2f}s  p50 {renders['p50']:.2f}s  p90 {renders['p90']:.2f}s"
+            f"  p99 {renders['p99']:.2f}s  max {renders['max']:.2f}s  total {renders['sum']:.1f}s"
+        )
+
+    if corpus["largest"]:
+        click.echo("\n📚 Largest")
+        for doc in corpus["largest"]:
+            click.echo(
+                f"  {MetadataExtractor.format_bytes(doc['file_size']):>10}"
+                f"  {doc['word_count']:>8,} words  {doc['name']}"
+            )
+    if corpus["slowest"]:
+        click.echo("\n🐢 Slowest")
+        for doc in corpus["slowest"]:
+            click.echo(f"  {doc['render_seconds']:9.2f}s  {doc['word_count']:>8,} words  {doc['name']}")
+    click.echo("=" * 60 + "\n")
+
+
 @main.command()
 @click.option(
     '--all',
@@ -288,11 +607,16 @@ def clean(all, output):
             shutil.rmtree(dir_path)
             click.secho(f"✓ Removed: {dir_name}/", fg="green")
 
-    # Remove index file
-    index_file = output_dir / "INDEX.md"
-    if index_file.exists():
-        index_file.unlink()
-        click.secho(f"✓ Removed: INDEX.md", fg="green")
+    # Remove index files and the state kept to rebuild them
+    index_files = list(INDEX_FORMATS.values())
+    if not all:
+        index_files.append(".cache/index.json")
+
+    for file_name in index_files:
+        index_file = output_dir / file_name
+        if index_file.exists():
+            index_file.unlink()
+            click.secho(f"✓ Removed: {file_name}", fg="green")
 
     click.secho("\n✅ Clean complete!", fg="green", bold=True)
 
@@ -572,6 +896,7 @@ def send(file, to, subject, from_email, theme, output, provider, body):
 
     # Create generator
     generator = PDFGenerator(barque_config)
+    _report_renderer(generator)
 
     # Generate PDF
     with click.progressbar(
@@ -807,5 +1132,28 @@ def user_config_cmd(action, key, value):
         return
 
 
+def _report_renderer(generator: PDFGenerator) -> None:
+    """Warn when in-process WeasyPrint was asked for but could not be loaded"""
+    reason = getattr(generator.renderer, "fallback_reason", None)
+    if reason and generator.config.renderer == "weasyprint":
+        click.secho(f"⚠️  WeasyPrint unavailable in-process, using subprocess renderer: {reason}",
+                    fg="yellow")
+
+
+def _open_store(output_dir: Path) -> Optional[MetadataStore]:
+    """Open the metadata store of an output directory (None when nothing was generated)"""
+    metadata_dir = output_dir / "metadata"
+    db_file = metadata_dir / "metadata.db"
+    has_json = metadata_dir.is_dir() and any(metadata_dir.glob("*.json"))
+    if not db_file.exists() and not has_json:
+        return None
+
+    store = MetadataStore(db_file)
+    if has_json and not store.totals()["documents"]:
+        # Output directory from before the store existed
+        store.import_json(metadata_dir)
+    return store
+
+
 if __name__ == "__main__":
     main()
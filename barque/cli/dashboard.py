@@ -0,0 +1,199 @@
+"""Live progress dashboard for BARQUE batch runs"""
+
+import math
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import click
+
+from ..core.generator import GenerationResult
+from ..core.metadata import MetadataExtractor
+from ..core.usage import StageUsage
+
+
+@dataclass
+class WorkerStats:
+    """Progress of a single batch worker"""
+    done: int = 0
+    busy: float = 0.0
+    last: str = ""
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of a list of values (0.0 when empty)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+class BatchDashboard:
+    """
+    Report batch results as they complete
+
+    On a terminal the dashboard redraws a per-worker table together with
+    throughput, per-document latency percentiles and an ETA. When output is
+    redirected it prints a single progress line every few seconds instead,
+    so logs stay readable.
+    """
+
+    REDRAW_INTERVAL = 0.2
+    LOG_INTERVAL = 5.0
+
+    def __init__(self, total: int, workers: int, interactive: Optional[bool] = None):
+        self.total = total
+        self.workers = workers
+        self.interactive = sys.stdout.isatty() if interactive is None else interactive
+        self.started = time.perf_counter()
+        self.done = 0
+        self.skipped = 0
+        self.failed = 0
+        self.latencies: List[float] = []
+        self.slowest: List[GenerationResult] = []
+        self.worker_stats: Dict[str, WorkerStats] = {}
+        self.stages: Dict[str, StageUsage] = {}
+        self.peak_rss = 0
+        self.output_bytes = 0
+        self.output_files = 0
+        self.pages = 0
+        self._drawn_lines = 0
+        self._last_draw = 0.0
+
+    def update(self, result: GenerationResult) -> None:
+        """Record a finished document and refresh the display"""
+        self.done += 1
+        if result.skipped:
+            self.skipped += 1
+        elif not result.success:
+            self.failed += 1
+
+        # Skipped documents never reach a worker, so they do not skew latency
+        if result.worker:
+            stats = self.worker_stats.setdefault(result.worker, WorkerStats())
+            stats.done += 1
+            stats.busy += result.duration
+            stats.last = _display_name(result.source)
+            self.latencies.append(result.duration)
+            self.slowest = sorted(
+                self.slowest + [result], key=lambda r: r.duration, reverse=True
+            )[:5]
+
+            for name, usage in result.usage.stages.items():
+                total = self.stages.setdefault(name, StageUsage())
+                total.wall += usage.wall
+                total.cpu += usage.cpu
+                total.calls += usage.calls
+            self.peak_rss = max(self.peak_rss, result.usage.peak_rss)
+            self.output_bytes += sum(result.output_bytes.values())
+            self.output_files += len(result.output_bytes)
+            self.pages += sum(result.pages.values())
+
+        now = time.perf_counter()
+        interval = self.REDRAW_INTERVAL if self.interactive else self.LOG_INTERVAL
+        if self.done == self.total or now - self._last_draw >= interval:
+            self._last_draw = now
+            self._draw(now - self.started)
+
+    def finish(self) -> None:
+        """Print the final timing breakdown"""
+        elapsed = time.perf_counter() - self.started
+        if self.interactive:
+            self._draw(elapsed)
+
+        rendered = len(self.latencies)
+        busy = sum(self.latencies)
+
+        click.echo("\n⏱  Timing")
+        click.echo(f"  Wall time: {elapsed:.2f}s")
+        click.echo(f"  Throughput: {self._rate(elapsed):.2f} docs/sec")
+        if rendered:
+            click.echo(
+                f"  Latency: p50 {percentile(self.latencies, 0.50):.2f}s"
+                f"  p95 {percentile(self.latencies, 0.95):.2f}s"
+                f"  p99 {percentile(self.latencies, 0.99):.2f}s"
+                f"  max {max(self.latencies):.2f}s"
+            )
+            click.echo(f"  Render time (sum): {busy:.2f}s")
+            if elapsed > 0:
+                # Summed render time over worker-seconds available
+                efficiency = busy / (elapsed * max(1, self.workers))
+                click.echo(f"  Parallel efficiency: {efficiency:.0%} of {self.workers} workers")
+            click.echo("  Slowest:")
+            for result in self.slowest:
+                click.echo(f"    {result.duration:6.2f}s  {_display_name(result.source)}")
+
+        if self.stages:
+            # Summed over documents, so stages run in parallel can exceed wall time
+            click.echo("  Stages (wall / cpu, summed):")
+            for name, usage in sorted(self.stages.items(), key=lambda s: s[1].wall, reverse=True):
+                share = usage.wall / busy if busy > 0 else 0.0
+                click.echo(
+                    f"    {name:<9} {usage.wall:8.2f}s / {usage.cpu:8.2f}s  {share:4.0%}"
+                    f"  ({usage.calls} calls)"
+                )
+        if self.peak_rss:
+            click.echo(f"  Peak child RSS: {MetadataExtractor.format_bytes(self.peak_rss)}")
+        if self.output_files:
+            click.echo(
+                f"  Output: {self.output_files} PDFs, "
+                f"{MetadataExtractor.format_bytes(self.output_bytes)}, {self.pages:,} pages"
+            )
+
+    def _rate(self, elapsed: float) -> float:
+        """Documents completed per second"""
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def _draw(self, elapsed: float) -> None:
+        """Render the current state"""
+        rate = self._rate(elapsed)
+        remaining = self.total - self.done
+        eta = remaining / rate if rate > 0 else 0.0
+        summary = (
+            f"  {self.done}/{self.total} docs"
+            f"  {rate:.2f} docs/sec"
+            f"  p50 {percentile(self.latencies, 0.50):.2f}s"
+            f"  p95 {percentile(self.latencies, 0.95):.2f}s"
+            f"  ETA {_format_duration(eta)}"
+        )
+        if self.failed:
+            summary += f"  errors {self.failed}"
+
+        if not self.interactive:
+            click.echo(summary)
+            return
+
+        lines = [_bar(self.done, self.total) + summary]
+        for name in sorted(self.worker_stats):
+            stats = self.worker_stats[name]
+            lines.append(
+                f"  {name:<14} {stats.done:>5} docs  {stats.busy:7.1f}s busy  {stats.last}"
+            )
+
+        # Move back over the previous frame and overwrite it
+        if self._drawn_lines:
+            click.echo(f"\x1b[{self._drawn_lines}F", nl=False)
+        for line in lines:
+            click.echo(f"\x1b[2K{line}")
+        self._drawn_lines = len(lines)
+
+
+def _bar(done: int, total: int, width: int = 24) -> str:
+    """Text progress bar"""
+    filled = width * done // total if total else width
+    return "[" + "#" * filled + "-" * (width - filled) + "]"
+
+
+def _format_duration(seconds: float) -> str:
+    """Format seconds as m:ss"""
+    minutes, seconds = divmod(int(seconds + 0.5), 60)
+    return f"{minutes}:{seconds:02d}"
+
+
+def _display_name(source: Optional[str]) -> str:
+    """Short name of a source path for the worker table"""
+    if not source:
+        return ""
+    return Path(source).name
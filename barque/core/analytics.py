@@ -0,0 +1,150 @@
+"""Corpus analytics and columnar metadata export for BARQUE"""
+
+import csv
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .store import EXPORT_COLUMNS, MetadataStore
+
+try:
+    import pyarrow
+except ImportError:  # Optional: pip install barque[analytics]
+    pyarrow = None
+
+# Export formats by file suffix
+EXPORT_FORMATS = {
+    ".parquet": "parquet",
+    ".arrow": "arrow",
+    ".feather": "arrow",
+    ".csv": "csv",
+}
+
+
+def export_metadata(
+    store: MetadataStore,
+    output_file: Path,
+    fmt: Optional[str] = None
+) -> Tuple[Path, str]:
+    """
+    Write the metadata of every document to a columnar file
+
+    Parquet and Arrow IPC are written with pyarrow, one record batch per
+    store batch, with int64 sizes and counts, a bool has_math, timestamp
+    columns and a float64 render time. Without pyarrow the export falls
+    back to CSV next to the requested file; the returned format tells the
+    caller which was written.
+
+    Args:
+        store: Metadata store to export
+        output_file: Destination file
+        fmt: 'parquet', 'arrow' or 'csv' (default: from the file suffix, else parquet)
+
+    Returns:
+        The file written and its format
+    """
+    fmt = export_format(output_file, fmt)
+    if fmt != "csv" and pyarrow is None:
+        fmt = "csv"
+        output_file = output_file.with_suffix(".csv")
+
+    output_file.parent.mkdir(parents=True, exist_ok=True)
+    if fmt == "csv":
+        _export_csv(store, output_file)
+    else:
+        _export_arrow(store, output_file, fmt)
+    return output_file, fmt
+
+
+def export_format(output_file: Path, fmt: Optional[str] = None) -> str:
+    """The format an export to output_file is asked for: fmt, else from the suffix, else parquet"""
+    return fmt or EXPORT_FORMATS.get(output_file.suffix.lower(), "parquet")
+
+
+def corpus_stats(store: MetadataStore, top: int = 10) -> Dict[str, Any]:
+    """
+    Aggregate statistics over every document in the store
+
+    Aggregates are computed by SQLite over the indexed columns, so no
+    per-document records are loaded.
+
+    Args:
+        store: Metadata store to summarize
+        top: Number of largest and slowest documents to list
+
+    Returns:
+        Totals, word count / size / render time distributions and top lists
+    """
+    totals = store.totals()
+    return {
+        "documents": totals["documents"],
+        "words": totals["word_count"],
+        "size_bytes": totals["file_size"],
+        "with_math": int(store.distribution("has_math", ())["sum"]),
+        "word_count": store.distribution("word_count"),
+        "file_size": store.distribution("file_size"),
+        "section_count": store.distribution("section_count"),
+        "render_seconds": store.distribution("render_seconds"),
+        "largest": store.largest(top),
+        "slowest": store.slowest(top),
+    }
+
+
+def _export_csv(store: MetadataStore, output_file: Path) -> None:
+    """Write the export as CSV with a header row"""
+    with open(output_file, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow([name for name, _ in EXPORT_COLUMNS])
+        for rows in store.export_rows():
+            writer.writerows(rows)
+
+
+def _export_arrow(store: MetadataStore, output_file: Path, fmt: str) -> None:
+    """Stream the export into a Parquet or Arrow IPC file"""
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    types = {
+        "str": pyarrow.string(),
+        "int": pyarrow.int64(),
+        "float": pyarrow.float64(),
+        "bool": pyarrow.bool_(),
+        "timestamp": pyarrow.timestamp("us"),
+    }
+    schema = pyarrow.schema([(name, types[kind]) for name, kind in EXPORT_COLUMNS])
+
+    if fmt == "parquet":
+        writer = pyarrow.parquet.ParquetWriter(str(output_file), schema)
+    else:
+        writer = pyarrow.ipc.new_file(str(output_file), schema)
+    try:
+        for rows in store.export_rows():
+            columns = _columns(rows)
+            writer.write_batch(pyarrow.record_batch(
+                [pyarrow.array(values, type=field.type)
+                 for values, field in zip(columns, schema)],
+                schema=schema
+            ))
+    finally:
+        writer.close()
+
+
+def _columns(rows: List[tuple]) -> List[List[Any]]:
+    """Transpose a batch of rows into typed columns"""
+    columns = [list(values) for values in zip(*rows)]
+    for index, (_, kind) in enumerate(EXPORT_COLUMNS):
+        if kind == "bool":
+            columns[index] = [None if v is None else bool(v) for v in columns[index]]
+        elif kind == "timestamp":
+            columns[index] = [_timestamp(v) for v in columns[index]]
+    return columns
+
+
+def _timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse an ISO timestamp from the metadata (None when absent or malformed)"""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
@@ -0,0 +1,247 @@
+"""Content-addressed render cache for BARQUE"""
+
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .metadata import MetadataExtractor
+
+
+class RenderCache:
+    """
+    Persistent cache of rendered PDFs
+
+    Entries are keyed on a hash of everything that influences the output:
+    the markdown source, referenced local images, the theme CSS, the
+    converter arguments and the versions of the external tools. A hit is
+    materialized as a hardlink (or a copy when linking is not possible).
+    """
+
+    def __init__(self, cache_dir: Path):
+        self.cache_dir = cache_dir
+
+    def key(self, input_file: Path, css_file: Path, args: List[str]) -> str:
+        """
+        Compute the cache key for a render
+
+        Args:
+            input_file: Markdown source file
+            css_file: Theme stylesheet used for the render
+            args: Converter arguments with run-specific paths normalized
+
+        Returns:
+            Hex digest identifying the rendered output
+        """
+        source = input_file.read_bytes()
+
+        digest = hashlib.sha256()
+        for part in (source, css_file.read_bytes(), "\0".join(args).encode("utf-8"),
+                     tool_versions().encode("utf-8")):
+            digest.update(len(part).to_bytes(8, "big"))
+            digest.update(part)
+
+        # Embedded images change the output without changing the markdown
+        content = source.decode("utf-8", errors="replace")
+        for target, image in self._local_resources(input_file, content):
+            digest.update(target.encode("utf-8"))
+            digest.update(hashlib.sha256(image.read_bytes()).digest())
+
+        return digest.hexdigest()
+
+    def fetch(self, key: str, output_pdf: Path) -> bool:
+        """Materialize a cached render at output_pdf, returning False on a miss"""
+        cached = self._entry(key)
+        if not cached.exists():
+            return False
+
+        output_pdf.parent.mkdir(parents=True, exist_ok=True)
+        output_pdf.unlink(missing_ok=True)
+        try:
+            os.link(cached, output_pdf)
+        except OSError:
+            shutil.copy2(cached, output_pdf)
+        return True
+
+    def store(self, key: str, output_pdf: Path) -> None:
+        """Add a freshly rendered PDF to the cache"""
+        cached = self._entry(key)
+        cached.parent.mkdir(parents=True, exist_ok=True)
+
+        # Stage under a unique name so concurrent writers never expose a torn entry
+        staging = cached.with_name(f"{cached.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            try:
+                os.link(output_pdf, staging)
+            except OSError:
+                shutil.copy2(output_pdf, staging)
+            os.replace(staging, cached)
+        except OSError:
+            staging.unlink(missing_ok=True)
+
+    def _entry(self, key: str) -> Path:
+        """Get the on-disk location of a cache entry"""
+        return self.cache_dir / key[:2] / f"{key}.pdf"
+
+    @staticmethod
+    def _local_resources(input_file: Path, content: str) -> List[Tuple[str, Path]]:
+        """Resolve image references that point at local files"""
+        resources = []
+        for target in MetadataExtractor.find_images(content):
+            if "://" in target or target.startswith("data:"):
+                continue
+            for base in (input_file.parent, Path.cwd()):
+                candidate = base / target
+                if candidate.is_file():
+                    resources.append((target, candidate))
+                    break
+        return resources
+
+
+class ResultCache:
+    """
+    Size-capped LRU cache of rendered PDFs on local disk
+
+    Each entry is a PDF plus a JSON sidecar (e.g. metadata and page count),
+    keyed by a caller-supplied hex digest. Recency is tracked in memory and
+    mirrored in file mtimes, so the LRU order survives restarts. Adding an
+    entry evicts the least recently used ones until the cache fits in
+    max_bytes.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # key -> bytes, oldest first
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def get(self, key: str) -> Optional[Tuple[bytes, Dict[str, Any]]]:
+        """Get a cached PDF and its sidecar data, marking the entry recently used"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            pdf_file, info_file = self._files(key)
+            try:
+                pdf = pdf_file.read_bytes()
+                info = json.loads(info_file.read_text(encoding="utf-8"))
+                os.utime(pdf_file)
+            except (OSError, ValueError):
+                # Deleted or damaged behind our back: treat as a miss
+                self._drop(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return pdf, info
+
+    def put(self, key: str, pdf: bytes, info: Dict[str, Any]) -> None:
+        """Add a rendered PDF, evicting least recently used entries past max_bytes"""
+        sidecar = json.dumps(info, default=str).encode("utf-8")
+        size = len(pdf) + len(sidecar)
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            pdf_file, info_file = self._files(key)
+            pdf_file.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                # Sidecar first: an entry counts as present once its PDF exists
+                self._write(info_file, sidecar)
+                self._write(pdf_file, pdf)
+            except OSError:
+                info_file.unlink(missing_ok=True)
+                return
+            self._entries[key] = size
+            self._bytes += size
+
+            while self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._drop(oldest)
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Size and hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
+
+    def _load(self) -> None:
+        """Index the entries left on disk, least recently used first"""
+        found = []
+        for pdf_file in self.cache_dir.glob("*/*.pdf"):
+            info_file = pdf_file.with_suffix(".json")
+            try:
+                stat = pdf_file.stat()
+                size = stat.st_size + info_file.stat().st_size
+            except OSError:
+                continue
+            found.append((stat.st_mtime, pdf_file.stem, size))
+
+        for _, key, size in sorted(found):
+            self._entries[key] = size
+            self._bytes += size
+        while self._bytes > self.max_bytes:
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _drop(self, key: str) -> None:
+        """Remove an entry from the index and from disk"""
+        self._bytes -= self._entries.pop(key, 0)
+        for path in self._files(key):
+            path.unlink(missing_ok=True)
+
+    def _files(self, key: str) -> Tuple[Path, Path]:
+        """Get the PDF and sidecar locations of an entry"""
+        directory = self.cache_dir / key[:2]
+        return directory / f"{key}.pdf", directory / f"{key}.json"
+
+    @staticmethod
+    def _write(path: Path, data: bytes) -> None:
+        """Write a file atomically"""
+        staging = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            staging.write_bytes(data)
+            os.replace(staging, path)
+        except OSError:
+            staging.unlink(missing_ok=True)
+            raise
+
+
+@lru_cache(maxsize=None)
+def tool_versions() -> str:
+    """Get the versions of the external rendering tools (cached per process)"""
+    versions = []
+    for tool in ("pandoc", "weasyprint"):
+        try:
+            result = subprocess.run(
+                [tool, "--version"],
+                check=True,
+                capture_output=True,
+                text=True
+            )
+            output = result.stdout.strip().splitlines()
+            versions.append(output[0] if output else f"{tool} unknown")
+        except (OSError, subprocess.CalledProcessError):
+            versions.append(f"{tool} unavailable")
+    return "; ".join(versions)
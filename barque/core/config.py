@@ -2,7 +2,7 @@
 
 import yaml
 from pathlib import Path
-from typing import Dict, Optional, Any
+from typing import Dict, List, Optional, Any
 from dataclasses import dataclass, field
 
 
@@ -19,6 +19,7 @@ class BarqueConfig:
     output_dir: Path = field(default_factory=lambda: Path("./output"))
     organize_by_theme: bool = True
     create_index: bool = True
+    index_formats: List[str] = field(default_factory=lambda: ["md"])
 
     # Styling
     font_family: str = "Inter, -apple-system, BlinkMacSystemFont, sans-serif"
@@ -52,8 +53,15 @@ class BarqueConfig:
 
     # Processing
     workers: int = 4
+    backend: str = "threads"
     cache_enabled: bool = True
     incremental_build: bool = False
+    deduplicate: bool = False
+    pipeline: str = "html"
+    renderer: str = "auto"
+    converter: str = "subprocess"
+    pandoc_server_url: str = ""
+    metadata_source: str = "markdown"
 
     @classmethod
     def load(cls, config_file: Optional[Path] = None) -> "BarqueConfig":
@@ -103,6 +111,7 @@ class BarqueConfig:
             output_dir=Path(output.get("directory", "./output")),
             organize_by_theme=output.get("organize_by_theme", True),
             create_index=output.get("create_index", True),
+            index_formats=output.get("index_formats", ["md"]),
             # Styling
             font_family=styling.get("font_family", "Inter, sans-serif"),
             base_font_size=styling.get("base_font_size", "14px"),
@@ -118,8 +127,15 @@ class BarqueConfig:
             math_display_delimiter=math.get("display_delimiter", "$$"),
             # Processing
             workers=processing.get("workers", 4),
+            backend=processing.get("backend", "threads"),
             cache_enabled=processing.get("cache_enabled", True),
             incremental_build=processing.get("incremental_build", False),
+            deduplicate=processing.get("deduplicate", False),
+            pipeline=processing.get("pipeline", "html"),
+            renderer=processing.get("renderer", "auto"),
+            converter=processing.get("converter", "subprocess"),
+            pandoc_server_url=processing.get("pandoc_server_url", ""),
+            metadata_source=processing.get("metadata_source", "markdown"),
         )
 
     def to_dict(self) -> Dict[str, Any]:
@@ -134,6 +150,7 @@ class BarqueConfig:
                 "directory": str(self.output_dir),
                 "organize_by_theme": self.organize_by_theme,
                 "create_index": self.create_index,
+                "index_formats": self.index_formats,
             },
             "styling": {
                 "font_family": self.font_family,
@@ -151,8 +168,15 @@ class BarqueConfig:
             },
             "processing": {
                 "workers": self.workers,
+                "backend": self.backend,
                 "cache_enabled": self.cache_enabled,
                 "incremental_build": self.incremental_build,
+                "deduplicate": self.deduplicate,
+                "pipeline": self.pipeline,
+                "renderer": self.renderer,
+                "converter": self.converter,
+                "pandoc_server_url": self.pandoc_server_url,
+                "metadata_source": self.metadata_source,
             },
         }
 
@@ -198,6 +222,33 @@ class BarqueConfig:
         if self.workers < 1:
             errors.append(f"Workers must be >= 1, got {self.workers}")
 
+        # Validate batch backend
+        if self.backend not in ["threads", "processes"]:
+            errors.append(f"Invalid backend: {self.backend}")
+
+        # Validate pipeline
+        if self.pipeline not in ["html", "pandoc"]:
+            errors.append(f"Invalid pipeline: {self.pipeline}")
+
+        # Validate renderer
+        if self.renderer not in ["auto", "weasyprint", "subprocess"]:
+            errors.append(f"Invalid renderer: {self.renderer}")
+
+        # Validate converter
+        if self.converter not in ["subprocess", "server"]:
+            errors.append(f"Invalid converter: {self.converter}")
+
+        # Validate index formats
+        for fmt in self.index_formats:
+            if fmt not in ["md", "json", "html"]:
+                errors.append(f"Invalid index format: {fmt}")
+
+        # Validate metadata source (the AST comes from the html pipeline's conversion)
+        if self.metadata_source not in ["markdown", "ast"]:
+            errors.append(f"Invalid metadata source: {self.metadata_source}")
+        elif self.metadata_source == "ast" and self.pipeline != "html":
+            errors.append("metadata_source 'ast' requires the html pipeline")
+
         # Validate themes
         required_theme_keys = ["background", "text", "accent"]
         for theme_name, theme_data in [("light", self.light_theme), ("dark", self.dark_theme)]:
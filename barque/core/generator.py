@@ -1,14 +1,29 @@
 """Core PDF generation engine for BARQUE"""
 
+import base64
+import dataclasses
+import hashlib
+import json
+import os
 import subprocess
+import threading
+import time
 from pathlib import Path
-from typing import List, Optional, Dict, Any
-from dataclasses import dataclass
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Iterable, Iterator, List, Optional, Dict, Any, Tuple, Union
+from dataclasses import dataclass, field
+from concurrent.futures import (
+    FIRST_COMPLETED, Future, ProcessPoolExecutor, ThreadPoolExecutor, wait
+)
 
 from .config import BarqueConfig
 from .themes import ThemeProcessor
 from .metadata import MetadataExtractor
+from .cache import RenderCache, tool_versions
+from .manifest import BuildManifest, SourceState, config_fingerprint
+from .pandoc_server import PandocServer, PandocServerError, get_server
+from .store import MetadataStore
+from .usage import ResourceUsage, pdf_page_count, recording, run as run_measured, stage
+from .index import IndexBuilder
 
 
 @dataclass
@@ -18,12 +33,245 @@ class GenerationResult:
     files: List[str]
     metadata: Optional[Dict[str, Any]] = None
     error: Optional[str] = None
+    skipped: bool = False
+    pdf_data: Dict[str, bytes] = field(default_factory=dict)  # In-memory renders by theme
+    source: Optional[str] = None
+    duration: float = 0.0
+    worker: Optional[str] = None
+    duplicate_of: Optional[str] = None  # Source whose identical render was reused
+    usage: ResourceUsage = field(default_factory=ResourceUsage)  # Stage timings, child peak RSS
+    output_bytes: Dict[str, int] = field(default_factory=dict)  # PDF size by theme
+    pages: Dict[str, int] = field(default_factory=dict)  # PDF page count by theme
+
+
+@dataclass
+class ScanResult:
+    """Outcome of a metadata-only scan"""
+    files: int = 0      # Files matched
+    scanned: int = 0    # Metadata extracted
+    cached: int = 0     # Unchanged since the last scan
+    errors: List[Tuple[str, str]] = field(default_factory=list)  # (path, error)
+    duration: float = 0.0
+
+
+@dataclass
+class _BuildPlan:
+    """What a build of one document has to render"""
+    input_file: Path
+    theme: str
+    output: Path
+    render_themes: Optional[List[str]] = None  # None renders every requested theme
+    result: Optional[GenerationResult] = None  # Set when nothing needs rendering
+    state: Optional[SourceState] = None
+    outputs: Dict[str, Path] = field(default_factory=dict)
+    fingerprints: Dict[str, str] = field(default_factory=dict)
+    metadata_file: Optional[Path] = None
+
+
+class _HtmlConversion:
+    """Markdown converted to intermediate HTML at most once per document"""
+
+    def __init__(
+        self,
+        cmd: List[str],
+        server: Optional[PandocServer] = None,
+        server_request: Optional[Callable[[], Dict[str, Any]]] = None,
+        text: Optional[str] = None
+    ):
+        self.cmd = cmd
+        self.server = server
+        self.server_request = server_request
+        self.text = text  # Markdown piped to pandoc's stdin instead of a source file
+        self._html: Optional[str] = None
+        self._error: Optional[subprocess.CalledProcessError] = None
+
+    def html(self) -> str:
+        """Run the conversion on first use and share its output afterwards"""
+        if self._error is not None:
+            raise self._error
+
+        if self._html is None and self.server is not None:
+            try:
+                self._html = self.server.convert(self.server_request())
+            except PandocServerError:
+                # Fall through to a pandoc subprocess, which also reports real errors
+                pass
+
+        if self._html is None:
+            try:
+                result = run_measured(
+                    self.cmd,
+                    input=self.text,
+                    check=True,
+                    capture_output=True,
+                    text=True
+                )
+            except subprocess.CalledProcessError as e:
+                self._error = e
+                raise
+            self._html = result.stdout
+
+        return self._html
+
+
+class _AstConversion(_HtmlConversion):
+    """
+    Markdown parsed once into pandoc's JSON AST
+
+    The AST feeds metadata extraction and is then piped back into pandoc
+    to produce the intermediate HTML, so the markdown is parsed only once.
+    """
+
+    def __init__(self, ast_cmd: List[str], cmd: List[str], source: str):
+        super().__init__(cmd)
+        self.ast_cmd = ast_cmd
+        self.source = source
+        self._ast: Optional[Dict[str, Any]] = None
+
+    def ast(self) -> Dict[str, Any]:
+        """Parse the markdown on first use"""
+        if self._ast is None:
+            result = run_measured(
+                self.ast_cmd,
+                input=self.source,
+                check=True,
+                capture_output=True,
+                text=True
+            )
+            self.text = result.stdout
+            self._ast = json.loads(self.text)
+        return self._ast
+
+    def html(self) -> str:
+        """Render the parsed AST to HTML"""
+        self.ast()
+        return super().html()
+
+
+class SubprocessRenderer:
+    """Render HTML to PDF by piping it into the weasyprint CLI"""
+
+    name = "subprocess"
+
+    def __init__(self, fallback_reason: Optional[str] = None):
+        # Why in-process WeasyPrint could not be used, when it was tried
+        self.fallback_reason = fallback_reason
+
+    def render(self, html: str, output_pdf: Path, css_file: Path, base_url: str) -> None:
+        """Render HTML with a theme stylesheet to output_pdf"""
+        run_measured(
+            [
+                "weasyprint",
+                "-",
+                str(output_pdf),
+                "--stylesheet", str(css_file),
+                "--base-url", base_url,
+            ],
+            input=html,
+            check=True,
+            capture_output=True,
+            text=True
+        )
+
+    def render_bytes(self, html: str, css_file: Path, base_url: str) -> bytes:
+        """Render HTML with a theme stylesheet and return the PDF from stdout"""
+        result = run_measured(
+            [
+                "weasyprint",
+                "-",
+                "-",
+                "--stylesheet", str(css_file),
+                "--base-url", base_url,
+            ],
+            input=html.encode('utf-8'),
+            check=True,
+            capture_output=True
+        )
+        return result.stdout
+
+
+class WeasyPrintRenderer:
+    """
+    Render HTML to PDF with WeasyPrint's Python API in the current process
+
+    Avoids an interpreter start, the cairo/pango imports and font discovery
+    per document. Each thread keeps its own FontConfiguration and parsed
+    theme stylesheets, since WeasyPrint objects are not safe to share.
+    """
+
+    name = "weasyprint"
+
+    def __init__(self):
+        import weasyprint
+        from weasyprint.text.fonts import FontConfiguration
+
+        self._weasyprint = weasyprint
+        self._font_configuration = FontConfiguration
+        self._local = threading.local()
+
+    def render(self, html: str, output_pdf: Path, css_file: Path, base_url: str) -> None:
+        """Render HTML with a theme stylesheet to output_pdf"""
+        font_config, stylesheet = self._stylesheet(css_file)
+        document = self._weasyprint.HTML(string=html, base_url=base_url)
+        document.write_pdf(
+            str(output_pdf),
+            stylesheets=[stylesheet],
+            font_config=font_config
+        )
+
+    def render_bytes(self, html: str, css_file: Path, base_url: str) -> bytes:
+        """Render HTML with a theme stylesheet and return the PDF"""
+        font_config, stylesheet = self._stylesheet(css_file)
+        document = self._weasyprint.HTML(string=html, base_url=base_url)
+        return document.write_pdf(stylesheets=[stylesheet], font_config=font_config)
+
+    def _stylesheet(self, css_file: Path):
+        """Get this thread's font configuration and parsed stylesheet"""
+        state = self._local
+        if not hasattr(state, "font_config"):
+            state.font_config = self._font_configuration()
+            state.stylesheets = {}
+
+        # Keyed on path: compiled theme files are named after their content
+        stylesheet = state.stylesheets.get(css_file)
+        if stylesheet is None:
+            stylesheet = self._weasyprint.CSS(
+                string=css_file.read_text(encoding='utf-8'), font_config=state.font_config
+            )
+            state.stylesheets[css_file] = stylesheet
+
+        return state.font_config, stylesheet
+
+
+def create_renderer(name: str = "auto"):
+    """
+    Create an HTML to PDF renderer
+
+    Args:
+        name: 'weasyprint' (in-process), 'subprocess', or 'auto' to prefer
+            in-process rendering when WeasyPrint can be imported
+
+    Returns:
+        Renderer instance, falling back to the subprocess renderer (whose
+        fallback_reason says why WeasyPrint could not be loaded)
+    """
+    if name in ["auto", "weasyprint"]:
+        try:
+            return WeasyPrintRenderer()
+        except (ImportError, OSError) as e:
+            # OSError: WeasyPrint installed but its native libraries are missing
+            return SubprocessRenderer(fallback_reason=str(e))
+    return SubprocessRenderer()
 
 
 class PDFGenerator:
     """Core PDF generation orchestrator"""
 
-    def __init__(self, config: Optional[BarqueConfig] = None):
+    def __init__(
+        self,
+        config: Optional[BarqueConfig] = None,
+        metadata_store: Optional[MetadataStore] = None
+    ):
         self.config = config or BarqueConfig()
         self.theme_processor = ThemeProcessor(self.config)
         self.metadata_extractor = MetadataExtractor()
@@ -32,9 +280,45 @@ class PDFGenerator:
         self.output_dir = self.config.output_dir
         self.temp_dir = self.output_dir / ".temp"
         self.metadata_dir = self.output_dir / "metadata"
+        self.cache_dir = self.output_dir / ".cache"
 
         self._init_directories()
 
+        # HTML to PDF backend for the html pipeline
+        self.renderer = None
+        if self.config.pipeline == "html":
+            self.renderer = create_renderer(self.config.renderer)
+
+        # Resident pandoc for the html pipeline (subprocess remains the fallback)
+        self.pandoc_server = None
+        if self.config.pipeline == "html" and self.config.converter == "server":
+            self.pandoc_server = get_server(self.config.pandoc_server_url or None)
+
+        # Reuse previous renders when sources, styles and tools are unchanged
+        self.render_cache = None
+        if self.config.cache_enabled:
+            self.render_cache = RenderCache(self.cache_dir / "renders")
+
+        # Track build inputs so unchanged documents are skipped
+        self.manifest = None
+        if self.config.incremental_build:
+            self.manifest = BuildManifest.load(self.cache_dir / "manifest.json")
+        self._fingerprints: Dict[str, str] = {}
+        self.pruned_sources: List[str] = []
+
+        # Opened on first use, so render-only worker processes never touch it
+        self._metadata_store = metadata_store
+        self._store_lock = threading.Lock()
+
+    @property
+    def metadata_store(self) -> MetadataStore:
+        """Metadata database for generated documents (metadata/metadata.db)"""
+        if self._metadata_store is None:
+            with self._store_lock:
+                if self._metadata_store is None:
+                    self._metadata_store = MetadataStore(self.metadata_dir / "metadata.db")
+        return self._metadata_store
+
     def _init_directories(self) -> None:
         """Initialize output directories"""
         self.output_dir.mkdir(parents=True, exist_ok=True)
@@ -62,50 +346,279 @@ class PDFGenerator:
         Returns:
             GenerationResult with success status and generated files
         """
-        try:
-            output = output_dir or self.output_dir
-            files = []
+        result = self._build(input_file, theme, output_dir)
+        self.metadata_store.flush()
+        return result
+
+    def _build(
+        self,
+        input_file: Path,
+        theme: str,
+        output_dir: Optional[Path]
+    ) -> GenerationResult:
+        """Plan, render and record one document (metadata writes stay batched)"""
+        plan = self._plan_build(input_file, theme, output_dir or self.output_dir)
+        if plan.result is not None:
+            return plan.result
+
+        result = self._render_document(input_file, theme, plan.output, plan.render_themes)
+        return self._finish_build(plan, result)
+
+    def render_markdown(
+        self,
+        markdown: Union[str, bytes],
+        theme: str = "both",
+        name: str = "document",
+        resource_dir: Optional[Path] = None
+    ) -> GenerationResult:
+        """
+        Render markdown held in memory straight to PDF bytes
 
-            # Extract metadata
-            metadata = self.metadata_extractor.extract(input_file)
+        The markdown is piped into pandoc over stdin and each PDF comes back
+        from the renderer in memory, so nothing is written to the output
+        directory. Only the compiled theme stylesheets, written once per
+        configuration, live on disk.
 
-            # Generate CSS for themes
-            self._generate_theme_css()
+        Args:
+            markdown: Markdown content as text or UTF-8 bytes
+            theme: Theme selection ('light', 'dark', or 'both')
+            name: Document name used as title and for PDF file names
+            resource_dir: Directory relative image references resolve against (default: cwd)
 
-            # Generate light theme if requested
-            if theme in ["light", "both"]:
-                light_pdf = self._generate_theme_pdf(input_file, "light", output)
-                if light_pdf:
-                    files.append(str(light_pdf))
+        Returns:
+            GenerationResult with the PDFs in pdf_data, keyed by theme
+        """
+        started = time.perf_counter()
+        if isinstance(markdown, bytes):
+            markdown = markdown.decode('utf-8')
+        resource_dir = (resource_dir or Path.cwd()).resolve()
+        usage = ResourceUsage()
 
-            # Generate dark theme if requested
-            if theme in ["dark", "both"]:
-                dark_pdf = self._generate_theme_pdf(input_file, "dark", output)
-                if dark_pdf:
-                    files.append(str(dark_pdf))
+        try:
+            with recording(usage):
+                if self.config.metadata_source == "ast":
+                    cmd = self._build_html_command("-", name, from_format="json")
+                    cmd.extend(["--resource-path", str(resource_dir)])
+                    conversion = _AstConversion(self._build_ast_command(), cmd, markdown)
+                    with stage("convert"):
+                        ast = conversion.ast()
+                    with stage("metadata"):
+                        metadata = self.metadata_extractor.extract_from_ast(ast, markdown, name=name)
+                else:
+                    cmd = self._build_html_command("-", name)
+                    cmd.extend(["--resource-path", str(resource_dir)])
+                    conversion = _HtmlConversion(
+                        cmd,
+                        self.pandoc_server,
+                        lambda: self._build_server_request(markdown, name, resource_dir),
+                        text=markdown
+                    )
+                    with stage("metadata"):
+                        metadata = self.metadata_extractor.extract_text(markdown, name)
+
+                # The pandoc pipeline has no renderer of its own; create one on demand
+                if self.renderer is None:
+                    self.renderer = create_renderer(self.config.renderer)
+
+                pdf_data = {}
+                for render_theme in self._requested_themes(theme):
+                    with stage("css"):
+                        css_file = self.theme_processor.theme_css_file(render_theme, self.temp_dir)
+                    with stage("convert"):
+                        html = conversion.html()
+                    with stage("render"):
+                        pdf_data[render_theme] = self.renderer.render_bytes(
+                            html, css_file, str(resource_dir)
+                        )
 
-            # Save metadata
             metadata["pdf_files"] = {
-                "light": f"light/{input_file.stem}-light.pdf" if theme in ["light", "both"] else None,
-                "dark": f"dark/{input_file.stem}-dark.pdf" if theme in ["dark", "both"] else None,
+                t: f"{name}-{t}.pdf" if t in pdf_data else None for t in ("light", "dark")
             }
 
-            metadata_file = self.metadata_dir / f"{input_file.stem}.json"
-            self.metadata_extractor.save_metadata(metadata, metadata_file)
+            result = GenerationResult(
+                success=True,
+                files=[],
+                metadata=metadata,
+                pdf_data=pdf_data,
+                output_bytes={t: len(pdf) for t, pdf in pdf_data.items()}
+            )
+            for render_theme, pdf in pdf_data.items():
+                pages = pdf_page_count(pdf)
+                if pages is not None:
+                    result.pages[render_theme] = pages
 
-            return GenerationResult(
+        except subprocess.CalledProcessError as e:
+            stderr = e.stderr.decode('utf-8', 'replace') if isinstance(e.stderr, bytes) else e.stderr
+            result = GenerationResult(
+                success=False,
+                files=[],
+                error=stderr or str(e)
+            )
+
+        except Exception as e:
+            result = GenerationResult(
+                success=False,
+                files=[],
+                error=str(e)
+            )
+
+        result.source = name
+        result.duration = time.perf_counter() - started
+        result.worker = _worker_label()
+        result.usage = usage
+        return result
+
+    def _plan_build(self, input_file: Path, theme: str, output: Path) -> "_BuildPlan":
+        """Decide which themes of a document need rendering"""
+        plan = _BuildPlan(input_file, theme, output)
+        if self.manifest is None:
+            return plan
+
+        # Incremental build: only render themes whose inputs changed
+        try:
+            themes = self._requested_themes(theme)
+            plan.outputs = {t: self._output_pdf(input_file, t, output) for t in themes}
+            plan.fingerprints = {t: self._theme_fingerprint(t) for t in themes}
+            plan.metadata_file = self.metadata_dir / f"{input_file.stem}.json"
+            plan.state = self.manifest.inspect(input_file)
+            plan.render_themes = self.manifest.stale_themes(
+                input_file, plan.state, plan.outputs, plan.fingerprints, plan.metadata_file
+            )
+        except OSError as e:
+            plan.result = GenerationResult(
+                success=False,
+                files=[],
+                error=str(e),
+                source=str(input_file)
+            )
+            return plan
+
+        if not plan.render_themes:
+            plan.result = GenerationResult(
+                success=True,
+                files=[str(pdf) for pdf in plan.outputs.values()],
+                skipped=True,
+                source=str(input_file)
+            )
+        return plan
+
+    def _finish_build(self, plan: "_BuildPlan", result: GenerationResult) -> GenerationResult:
+        """Record a rendered document in the metadata store, search index and build manifest"""
+        if result.success and result.metadata:
+            try:
+                text = plan.input_file.read_text(encoding='utf-8', errors='replace')
+            except OSError:
+                text = None
+            # Copies reuse another source's render and took no render time of their own
+            render_seconds = result.duration if result.worker else None
+            self.metadata_store.put(result.metadata, text, render_seconds)
+
+        if self.manifest is None or plan.state is None or not result.success:
+            return result
+
+        rendered = {
+            t: plan.outputs[t] for t in plan.render_themes
+            if str(plan.outputs[t]) in result.files
+        }
+        self.manifest.record(
+            plan.input_file, plan.state, rendered, plan.fingerprints, plan.metadata_file
+        )
+        result.files = [
+            str(pdf) for t, pdf in plan.outputs.items()
+            if t not in plan.render_themes or t in rendered
+        ]
+        return result
+
+    def _render_document(
+        self,
+        input_file: Path,
+        theme: str,
+        output: Path,
+        render_themes: Optional[List[str]] = None
+    ) -> GenerationResult:
+        """Extract metadata and render the requested (or given subset of) themes"""
+        started = time.perf_counter()
+        usage = ResourceUsage()
+        outputs = {}
+        try:
+            with recording(usage):
+                if render_themes is None:
+                    render_themes = self._requested_themes(theme)
+
+                # Convert markdown once and paint it with each theme
+                conversion = None
+                if self.config.pipeline == "html":
+                    if self.config.metadata_source == "ast":
+                        conversion = _AstConversion(
+                            self._build_ast_command(),
+                            self._build_html_command("-", input_file.stem, from_format="json"),
+                            input_file.read_text(encoding='utf-8')
+                        )
+                    else:
+                        conversion = _HtmlConversion(
+                            self._build_html_command(str(input_file), input_file.stem),
+                            self.pandoc_server,
+                            lambda: self._build_server_request(
+                                input_file.read_text(encoding='utf-8'),
+                                input_file.stem,
+                                input_file.parent
+                            )
+                        )
+
+                # Extract metadata (from the conversion's AST when it has one)
+                if isinstance(conversion, _AstConversion):
+                    with stage("convert"):
+                        ast = conversion.ast()
+                    with stage("metadata"):
+                        metadata = self.metadata_extractor.extract_from_ast(
+                            ast, conversion.source, input_file
+                        )
+                else:
+                    with stage("metadata"):
+                        metadata = self.metadata_extractor.extract(input_file)
+
+                # Generate each requested theme
+                for render_theme in render_themes:
+                    theme_pdf = self._generate_theme_pdf(
+                        input_file, render_theme, output, conversion
+                    )
+                    if theme_pdf:
+                        outputs[render_theme] = theme_pdf
+
+                # Save metadata
+                metadata["pdf_files"] = {
+                    "light": f"light/{input_file.stem}-light.pdf" if theme in ["light", "both"] else None,
+                    "dark": f"dark/{input_file.stem}-dark.pdf" if theme in ["dark", "both"] else None,
+                }
+
+                metadata_file = self.metadata_dir / f"{input_file.stem}.json"
+                with stage("metadata"):
+                    self.metadata_extractor.save_metadata(metadata, metadata_file)
+
+            result = GenerationResult(
                 success=True,
-                files=files,
+                files=[str(pdf) for pdf in outputs.values()],
                 metadata=metadata
             )
+            for render_theme, pdf in outputs.items():
+                result.output_bytes[render_theme] = pdf.stat().st_size
+                pages = pdf_page_count(pdf)
+                if pages is not None:
+                    result.pages[render_theme] = pages
 
         except Exception as e:
-            return GenerationResult(
+            result = GenerationResult(
                 success=False,
                 files=[],
                 error=str(e)
             )
 
+        result.source = str(input_file)
+        result.duration = time.perf_counter() - started
+        result.worker = _worker_label()
+        result.usage = usage
+        return result
+
     def batch_generate(
         self,
         input_dir: Path,
@@ -113,6 +626,8 @@ class PDFGenerator:
         output_dir: Optional[Path] = None,
         workers: Optional[int] = None,
         pattern: str = "**/*.md",
+        backend: Optional[str] = None,
+        on_result: Optional[Callable[[GenerationResult], None]] = None,
     ) -> List[GenerationResult]:
         """
         Generate PDFs for all markdown files in directory
@@ -123,68 +638,462 @@ class PDFGenerator:
             output_dir: Optional custom output directory
             workers: Number of parallel workers (default from config)
             pattern: Glob pattern for matching files (default: **/*.md)
+            backend: 'threads' or 'processes' (default from config)
+            on_result: Optional callback invoked as each document completes
 
         Returns:
             List of GenerationResults
         """
-        md_files = list(input_dir.glob(pattern))
-        workers = workers or self.config.workers
         results = []
+        for result in self.iter_generate(
+            input_dir.glob(pattern), theme, output_dir, workers, backend
+        ):
+            results.append(result)
+            if on_result:
+                on_result(result)
+
+        self.finalize_batch(input_dir)
+
+        return results
+
+    def iter_generate(
+        self,
+        paths: Iterable[Path],
+        theme: str = "both",
+        output_dir: Optional[Path] = None,
+        workers: Optional[int] = None,
+        backend: Optional[str] = None,
+        max_in_flight: Optional[int] = None,
+    ) -> Iterator[GenerationResult]:
+        """
+        Generate PDFs for a stream of markdown files, yielding results as they finish
+
+        Paths are pulled from the iterable only as capacity frees up, so at
+        most max_in_flight documents are queued or rendering at any time and
+        memory stays flat regardless of corpus size. Results arrive in
+        completion order. With deduplication enabled, byte-identical
+        sources with the same name (in different directories) are rendered
+        once and the copies reuse that render (see result.duplicate_of);
+        this keeps one small entry per unique source for the whole run.
+        Call finalize_batch() afterwards to persist incremental build state.
+
+        Args:
+            paths: Any iterable of markdown files, e.g. a lazy glob
+            theme: Theme selection
+            output_dir: Optional custom output directory
+            workers: Number of parallel workers (default from config)
+            backend: 'threads' or 'processes' (default from config)
+            max_in_flight: Documents outstanding at once (default: 4 per worker)
+
+        Yields:
+            GenerationResult for each document
+        """
+        workers = workers or self.config.workers
+        backend = backend or self.config.backend
+        max_in_flight = max(workers, max_in_flight or workers * 4)
+
+        # Only the first of each set of identical sources is dispatched
+        dedupe = _BatchDedupe(self.manifest) if self.config.deduplicate else None
+        if dedupe:
+            paths = dedupe.unique(paths)
+
+        try:
+            for result in self._iter_results(
+                paths, theme, output_dir, workers, backend, max_in_flight
+            ):
+                yield result
+                if dedupe:
+                    for duplicate, original in dedupe.complete(result):
+                        yield self._finish_duplicate(duplicate, theme, output_dir, original)
+            if dedupe:
+                # Copies of originals that finished before the copies were listed
+                for duplicate, original in dedupe.complete():
+                    yield self._finish_duplicate(duplicate, theme, output_dir, original)
+        finally:
+            self.metadata_store.flush()
+
+    def _finish_duplicate(
+        self,
+        input_file: Path,
+        theme: str,
+        output_dir: Optional[Path],
+        original: GenerationResult
+    ) -> GenerationResult:
+        """
+        Complete a source that is byte-identical to an already built one
+
+        Copies share the original's stem (pandoc stamps it as the title, so
+        sources with other names render differently), which means the
+        original's PDFs and metadata record are already this source's own.
+        The record keeps describing the original rather than being
+        repointed at the copy; only the copy's build record is written.
+        """
+        if original.skipped:
+            # The original was up to date, which says nothing about this copy
+            return self._build(input_file, theme, output_dir)
+        if not original.success:
+            return GenerationResult(
+                success=False,
+                files=[],
+                error=original.error,
+                source=str(input_file),
+                duplicate_of=original.source
+            )
+
+        plan = self._plan_build(input_file, theme, output_dir or self.output_dir)
+        if plan.result is not None:
+            return plan.result
 
+        metadata = self.metadata_store.get(input_file.stem)
+        if metadata is None:
+            return self._build(input_file, theme, output_dir)
+
+        result = GenerationResult(
+            success=True,
+            files=list(original.files),
+            metadata=metadata,
+            source=str(input_file),
+            duplicate_of=original.source
+        )
+        return self._finish_build(plan, result)
+
+    def _iter_results(
+        self,
+        paths: Iterable[Path],
+        theme: str,
+        output_dir: Optional[Path],
+        workers: int,
+        backend: str,
+        max_in_flight: int
+    ) -> Iterator[GenerationResult]:
+        """Dispatch documents to the configured backend"""
         if workers == 1:
             # Sequential processing
-            for md_file in md_files:
-                result = self.generate(md_file, theme, output_dir)
-                results.append(result)
+            for md_file in paths:
+                yield self._build(md_file, theme, output_dir)
+        elif backend == "processes":
+            # Warm worker processes, each with its own generator
+            yield from self._iter_processes(paths, theme, output_dir, workers, max_in_flight)
         else:
             # Parallel processing
-            with ThreadPoolExecutor(max_workers=workers) as executor:
-                future_to_file = {
-                    executor.submit(self.generate, md_file, theme, output_dir): md_file
-                    for md_file in md_files
-                }
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="worker") as executor:
+                pending = {}
+                try:
+                    for md_file in paths:
+                        if len(pending) >= max_in_flight:
+                            for _, future in _completed(pending):
+                                yield future.result()
+                        future = executor.submit(self._build, md_file, theme, output_dir)
+                        pending[future] = md_file
+
+                    while pending:
+                        for _, future in _completed(pending):
+                            yield future.result()
+                finally:
+                    # The consumer stopped early: drop work that has not started
+                    for future in pending:
+                        future.cancel()
+
+    def _iter_processes(
+        self,
+        paths: Iterable[Path],
+        theme: str,
+        output_dir: Optional[Path],
+        workers: int,
+        max_in_flight: int
+    ) -> Iterator[GenerationResult]:
+        """
+        Render documents on a pool of warm worker processes
 
-                for future in as_completed(future_to_file):
-                    result = future.result()
-                    results.append(result)
+        Incremental planning and manifest updates stay in this process;
+        workers only render. Documents are dispatched in chunks to amortize
+        IPC, and results are reported as each chunk completes.
+        """
+        output = output_dir or self.output_dir
+        chunksize = max(1, min(32, max_in_flight // (workers * 2)))
+        max_chunks = max(workers, max_in_flight // chunksize)
+
+        # Compile stylesheets up front so workers only ever read them
+        for requested in self._requested_themes(theme):
+            self.theme_processor.theme_css_file(requested, self.temp_dir)
+
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker,
+            initargs=(self.config,)
+        ) as executor:
+            pending = {}
+
+            def submit(chunk: List["_BuildPlan"]) -> None:
+                tasks = [(p.input_file, p.theme, p.output, p.render_themes) for p in chunk]
+                pending[executor.submit(_render_chunk, tasks)] = chunk
+
+            try:
+                chunk = []
+                for md_file in paths:
+                    plan = self._plan_build(md_file, theme, output)
+                    if plan.result is not None:
+                        yield plan.result
+                        continue
+
+                    chunk.append(plan)
+                    if len(chunk) < chunksize:
+                        continue
+                    if len(pending) >= max_chunks:
+                        for done, future in _completed(pending):
+                            yield from self._chunk_results(done, future)
+                    submit(chunk)
+                    chunk = []
+
+                if chunk:
+                    submit(chunk)
+                while pending:
+                    for done, future in _completed(pending):
+                        yield from self._chunk_results(done, future)
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def _chunk_results(
+        self,
+        chunk: List["_BuildPlan"],
+        future: Future
+    ) -> Iterator[GenerationResult]:
+        """Finish the documents of a completed worker chunk"""
+        try:
+            chunk_results = future.result()
+        except Exception as e:
+            # A worker died (e.g. killed by the OS): fail its documents only
+            chunk_results = [
+                GenerationResult(
+                    success=False,
+                    files=[],
+                    error=str(e),
+                    source=str(plan.input_file)
+                )
+                for plan in chunk
+            ]
+
+        for plan, result in zip(chunk, chunk_results):
+            yield self._finish_build(plan, result)
+
+    def scan(
+        self,
+        input_dir: Path,
+        pattern: str = "**/*.md",
+        workers: Optional[int] = None,
+        chunk_size: int = 256,
+        on_progress: Optional[Callable[[ScanResult], None]] = None,
+    ) -> ScanResult:
+        """
+        Extract metadata for a directory tree without rendering anything
 
-        return results
+        Files are stat()ed in this process and compared with the previous
+        scan, so only new or modified files (by size and mtime) are read.
+        Those are parsed in chunks on a process pool and the results go to
+        the metadata store, ready for generate_index(). Paths are streamed
+        from the glob, so memory stays flat regardless of tree size.
 
-    def _generate_theme_css(self) -> None:
-        """Generate CSS files for both themes"""
-        self.theme_processor.save_theme_css("light", self.temp_dir)
-        self.theme_processor.save_theme_css("dark", self.temp_dir)
+        Args:
+            input_dir: Directory containing markdown files
+            pattern: Glob pattern for matching files (default: **/*.md)
+            workers: Number of worker processes (default from config)
+            chunk_size: Files per worker task
+            on_progress: Optional callback invoked with the running totals
+
+        Returns:
+            ScanResult with file counts and errors
+        """
+        started = time.perf_counter()
+        workers = workers or self.config.workers
+        summary = ScanResult()
+
+        def changed_files(paths: List[Path]) -> List[Tuple[str, int, int]]:
+            states = []
+            for path in paths:
+                try:
+                    stat = path.stat()
+                except OSError as e:
+                    summary.errors.append((str(path), str(e)))
+                    continue
+                states.append((os.path.abspath(path), stat.st_size, stat.st_mtime_ns))
+            unchanged = self.metadata_store.unchanged_files(states)
+            summary.files += len(paths)
+            summary.cached += len(unchanged)
+            return [state for state in states if state[0] not in unchanged]
+
+        def record(states: List[Tuple[str, int, int]], results: List[Tuple]) -> None:
+            scanned = []
+            # Keep the PDF links of documents that were already rendered
+            rendered = self.metadata_store.render_fields(
+                [str(metadata["name"]) for metadata, _ in results if metadata is not None]
+            )
+            for state, (metadata, error) in zip(states, results):
+                if metadata is None:
+                    summary.errors.append((state[0], error))
+                    continue
+                metadata.update(rendered.get(str(metadata["name"]), {}))
+                self.metadata_store.put(metadata)
+                scanned.append(state)
+            self.metadata_store.record_scanned(scanned)
+            summary.scanned += len(scanned)
+            summary.duration = time.perf_counter() - started
+            if on_progress:
+                on_progress(summary)
+
+        chunks = _chunked(input_dir.glob(pattern), chunk_size)
+        if workers == 1:
+            for chunk in chunks:
+                states = changed_files(chunk)
+                record(states, _scan_chunk([path for path, _, _ in states]))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                pending = {}
+
+                def collect(states: List[Tuple[str, int, int]], future: Future) -> None:
+                    try:
+                        results = future.result()
+                    except Exception as e:
+                        results = [(None, str(e))] * len(states)
+                    record(states, results)
+
+                try:
+                    for chunk in chunks:
+                        states = changed_files(chunk)
+                        if not states:
+                            continue
+                        if len(pending) >= workers * 2:
+                            for done, future in _completed(pending):
+                                collect(done, future)
+                        future = executor.submit(_scan_chunk, [path for path, _, _ in states])
+                        pending[future] = states
+
+                    while pending:
+                        for done, future in _completed(pending):
+                            collect(done, future)
+                finally:
+                    for future in pending:
+                        future.cancel()
+
+        self.metadata_store.flush()
+        summary.duration = time.perf_counter() - started
+        return summary
+
+    def finalize_batch(self, input_dir: Path) -> List[str]:
+        """
+        Persist incremental build state after a batch
+
+        Prunes outputs whose sources under input_dir were deleted and saves
+        the build manifest. Does nothing unless incremental builds are enabled.
+
+        Returns:
+            Source paths whose outputs were pruned
+        """
+        if self.manifest is None:
+            return []
+
+        pruned = self.manifest.prune(input_dir)
+        self.manifest.save()
+
+        # Drop store records whose metadata file went with the pruned source
+        self.metadata_store.delete([
+            Path(source).stem for source in pruned
+            if not (self.metadata_dir / f"{Path(source).stem}.json").exists()
+        ])
+        self.pruned_sources.extend(pruned)
+        return pruned
+
+    @staticmethod
+    def _requested_themes(theme: str) -> List[str]:
+        """Expand a theme selection into individual themes"""
+        return [t for t in ("light", "dark") if theme in [t, "both"]]
+
+    def _output_pdf(self, input_file: Path, theme: str, output_dir: Path) -> Path:
+        """Get the output PDF path for a document and theme"""
+        if self.config.organize_by_theme:
+            return output_dir / theme / f"{input_file.stem}-{theme}.pdf"
+        return output_dir / f"{input_file.stem}-{theme}.pdf"
+
+    def _theme_fingerprint(self, theme: str) -> str:
+        """Fingerprint the configuration that shapes a theme's output"""
+        if theme not in self._fingerprints:
+            self._fingerprints[theme] = config_fingerprint(
+                self.theme_processor.compile_css(theme),
+                str(self.config.math_enabled),
+                tool_versions(),
+            )
+        return self._fingerprints[theme]
 
     def _generate_theme_pdf(
         self,
         input_file: Path,
         theme: str,
-        output_dir: Path
+        output_dir: Path,
+        conversion: Optional["_HtmlConversion"] = None
     ) -> Optional[Path]:
-        """Generate PDF with specific theme"""
+        """
+        Generate PDF with specific theme
+
+        With a conversion the shared intermediate HTML is painted with the
+        theme stylesheet; without one pandoc drives the whole render.
+        """
         try:
             # Determine output location
-            if self.config.organize_by_theme:
-                pdf_output_dir = output_dir / theme
-            else:
-                pdf_output_dir = output_dir
-
-            pdf_output_dir.mkdir(parents=True, exist_ok=True)
-            output_pdf = pdf_output_dir / f"{input_file.stem}-{theme}.pdf"
+            output_pdf = self._output_pdf(input_file, theme, output_dir)
+            output_pdf.parent.mkdir(parents=True, exist_ok=True)
 
-            # Get CSS file
-            css_file = self.temp_dir / f"{theme}-theme.css"
+            # Get the compiled stylesheet (written once per theme configuration)
+            with stage("css"):
+                css_file = self.theme_processor.theme_css_file(theme, self.temp_dir)
 
-            # Build pandoc command
-            cmd = self._build_pandoc_command(input_file, output_pdf, css_file)
-
-            # Execute pandoc
-            result = subprocess.run(
-                cmd,
-                check=True,
-                capture_output=True,
-                text=True
-            )
+            # Build render command
+            if conversion is None:
+                cmd = self._build_pandoc_command(input_file, output_pdf, css_file)
+                key_cmd = cmd
+            else:
+                cmd = None
+                key_cmd = conversion.cmd + ["weasyprint"]
+
+            # Serve from the render cache when possible
+            cache_key = None
+            if self.render_cache:
+                with stage("cache"):
+                    cache_key = self.render_cache.key(
+                        input_file,
+                        css_file,
+                        self._cache_args(key_cmd, input_file, output_pdf, css_file)
+                    )
+                    hit = self.render_cache.fetch(cache_key, output_pdf)
+                    if not hit:
+                        # Never write through a hardlink shared with a cache entry
+                        output_pdf.unlink(missing_ok=True)
+                if hit:
+                    return output_pdf
+
+            if conversion is None:
+                # Execute pandoc (it drives the PDF engine, so this is all one stage)
+                with stage("render"):
+                    result = run_measured(
+                        cmd,
+                        check=True,
+                        capture_output=True,
+                        text=True
+                    )
+            else:
+                # Paint the converted HTML with the theme stylesheet
+                with stage("convert"):
+                    html = conversion.html()
+                with stage("render"):
+                    self.renderer.render(
+                        html,
+                        output_pdf,
+                        css_file,
+                        str(input_file.parent.resolve())
+                    )
+
+            if cache_key:
+                with stage("cache"):
+                    self.render_cache.store(cache_key, output_pdf)
 
             return output_pdf
 
@@ -197,138 +1106,286 @@ class PDFGenerator:
             print(f"Unexpected error generating {theme} PDF: {e}")
             return None
 
-    def _build_pandoc_command(
-        self,
-        input_file: Path,
-        output_pdf: Path,
-        css_file: Path
-    ) -> List[str]:
-        """Build pandoc command with all options"""
-        cmd = [
-            "pandoc",
-            str(input_file),
-            "--from", "markdown",
+    def _pandoc_options(self, title: str, from_format: str = "markdown") -> List[str]:
+        """Build the markdown to HTML conversion options shared by all pipelines"""
+        options = [
+            "--from", from_format,
             "--to", "html5",
             "--standalone",
             "--embed-resources",
-            "--css", str(css_file),
             "--toc",  # Table of contents
             "--toc-depth", "3",
             "--number-sections",
-            f"--metadata=title:{input_file.stem}",
-            "--pdf-engine", "weasyprint",
+            f"--metadata=title:{title}",
         ]
 
         # Add MathJax support if enabled
         if self.config.math_enabled:
-            cmd.extend([
+            options.extend([
                 "--mathjax",
                 "--mathml",
             ])
 
+        return options
+
+    def _build_pandoc_command(
+        self,
+        input_file: Path,
+        output_pdf: Path,
+        css_file: Path
+    ) -> List[str]:
+        """Build pandoc command with all options"""
+        cmd = ["pandoc", str(input_file)]
+        cmd.extend(self._pandoc_options(input_file.stem))
+        cmd.extend([
+            "--css", str(css_file),
+            "--pdf-engine", "weasyprint",
+        ])
+
         # Output file
         cmd.extend(["--output", str(output_pdf)])
 
         return cmd
 
-    def generate_index(self) -> Path:
-        """Generate comprehensive index document"""
-        index_file = self.output_dir / "INDEX.md"
+    def _build_html_command(
+        self,
+        source: str,
+        title: str,
+        from_format: str = "markdown"
+    ) -> List[str]:
+        """
+        Build pandoc command converting markdown to theme-neutral HTML on stdout
 
-        # Collect all metadata files
-        metadata_files = sorted(
-            self.metadata_dir.glob("*.json"),
-            key=lambda x: x.stat().st_mtime,
-            reverse=True
-        )
+        Args:
+            source: Markdown file path, or '-' to read from stdin
+            title: Document title metadata
+            from_format: Input format ('json' to convert a pandoc AST)
+        """
+        cmd = ["pandoc", source]
+        cmd.extend(self._pandoc_options(title, from_format))
+
+        # Theme stylesheets are applied by the PDF engine, not pandoc's defaults
+        cmd.extend(["--variable", "document-css=false"])
+
+        return cmd
+
+    @staticmethod
+    def _build_ast_command() -> List[str]:
+        """Build pandoc command parsing markdown from stdin into a JSON AST"""
+        return ["pandoc", "-", "--from", "markdown", "--to", "json"]
+
+    def _build_server_request(
+        self,
+        content: str,
+        title: str,
+        resource_dir: Path
+    ) -> Dict[str, Any]:
+        """Build the pandoc-server equivalent of _build_html_command"""
+        request: Dict[str, Any] = {
+            "text": content,
+            "from": "markdown",
+            "to": "html5",
+            "standalone": True,
+            "embed-resources": True,
+            "table-of-contents": True,
+            "toc-depth": 3,
+            "number-sections": True,
+            "metadata": {"title": title},
+            "variables": {"document-css": False},
+        }
+
+        # Same effective method as "--mathjax --mathml" (the last flag wins)
+        if self.config.math_enabled:
+            request["html-math-method"] = "mathml"
+
+        # The server is sandboxed, so referenced images travel with the request
+        files = {}
+        for target in MetadataExtractor.find_images(content):
+            image = resource_dir / target
+            if "://" not in target and image.is_file():
+                files[target] = base64.b64encode(image.read_bytes()).decode('ascii')
+        if files:
+            request["files"] = files
+
+        return request
+
+    @staticmethod
+    def _cache_args(cmd: List[str], input_file: Path, output_pdf: Path, css_file: Path) -> List[str]:
+        """Normalize run-specific paths out of a command for use in cache keys"""
+        placeholders = {
+            str(input_file): "<input>",
+            str(output_pdf): "<output>",
+            str(css_file): "<css>",
+        }
+        return [placeholders.get(arg, arg) for arg in cmd]
+
+    def generate_index(self, force: bool = False) -> Path:
+        """
+        Generate comprehensive index document
 
-        if not metadata_files:
-            index_file.write_text("# PDF Documentation Index\n\nNo documents generated yet.")
-            return index_file
+        The index is streamed from the metadata store into every configured
+        format in one pass, and left untouched when the store has not
+        changed since it was last written.
 
-        # Calculate statistics
-        total_docs = len(metadata_files)
-        total_size = 0
-        total_words = 0
+        Args:
+            force: Rewrite the index even when it is current
 
-        for meta_file in metadata_files:
-            metadata = self.metadata_extractor.load_metadata(meta_file)
-            total_size += metadata.get("file_size", 0)
-            total_words += metadata.get("word_count", 0)
+        Returns:
+            Path to the markdown index (or the first configured format)
+        """
+        totals = self.metadata_store.totals()
+        if not totals["documents"] and any(self.metadata_dir.glob("*.json")):
+            # Output directory from before the store existed
+            self.metadata_store.import_json(self.metadata_dir)
+
+        builder = IndexBuilder(
+            self.output_dir,
+            self.metadata_store,
+            self.config.project_name,
+            self.config.index_formats
+        )
+        outputs = builder.build(force=force)
+        return outputs.get("md", next(iter(outputs.values()), self.output_dir / "INDEX.md"))
+
+
+class _BatchDedupe:
+    """
+    Route byte-identical sources in a batch to a single render
+
+    Sources are keyed by content hash and stem, plus the directory when the
+    document references local images. The stem belongs in the key because
+    pandoc stamps it as the title, so identical text under another name
+    renders to different PDFs; copies are therefore same-named files in
+    different directories, whose outputs and metadata name coincide. Only
+    the outcome of each original is kept (not its metadata), so memory
+    stays small per unique source.
+
+    With a build manifest the content hash comes from the manifest, which
+    only re-reads sources whose size or mtime changed.
+    """
+
+    def __init__(self, manifest: Optional[BuildManifest] = None):
+        self.manifest = manifest
+        self.in_flight: Dict[str, bytes] = {}           # original source -> key
+        self.waiting: Dict[bytes, List[Path]] = {}      # key -> copies awaiting the original
+        self.finished: Dict[bytes, GenerationResult] = {}
+        self.ready: List[Tuple[Path, GenerationResult]] = []
+
+    def unique(self, paths: Iterable[Path]) -> Iterator[Path]:
+        """Pass through the first source of each key and hold back the copies"""
+        for path in paths:
+            try:
+                key = self._key(path, self.manifest)
+            except OSError:
+                # Let the build report the error
+                yield path
+                continue
+
+            if key in self.finished:
+                self.ready.append((path, self.finished[key]))
+            elif key in self.waiting:
+                self.waiting[key].append(path)
+            else:
+                self.in_flight[str(path)] = key
+                self.waiting[key] = []
+                yield path
 
-        # Build index content
-        content = f"""# PDF Documentation Index
+    def complete(
+        self,
+        result: Optional[GenerationResult] = None
+    ) -> List[Tuple[Path, GenerationResult]]:
+        """Record a finished original and return the copies that can now complete"""
+        key = self.in_flight.pop(result.source, None) if result else None
+        if key is not None:
+            # Keep the outcome without the metadata or PDF bytes
+            self.finished[key] = GenerationResult(
+                success=result.success,
+                files=result.files,
+                error=result.error,
+                skipped=result.skipped,
+                source=result.source
+            )
+            self.ready.extend((path, self.finished[key]) for path in self.waiting.pop(key))
 
-**Generated:** {self._get_timestamp()}
-**Project:** {self.config.project_name}
+        ready, self.ready = self.ready, []
+        return ready
 
-## 📊 Statistics
+    @staticmethod
+    def _key(path: Path, manifest: Optional[BuildManifest] = None) -> bytes:
+        """Identify everything about a source that shapes its render"""
+        if manifest is not None:
+            state = manifest.inspect(path)
+            digest = hashlib.sha256(bytes.fromhex(state.sha256))
+            local_images = bool(state.images)
+        else:
+            content = path.read_bytes()
+            digest = hashlib.sha256(content)
+            text = content.decode("utf-8", errors="replace")
+            local_images = any(
+                "://" not in target and not target.startswith("data:")
+                for target in MetadataExtractor.find_images(text)
+            )
+        digest.update(b"\0" + path.stem.encode("utf-8"))
 
-- **Total Documents**: {total_docs}
-- **Total Words**: {total_words:,}
-- **Total Size**: {MetadataExtractor.format_bytes(total_size)}
+        # Relative image references resolve against the document's directory
+        if local_images:
+            digest.update(b"\0" + os.path.abspath(path.parent).encode("utf-8"))
+        return digest.digest()
 
-## 🎨 Themes
 
-### Light Mode
-Browse [Light Theme PDFs](light/)
-- Clean, bright interface
-- Perfect for printing
-- Easy on the eyes in well-lit environments
+def _completed(pending: Dict[Future, Any]) -> Iterator[Tuple[Any, Future]]:
+    """Wait for at least one pending future and pop every finished one"""
+    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+    for future in done:
+        yield pending.pop(future), future
 
-### Dark Mode
-Browse [Dark Theme PDFs](dark/)
-- Reduced eye strain
-- Modern dark aesthetic
-- Great for screen reading
 
-## 📚 All Documents
+def _worker_label() -> str:
+    """Identify the thread or process that rendered a document"""
+    thread = threading.current_thread()
+    if thread is threading.main_thread():
+        return f"pid-{os.getpid()}"
+    return thread.name
 
-"""
 
-        # Add document entries
-        for meta_file in metadata_files:
-            metadata = self.metadata_extractor.load_metadata(meta_file)
-            title = metadata.get("title", metadata["name"])
-            word_count = metadata.get("word_count", 0)
-            section_count = metadata.get("section_count", 0)
-            modified = metadata.get("modified", "")[:10]
-            has_math = metadata.get("has_math", False)
+# Per-process generator used by the process-pool batch backend
+_worker_generator: Optional[PDFGenerator] = None
 
-            math_indicator = " 📐" if has_math else ""
 
-            content += f"""
-### {title}{math_indicator}
-- **Words**: {word_count:,}
-- **Sections**: {section_count}
-- **Modified**: {modified}
-- **Files**:
-  - [Light Theme](light/{metadata['name']}-light.pdf)
-  - [Dark Theme](dark/{metadata['name']}-dark.pdf)
-"""
+def _init_worker(config: BarqueConfig) -> None:
+    """Build a warm generator once per worker process"""
+    global _worker_generator
 
-        # Add footer
-        content += """
+    # The parent owns the build manifest; workers only render
+    _worker_generator = PDFGenerator(dataclasses.replace(config, incremental_build=False))
 
-## 📖 Legend
 
-| Symbol | Meaning |
-|--------|---------|
-| 📐 | Contains mathematical formulas |
-| Words | Total word count in document |
-| Sections | Number of headings/sections |
-| Modified | Last modification date |
+def _chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group an iterable into lists of at most size items"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
 
----
 
-*Generated by BARQUE v2.0.0*
-"""
+def _scan_chunk(paths: List[str]) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+    """Extract metadata for a chunk of files, as (metadata, error) pairs"""
+    extractor = MetadataExtractor()
+    results = []
+    for path in paths:
+        try:
+            results.append((extractor.extract(Path(path)), None))
+        except Exception as e:
+            results.append((None, str(e)))
+    return results
 
-        index_file.write_text(content, encoding='utf-8')
-        return index_file
 
-    @staticmethod
-    def _get_timestamp() -> str:
-        """Get formatted timestamp"""
-        from datetime import datetime
-        return datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+def _render_chunk(
+    tasks: List[Tuple[Path, str, Path, Optional[List[str]]]]
+) -> List[GenerationResult]:
+    """Render a chunk of documents in a worker process"""
+    return [_worker_generator._render_document(*task) for task in tasks]
@@ -0,0 +1,254 @@
+"""Streaming index builder for BARQUE"""
+
+import html
+import json
+import os
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, TextIO
+
+from .metadata import MetadataExtractor
+from .store import MetadataStore
+
+# Index variants and the file each one is written to
+INDEX_FORMATS = {
+    "md": "INDEX.md",
+    "json": "index.json",
+    "html": "index.html",
+}
+
+LEGEND = """
+
+## 📖 Legend
+
+| Symbol | Meaning |
+|--------|---------|
+| 📐 | Contains mathematical formulas |
+| Words | Total word count in document |
+| Sections | Number of headings/sections |
+| Modified | Last modification date |
+
+---
+
+*Generated by BARQUE v2.0.0*
+"""
+
+
+class IndexBuilder:
+    """
+    Write the document index from the metadata store in one streaming pass
+
+    Entries are read from the store in batches and written to every
+    requested format as they arrive, so memory does not grow with the
+    collection. Totals come from the store's trigger-maintained counters.
+    The index is only rewritten when the store revision, the project name
+    or the set of formats changed since the last build, or a file is gone.
+    """
+
+    def __init__(
+        self,
+        output_dir: Path,
+        store: MetadataStore,
+        project_name: str,
+        formats: List[str]
+    ):
+        self.output_dir = output_dir
+        self.store = store
+        self.project_name = project_name
+        self.formats = [f for f in INDEX_FORMATS if f in formats]
+        self.state_file = output_dir / ".cache" / "index.json"
+        self.rebuilt = False
+
+    def build(self, force: bool = False) -> Dict[str, Path]:
+        """
+        Write the index unless it is already current
+
+        Args:
+            force: Rewrite even when nothing changed
+
+        Returns:
+            Path of each written (or already current) index file by format
+        """
+        totals = self.store.totals()
+        outputs = {fmt: self.output_dir / INDEX_FORMATS[fmt] for fmt in self.formats}
+        state = {
+            "revision": totals["revision"],
+            "documents": totals["documents"],
+            "project": self.project_name,
+            "formats": self.formats,
+        }
+
+        self.rebuilt = force or self._load_state() != state or not all(
+            path.exists() for path in outputs.values()
+        )
+        if not self.rebuilt:
+            return outputs
+
+        generated = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        staging = {fmt: path.with_name(f"{path.name}.tmp") for fmt, path in outputs.items()}
+        files = {fmt: open(path, 'w', encoding='utf-8') for fmt, path in staging.items()}
+        writers = {
+            "md": (self._md_header, self._md_entry, self._md_footer),
+            "json": (self._json_header, self._json_entry, self._json_footer),
+            "html": (self._html_header, self._html_entry, self._html_footer),
+        }
+        try:
+            for fmt, out in files.items():
+                writers[fmt][0](out, totals, generated)
+            # A single pass over the store feeds every format
+            for position, metadata in enumerate(self.store.documents()):
+                for fmt, out in files.items():
+                    writers[fmt][1](out, metadata, position)
+            for fmt, out in files.items():
+                writers[fmt][2](out, totals)
+        finally:
+            for f in files.values():
+                f.close()
+
+        for fmt, path in outputs.items():
+            os.replace(staging[fmt], path)
+        self._save_state(state)
+        return outputs
+
+    # Markdown
+
+    def _md_header(self, out: TextIO, totals: Dict[str, int], generated: str) -> None:
+        if not totals["documents"]:
+            out.write("# PDF Documentation Index\n\nNo documents generated yet.")
+            return
+
+        out.write(f"""# PDF Documentation Index
+
+**Generated:** {generated}
+**Project:** {self.project_name}
+
+## 📊 Statistics
+
+- **Total Documents**: {totals["documents"]}
+- **Total Words**: {totals["word_count"]:,}
+- **Total Size**: {MetadataExtractor.format_bytes(totals["file_size"])}
+
+## 🎨 Themes
+
+### Light Mode
+Browse [Light Theme PDFs](light/)
+- Clean, bright interface
+- Perfect for printing
+- Easy on the eyes in well-lit environments
+
+### Dark Mode
+Browse [Dark Theme PDFs](dark/)
+- Reduced eye strain
+- Modern dark aesthetic
+- Great for screen reading
+
+## 📚 All Documents
+
+""")
+
+    def _md_entry(self, out: TextIO, metadata: Dict[str, Any], position: int) -> None:
+        math_indicator = " 📐" if metadata.get("has_math", False) else ""
+        out.write(f"""
+### {metadata.get("title", metadata["name"])}{math_indicator}
+- **Words**: {metadata.get("word_count", 0):,}
+- **Sections**: {metadata.get("section_count", 0)}
+- **Modified**: {metadata.get("modified", "")[:10]}
+- **Files**:
+  - [Light Theme](light/{metadata['name']}-light.pdf)
+  - [Dark Theme](dark/{metadata['name']}-dark.pdf)
+""")
+
+    def _md_footer(self, out: TextIO, totals: Dict[str, int]) -> None:
+        if totals["documents"]:
+            out.write(LEGEND)
+
+    # JSON
+
+    def _json_header(self, out: TextIO, totals: Dict[str, int], generated: str) -> None:
+        header = {
+            "generated": generated,
+            "project": self.project_name,
+            "statistics": {
+                "documents": totals["documents"],
+                "words": totals["word_count"],
+                "size_bytes": totals["file_size"],
+            },
+        }
+        # Leave the object open so documents can be streamed into it
+        out.write(json.dumps(header, ensure_ascii=False, indent=2)[:-2])
+        out.write(',\n  "documents": [')
+
+    def _json_entry(self, out: TextIO, metadata: Dict[str, Any], position: int) -> None:
+        entry = {
+            "name": metadata["name"],
+            "title": metadata.get("title", metadata["name"]),
+            "words": metadata.get("word_count", 0),
+            "sections": metadata.get("section_count", 0),
+            "modified": metadata.get("modified", ""),
+            "has_math": metadata.get("has_math", False),
+            "files": {
+                "light": f"light/{metadata['name']}-light.pdf",
+                "dark": f"dark/{metadata['name']}-dark.pdf",
+            },
+        }
+        out.write(",\n    " if position else "\n    ")
+        out.write(json.dumps(entry, ensure_ascii=False))
+
+    def _json_footer(self, out: TextIO, totals: Dict[str, int]) -> None:
+        out.write("\n  ]\n}\n" if totals["documents"] else "]\n}\n")
+
+    # HTML
+
+    def _html_header(self, out: TextIO, totals: Dict[str, int], generated: str) -> None:
+        project = html.escape(self.project_name)
+        out.write(f"""<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>{project} - PDF Documentation Index</title>
+</head>
+<body>
+<h1>PDF Documentation Index</h1>
+<p><strong>Generated:</strong> {generated}<br>
+<strong>Project:</strong> {project}</p>
+<ul>
+<li><strong>Total Documents</strong>: {totals["documents"]}</li>
+<li><strong>Total Words</strong>: {totals["word_count"]:,}</li>
+<li><strong>Total Size</strong>: {MetadataExtractor.format_bytes(totals["file_size"])}</li>
+</ul>
+<table>
+<thead>
+<tr><th>Document</th><th>Words</th><th>Sections</th><th>Modified</th><th>Files</th></tr>
+</thead>
+<tbody>
+""")
+
+    def _html_entry(self, out: TextIO, metadata: Dict[str, Any], position: int) -> None:
+        name = html.escape(metadata["name"], quote=True)
+        title = html.escape(str(metadata.get("title", metadata["name"])))
+        math_indicator = " 📐" if metadata.get("has_math", False) else ""
+        out.write(
+            f"<tr><td>{title}{math_indicator}</td>"
+            f"<td>{metadata.get('word_count', 0):,}</td>"
+            f"<td>{metadata.get('section_count', 0)}</td>"
+            f"<td>{html.escape(metadata.get('modified', '')[:10])}</td>"
+            f"<td><a href=\"light/{name}-light.pdf\">Light</a> "
+            f"<a href=\"dark/{name}-dark.pdf\">Dark</a></td></tr>\n"
+        )
+
+    def _html_footer(self, out: TextIO, totals: Dict[str, int]) -> None:
+        out.write("</tbody>\n</table>\n<p><em>Generated by BARQUE v2.0.0</em></p>\n</body>\n</html>\n")
+
+    def _load_state(self) -> Dict[str, Any]:
+        """Read what the last build was made from"""
+        try:
+            with open(self.state_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_state(self, state: Dict[str, Any]) -> None:
+        """Remember what this build was made from"""
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.state_file, 'w', encoding='utf-8') as f:
+            json.dump(state, f)
@@ -0,0 +1,217 @@
+"""Build manifest for incremental BARQUE builds"""
+
+import hashlib
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from .metadata import MetadataExtractor
+
+
+@dataclass
+class SourceState:
+    """Snapshot of a source file and the local images it references"""
+    size: int
+    mtime_ns: int
+    sha256: str
+    images: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+
+
+class BuildManifest:
+    """
+    Track what was built from which inputs
+
+    Each source records its size, mtime and content hash, the stat of every
+    local image it references, and per theme the config fingerprint and
+    output path it was last rendered with. A theme is rebuilt only when one
+    of those inputs changed or its output went missing.
+    """
+
+    VERSION = 1
+
+    def __init__(self, manifest_file: Path):
+        self.manifest_file = manifest_file
+        self.entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, manifest_file: Path) -> "BuildManifest":
+        """Load manifest from file (an unreadable manifest starts a full build)"""
+        manifest = cls(manifest_file)
+        if manifest_file.exists():
+            try:
+                with open(manifest_file, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get("version") == cls.VERSION:
+                    manifest.entries = data.get("sources", {})
+            except (OSError, ValueError):
+                pass
+        return manifest
+
+    def save(self) -> None:
+        """Atomically write manifest to disk"""
+        self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            data = {"version": self.VERSION, "sources": self.entries}
+            staging = self.manifest_file.with_suffix(".json.tmp")
+            with open(staging, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(staging, self.manifest_file)
+
+    def inspect(self, input_file: Path) -> SourceState:
+        """
+        Capture the current state of a source file
+
+        The content is only re-hashed when size or mtime differ from the
+        recorded values, so unchanged trees cost one stat() per file.
+        """
+        entry = self.entries.get(self._key(input_file))
+        stat = input_file.stat()
+
+        if entry and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns:
+            sha256 = entry["sha256"]
+            image_paths = list(entry["images"])
+        else:
+            content = input_file.read_bytes()
+            sha256 = hashlib.sha256(content).hexdigest()
+            if entry and entry["sha256"] == sha256:
+                image_paths = list(entry["images"])
+            else:
+                image_paths = self._resolve_images(input_file, content)
+
+        images = {}
+        for image in image_paths:
+            try:
+                image_stat = os.stat(image)
+                images[image] = (image_stat.st_size, image_stat.st_mtime_ns)
+            except OSError:
+                images[image] = (-1, -1)
+
+        return SourceState(stat.st_size, stat.st_mtime_ns, sha256, images)
+
+    def stale_themes(
+        self,
+        input_file: Path,
+        state: SourceState,
+        outputs: Dict[str, Path],
+        fingerprints: Dict[str, str],
+        metadata_file: Path
+    ) -> List[str]:
+        """
+        Determine which themes need rendering
+
+        Args:
+            input_file: Markdown source file
+            state: Current source state from inspect()
+            outputs: Expected output PDF per requested theme
+            fingerprints: Config fingerprint per requested theme
+            metadata_file: Expected metadata file for the source
+
+        Returns:
+            Requested themes whose output is missing or out of date
+        """
+        entry = self.entries.get(self._key(input_file))
+        if (
+            entry is None
+            or entry["sha256"] != state.sha256
+            or {k: tuple(v) for k, v in entry["images"].items()} != state.images
+            or entry.get("metadata") != self._key(metadata_file)
+            or not metadata_file.exists()
+        ):
+            return list(outputs)
+
+        stale = []
+        for theme, output_pdf in outputs.items():
+            built = entry["themes"].get(theme)
+            if (
+                built is None
+                or built["fingerprint"] != fingerprints[theme]
+                or built["output"] != self._key(output_pdf)
+                or not output_pdf.exists()
+            ):
+                stale.append(theme)
+        return stale
+
+    def record(
+        self,
+        input_file: Path,
+        state: SourceState,
+        outputs: Dict[str, Path],
+        fingerprints: Dict[str, str],
+        metadata_file: Path
+    ) -> None:
+        """Record a successful build of the given themes"""
+        key = self._key(input_file)
+        with self._lock:
+            entry = self.entries.get(key)
+            themes = entry["themes"] if entry and entry["sha256"] == state.sha256 else {}
+            for theme, output_pdf in outputs.items():
+                themes[theme] = {
+                    "fingerprint": fingerprints[theme],
+                    "output": self._key(output_pdf),
+                }
+            self.entries[key] = {
+                "size": state.size,
+                "mtime_ns": state.mtime_ns,
+                "sha256": state.sha256,
+                "images": {k: list(v) for k, v in state.images.items()},
+                "themes": themes,
+                "metadata": self._key(metadata_file),
+            }
+
+    def prune(self, scope: Path) -> List[str]:
+        """
+        Remove outputs of sources under scope that no longer exist
+
+        Returns:
+            Source paths whose outputs were pruned
+        """
+        prefix = self._key(scope).rstrip(os.sep) + os.sep
+        with self._lock:
+            removed = {
+                key: self.entries.pop(key)
+                for key in list(self.entries)
+                if key.startswith(prefix) and not Path(key).exists()
+            }
+
+            # Outputs are named by stem, so a live source may still own the same file
+            referenced = set()
+            for entry in self.entries.values():
+                referenced.add(entry.get("metadata"))
+                referenced.update(built["output"] for built in entry["themes"].values())
+
+        for entry in removed.values():
+            outputs = [built["output"] for built in entry["themes"].values()]
+            for output in outputs + [entry.get("metadata")]:
+                if output and output not in referenced:
+                    Path(output).unlink(missing_ok=True)
+
+        return list(removed)
+
+    @staticmethod
+    def _key(path: Path) -> str:
+        """Get the manifest key for a path"""
+        return os.path.abspath(path)
+
+    @staticmethod
+    def _resolve_images(input_file: Path, content: bytes) -> List[str]:
+        """Resolve local image references to absolute paths"""
+        images = []
+        text = content.decode("utf-8", errors="replace")
+        for target in MetadataExtractor.find_images(text):
+            if "://" in target or target.startswith("data:"):
+                continue
+            images.append(os.path.abspath(input_file.parent / target))
+        return images
+
+
+def config_fingerprint(*parts: str) -> str:
+    """Hash the pieces of configuration that shape a rendered output"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
@@ -1,103 +1,454 @@
 """Metadata extraction and management for BARQUE"""
 
+import copy
 import re
 import json
+from functools import lru_cache
 from pathlib import Path
+from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Union
 import yaml
 
 
+# Patterns shared by the streaming scanner (kept identical to the original per-pass regexes)
+_FRONTMATTER = re.compile(r'^---\s*\n(.*?)\n---\s*\n', re.DOTALL)
+_FRONTMATTER_OPEN = re.compile(r'---\s*\n')
+_TITLE = re.compile(r'^#\s+(.+)$', re.MULTILINE)
+_SECTION = re.compile(r'^#+\s+', re.MULTILINE)
+_LINK = re.compile(r'\[.+?\]\(.+?\)')
+_IMAGE = re.compile(r'!\[.*?\]\(.+?\)')
+_LATEX = re.compile(r'\\begin\{equation\}|\\begin\{align\}|\\[.*?\\]')
+_NON_SPACE = re.compile(r'\S')
+_TEX_MATH = re.compile(r'\\begin\{(equation|align|gather|multline|eqnarray)\*?\}')
+
+SUMMARY_LENGTH = 200
+
+# Frontmatter must close within this many leading characters
+FRONTMATTER_LIMIT = 64 * 1024
+
+# libyaml's loader is several times faster than the pure-Python one
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+class _ContentScanner:
+    """
+    Compute every content counter of a markdown document in one pass
+
+    Content is fed in chunks that end on a line boundary, so line, word,
+    heading, fence, link and image counts are exact per chunk. The few
+    constructs that can span lines keep state between chunks: the '$'
+    delimiters for math, the title heading (whose whitespace may run onto
+    following lines) and the frontmatter, which is matched against a head
+    buffer that grows only until the match is settled. The match is
+    confined to the first FRONTMATTER_LIMIT characters, so a document that
+    opens with '---' but never closes it is not buffered to the end.
+    """
+
+    def __init__(self):
+        self.line_count = 1
+        self.word_count = 0
+        self.section_count = 0
+        self.fences = 0
+        self.links = 0
+        self.images = 0
+        self.title: Optional[str] = None
+        self.frontmatter: Optional[Dict[str, Any]] = None
+        self.summary = ""
+
+        self._offset = 0
+        self._dollars = 0
+        self._first_dollar = -1
+        self._last_dollar = -1
+        self._latex = False
+        self._title_done = False
+        self._title_tail = ""
+        self._head: Optional[str] = ""
+        self._head_match: Optional[re.Match] = None
+
+    def feed(self, chunk: str) -> None:
+        """Scan a chunk ending in a newline (or the final chunk of the content)"""
+        self.line_count += chunk.count('\n')
+        self.word_count += len(chunk.split())
+        self.section_count += len(_SECTION.findall(chunk))
+        self.fences += chunk.count('```')
+        self.links += len(_LINK.findall(chunk))
+        self.images += len(_IMAGE.findall(chunk))
+
+        dollars = chunk.count('$')
+        if dollars:
+            if self._first_dollar < 0:
+                self._first_dollar = self._offset + chunk.find('$')
+            self._last_dollar = self._offset + chunk.rfind('$')
+            self._dollars += dollars
+        if not self._latex:
+            self._latex = _LATEX.search(chunk) is not None
+
+        if not self._title_done:
+            self._scan_title(chunk)
+        if self._head is not None:
+            self._scan_head(chunk, eof=False)
+
+        self._offset += len(chunk)
+
+    def finish(self) -> None:
+        """Settle state that was waiting for more content"""
+        if not self._title_done:
+            match = _TITLE.search(self._title_tail)
+            self.title = match.group(1) if match else None
+            self._title_done = True
+        if self._head is not None:
+            self._scan_head("", eof=True)
+
+    @property
+    def code_blocks(self) -> int:
+        """Number of fenced code blocks"""
+        return self.fences // 2
+
+    @property
+    def has_math(self) -> bool:
+        """Whether the document contains math"""
+        if self._latex:
+            return True
+        if not self._dollars:
+            return False
+        # '$...$' needs two non-adjacent dollars, '$$...$$' two separate pairs:
+        # false only when every dollar sits in a single run shorter than four
+        contiguous = self._last_dollar - self._first_dollar + 1 == self._dollars
+        return not contiguous or self._dollars >= 4
+
+    def _scan_title(self, chunk: str) -> None:
+        """Find the first h1 heading, carrying a '#' line whose text is still pending"""
+        buffer = self._title_tail + chunk if self._title_tail else chunk
+        match = _TITLE.search(buffer)
+
+        # The heading's whitespace may continue into the next chunk
+        if match and _NON_SPACE.search(buffer, match.start() + 1):
+            self.title = match.group(1)
+            self._title_done = True
+            self._title_tail = ""
+            return
+
+        end = len(buffer.rstrip())
+        if end and buffer[end - 1] == '#' and (end == 1 or buffer[end - 2] == '\n'):
+            self._title_tail = buffer[end - 1:]
+        else:
+            self._title_tail = ""
+
+    def _scan_head(self, chunk: str, eof: bool) -> None:
+        """Match frontmatter and take the summary once enough content is buffered"""
+        head = self._head + chunk if chunk else self._head
+        self._head = head
+
+        if not head.startswith('---'):
+            if len(head) < 3 and not eof:
+                return
+            match = None
+        else:
+            # Past the limit the bounded prefix is all the match will ever see
+            settled = eof or len(head) >= FRONTMATTER_LIMIT
+
+            # A closing fence can only appear in a chunk containing a '---' line
+            if (
+                self._head_match is not None or settled
+                or chunk.startswith('---') or '\n---' in chunk
+            ):
+                self._head_match = _FRONTMATTER.match(head, 0, FRONTMATTER_LIMIT)
+                # Until settled only a match through the longest opening fence is
+                # final: the regex falls back to shorter ones only when no closing follows it
+                opener = _FRONTMATTER_OPEN.match(head, 0, FRONTMATTER_LIMIT)
+                if not settled and self._head_match and self._head_match.start(1) != opener.end():
+                    self._head_match = None
+            match = self._head_match
+            if match is None and not settled:
+                return
+
+        start = match.end() if match else 0
+        if not eof:
+            if len(head) - start < SUMMARY_LENGTH:
+                return
+            # The closing fence's trailing whitespace must be fully buffered
+            if match and not _NON_SPACE.search(head, start):
+                return
+
+        if match:
+            self.frontmatter = MetadataExtractor._parse_frontmatter(match.group(1))
+        self.summary = head[start:start + SUMMARY_LENGTH].replace('\n', ' ').strip()
+        self._head = None
+        self._head_match = None
+
+
+@dataclass
+class _AstStats:
+    """Content counters computed from a pandoc JSON AST"""
+    line_count: int = 1
+    word_count: int = 0
+    section_count: int = 0
+    code_blocks: int = 0
+    links: int = 0
+    images: int = 0
+    has_math: bool = False
+    title: Optional[str] = None
+    frontmatter: Optional[Dict[str, Any]] = None
+    summary: str = ""
+
+    def walk(self, node: Any) -> None:
+        """Count the elements below an AST node"""
+        if isinstance(node, list):
+            for child in node:
+                self.walk(child)
+            return
+        if not isinstance(node, dict):
+            return
+
+        kind = node.get("t")
+        content = node.get("c")
+        if kind == "Str":
+            self.word_count += 1
+        elif kind == "Header":
+            self.section_count += 1
+            if self.title is None and content[0] == 1:
+                self.title = _stringify(content[2])
+        elif kind in ("CodeBlock", "Code"):
+            self.code_blocks += kind == "CodeBlock"
+            self.word_count += len(content[1].split())
+            return
+        elif kind == "Link":
+            self.links += 1
+        elif kind == "Image":
+            self.images += 1
+        elif kind == "Math":
+            self.has_math = True
+            return
+        elif kind in ("RawBlock", "RawInline"):
+            if content[0] in ("tex", "latex") and _TEX_MATH.search(content[1]):
+                self.has_math = True
+            return
+
+        if content is not None:
+            self.walk(content)
+
+
+def _stringify(node: Any) -> str:
+    """Plain text of an AST node"""
+    parts: List[str] = []
+
+    def collect(item: Any) -> None:
+        if isinstance(item, list):
+            for child in item:
+                collect(child)
+        elif isinstance(item, dict):
+            kind = item.get("t")
+            if kind == "Str":
+                parts.append(item["c"])
+            elif kind in ("Space", "SoftBreak", "LineBreak"):
+                parts.append(" ")
+            elif kind in ("Code", "Math", "CodeBlock"):
+                parts.append(item["c"][1])
+            elif kind not in ("RawInline", "RawBlock", "Note"):
+                collect(item.get("c"))
+
+    collect(node)
+    return "".join(parts)
+
+
+def _meta_value(value: Dict[str, Any]) -> Any:
+    """Convert a pandoc MetaValue to a plain Python value"""
+    kind = value.get("t")
+    content = value.get("c")
+    if kind == "MetaMap":
+        return {key: _meta_value(item) for key, item in content.items()}
+    if kind == "MetaList":
+        return [_meta_value(item) for item in content]
+    if kind in ("MetaBool", "MetaString"):
+        return content
+    return _stringify(content)
+
+
+@lru_cache(maxsize=4096)
+def _load_frontmatter(yaml_content: str) -> Optional[Dict[str, Any]]:
+    """
+    Parse frontmatter YAML, remembering recent results
+
+    Templated sites repeat the same frontmatter across many pages, so
+    identical blocks are parsed once.
+    """
+    try:
+        frontmatter = yaml.load(yaml_content, Loader=_YAML_LOADER)
+    except yaml.YAMLError:
+        return None
+    # A bare scalar or list is not frontmatter
+    return frontmatter if isinstance(frontmatter, dict) else None
+
+
 class MetadataExtractor:
     """Extract and manage document metadata"""
 
+    # Characters read per chunk; chunks are extended to the next line break
+    CHUNK_SIZE = 1 << 20
+
     def __init__(self):
         pass
 
     def extract(self, md_file: Path) -> Dict[str, Any]:
-        """Extract metadata from markdown file"""
+        """Extract metadata from markdown file in a single streaming pass"""
+        scanner = _ContentScanner()
         with open(md_file, 'r', encoding='utf-8') as f:
-            content = f.read()
+            while True:
+                chunk = f.read(self.CHUNK_SIZE)
+                if not chunk:
+                    break
+                if not chunk.endswith('\n'):
+                    chunk += f.readline()
+                scanner.feed(chunk)
+        scanner.finish()
+
+        stat = md_file.stat()
+        return self._build_metadata(
+            scanner, md_file.stem, str(md_file), stat.st_size, stat.st_mtime, stat.st_ctime
+        )
+
+    def extract_text(self, content: str, name: str = "document") -> Dict[str, Any]:
+        """
+        Extract metadata from markdown held in memory
 
+        Args:
+            content: Markdown content
+            name: Document name (title fallback)
+
+        Returns:
+            Metadata dictionary with the same keys as extract()
+        """
+        scanner = _ContentScanner()
+        scanner.feed(content)
+        scanner.finish()
+
+        now = datetime.now().timestamp()
+        return self._build_metadata(
+            scanner, name, None, len(content.encode('utf-8')), now, now
+        )
+
+    def extract_from_ast(
+        self,
+        ast: Dict[str, Any],
+        content: str,
+        md_file: Optional[Path] = None,
+        name: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Extract metadata from the pandoc JSON AST of a document
+
+        Counts come from what pandoc actually parsed: '#' lines inside code
+        blocks are not sections and a '$' in prose is not math. The source
+        text is only used for the line count.
+
+        Args:
+            ast: Parsed output of ``pandoc --to json``
+            content: Markdown source the AST was produced from
+            md_file: Source file, if the markdown came from disk
+            name: Document name (default: the file stem)
+
+        Returns:
+            Metadata dictionary with the same keys as extract()
+        """
+        stats = _AstStats()
+        stats.line_count = content.count('\n') + 1
+        stats.frontmatter = {
+            key: _meta_value(value) for key, value in ast.get("meta", {}).items()
+        }
+        stats.walk(ast.get("blocks", []))
+
+        # Plain text of the leading blocks as summary
+        summary = []
+        length = 0
+        for block in ast.get("blocks", []):
+            text = _stringify(block)
+            if not text.strip():
+                continue
+            summary.append(text)
+            length += len(text) + 1
+            if length > SUMMARY_LENGTH:
+                break
+        stats.summary = " ".join(summary)[:SUMMARY_LENGTH].replace('\n', ' ').strip()
+
+        if md_file is not None:
+            stat = md_file.stat()
+            return self._build_metadata(
+                stats, name or md_file.stem, str(md_file),
+                stat.st_size, stat.st_mtime, stat.st_ctime
+            )
+
+        now = datetime.now().timestamp()
+        return self._build_metadata(
+            stats, name or "document", None, len(content.encode('utf-8')), now, now
+        )
+
+    def _build_metadata(
+        self,
+        scanner: Union[_ContentScanner, _AstStats],
+        name: str,
+        file: Optional[str],
+        file_size: int,
+        mtime: float,
+        ctime: float
+    ) -> Dict[str, Any]:
+        """Assemble metadata from a finished scan"""
         metadata = {}
 
-        # Try to extract YAML frontmatter
-        frontmatter = self._extract_frontmatter(content)
-        if frontmatter:
-            metadata.update(frontmatter)
+        # YAML frontmatter
+        if scanner.frontmatter:
+            metadata.update(scanner.frontmatter)
 
-        # Extract title (from frontmatter or first h1)
+        # Title (from frontmatter or first h1)
         if 'title' not in metadata:
-            title_match = re.search(r'^#\s+(.+)$', content, re.MULTILINE)
-            metadata['title'] = title_match.group(1) if title_match else md_file.stem
+            metadata['title'] = scanner.title if scanner.title is not None else name
 
         # Count content elements
         metadata.update({
-            'name': md_file.stem,
-            'file': str(md_file),
-            'file_size': md_file.stat().st_size,
-            'line_count': len(content.split('\n')),
-            'word_count': len(content.split()),
-            'section_count': len(re.findall(r'^#+\s+', content, re.MULTILINE)),
-            'code_blocks': len(re.findall(r'```', content)) // 2,
-            'links': len(re.findall(r'\[.+?\]\(.+?\)', content)),
-            'images': len(re.findall(r'!\[.*?\]\(.+?\)', content)),
+            'name': name,
+            'file': file,
+            'file_size': file_size,
+            'line_count': scanner.line_count,
+            'word_count': scanner.word_count,
+            'section_count': scanner.section_count,
+            'code_blocks': scanner.code_blocks,
+            'links': scanner.links,
+            'images': scanner.images,
         })
 
         # Detect mathematical content
-        metadata['has_math'] = self._detect_math(content)
+        metadata['has_math'] = scanner.has_math
 
         # Get file timestamps
-        stat = md_file.stat()
         metadata.update({
-            'modified': datetime.fromtimestamp(stat.st_mtime).isoformat(),
-            'created': datetime.fromtimestamp(stat.st_ctime).isoformat(),
+            'modified': datetime.fromtimestamp(mtime).isoformat(),
+            'created': datetime.fromtimestamp(ctime).isoformat(),
         })
 
-        # Extract first 200 characters as summary
-        clean_content = self._strip_frontmatter(content)
-        summary_text = clean_content[:200].replace('\n', ' ').strip()
-        metadata['summary'] = summary_text
+        # First 200 characters after the frontmatter as summary
+        metadata['summary'] = scanner.summary
 
         # Set default themes
         metadata['themes'] = ['light', 'dark']
 
         return metadata
 
-    def _extract_frontmatter(self, content: str) -> Optional[Dict[str, Any]]:
-        """Extract YAML frontmatter from document"""
-        frontmatter_pattern = r'^---\s*\n(.*?)\n---\s*\n'
-        match = re.match(frontmatter_pattern, content, re.DOTALL)
-
-        if match:
-            yaml_content = match.group(1)
-            try:
-                return yaml.safe_load(yaml_content)
-            except yaml.YAMLError:
-                return None
-        return None
+    @staticmethod
+    def find_images(content: str) -> List[str]:
+        """Find the targets of all image references in markdown content"""
+        targets = []
+        for target in re.findall(r'!\[.*?\]\((.+?)\)', content):
+            # Drop an optional title: ![alt](path "title")
+            parts = target.split()
+            if parts:
+                targets.append(parts[0].strip('<>'))
+        return targets
 
-    def _strip_frontmatter(self, content: str) -> str:
-        """Remove frontmatter from content"""
-        frontmatter_pattern = r'^---\s*\n.*?\n---\s*\n'
-        return re.sub(frontmatter_pattern, '', content, count=1, flags=re.DOTALL)
-
-    def _detect_math(self, content: str) -> bool:
-        """Detect if document contains mathematical formulas"""
-        # Check for LaTeX delimiters
-        latex_patterns = [
-            r'\$\$.*?\$\$',  # Display math
-            r'\$[^$]+\$',    # Inline math
-            r'\\begin\{equation\}',
-            r'\\begin\{align\}',
-            r'\\[.*?\\]',    # LaTeX display mode
-        ]
-
-        for pattern in latex_patterns:
-            if re.search(pattern, content, re.DOTALL):
-                return True
-
-        return False
+    @staticmethod
+    def _parse_frontmatter(yaml_content: str) -> Optional[Dict[str, Any]]:
+        """Parse the YAML body of a frontmatter block (cached by content)"""
+        # Each caller gets its own copy of the shared cached value
+        return copy.deepcopy(_load_frontmatter(yaml_content))
 
     def save_metadata(self, metadata: Dict[str, Any], output_file: Path) -> None:
         """Save metadata to JSON file"""
@@ -0,0 +1,202 @@
+"""Resident pandoc conversion server for BARQUE"""
+
+import atexit
+import json
+import shutil
+import socket
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from typing import Any, Dict, List, Optional
+
+
+class PandocServerError(RuntimeError):
+    """Raised when the pandoc server cannot serve a conversion"""
+
+
+class PandocServer:
+    """
+    Client for a long-lived pandoc-server process
+
+    Keeps pandoc resident so documents are converted over a local HTTP socket
+    instead of starting the pandoc binary per document. With a URL the client
+    talks to an externally managed server; without one it spawns
+    ``pandoc-server`` (or ``pandoc server``) on a free local port and respawns
+    it when a health check fails.
+    """
+
+    def __init__(self, url: Optional[str] = None, timeout: float = 120.0):
+        self.url = url.rstrip('/') if url else None
+        self.timeout = timeout
+        self.managed = url is None
+        self._process: Optional[subprocess.Popen] = None
+        self._unavailable: Optional[str] = None
+        self._lock = threading.Lock()
+
+    def convert(self, options: Dict[str, Any]) -> str:
+        """
+        Convert a document
+
+        Args:
+            options: pandoc-server request (text, from, to and conversion options)
+
+        Returns:
+            Converted document text
+        """
+        self.ensure_running()
+        try:
+            return self._post(options)
+        except (urllib.error.URLError, ConnectionError, socket.timeout) as e:
+            if not self.managed:
+                raise PandocServerError(str(e)) from e
+
+        # The server died between health checks: respawn once and retry
+        self.restart()
+        try:
+            return self._post(options)
+        except (urllib.error.URLError, ConnectionError, socket.timeout) as e:
+            raise PandocServerError(str(e)) from e
+
+    def ensure_running(self) -> None:
+        """Start the managed server if it is not already serving"""
+        if not self.managed:
+            return
+
+        with self._lock:
+            if self._unavailable:
+                raise PandocServerError(self._unavailable)
+            if self._process is not None and self._process.poll() is None:
+                return
+            try:
+                self._spawn()
+            except PandocServerError as e:
+                # Do not pay the startup timeout again for every document
+                self._unavailable = str(e)
+                raise
+
+    def restart(self) -> None:
+        """Replace the managed server process unless another thread already did"""
+        with self._lock:
+            if self._process is not None and self._process.poll() is None and self.healthy():
+                return
+            self._terminate()
+            self._spawn()
+
+    def healthy(self) -> bool:
+        """Check that the server answers its version endpoint"""
+        if not self.url:
+            return False
+        try:
+            with urllib.request.urlopen(f"{self.url}/version", timeout=2) as response:
+                return response.status == 200
+        except (urllib.error.URLError, ConnectionError, socket.timeout):
+            return False
+
+    def close(self) -> None:
+        """Stop the managed server"""
+        with self._lock:
+            self._terminate()
+
+    def _post(self, options: Dict[str, Any]) -> str:
+        """Send a conversion request"""
+        request = urllib.request.Request(
+            f"{self.url}/",
+            data=json.dumps(options).encode('utf-8'),
+            headers={
+                "Content-Type": "application/json",
+                "Accept": "application/json",
+            },
+            method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                body = response.read()
+        except urllib.error.HTTPError as e:
+            detail = e.read().decode('utf-8', errors='replace')
+            raise PandocServerError(f"pandoc-server error {e.code}: {detail}") from e
+
+        try:
+            payload = json.loads(body.decode('utf-8'))
+        except ValueError as e:
+            raise PandocServerError(f"Malformed pandoc-server response: {e}") from e
+        if not isinstance(payload, dict):
+            raise PandocServerError("Malformed pandoc-server response: not a JSON object")
+        if "error" in payload:
+            raise PandocServerError(str(payload["error"]))
+        if not isinstance(payload.get("output"), str):
+            raise PandocServerError("Malformed pandoc-server response: no output")
+        return payload["output"]
+
+    def _spawn(self) -> None:
+        """Launch pandoc-server on a free port and wait until it is healthy"""
+        port = self._free_port()
+        self.url = f"http://127.0.0.1:{port}"
+
+        try:
+            self._process = subprocess.Popen(
+                self._command(port),
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL
+            )
+        except OSError as e:
+            self._process = None
+            raise PandocServerError(f"Could not start pandoc-server: {e}") from e
+
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            if self._process.poll() is not None:
+                break
+            if self.healthy():
+                return
+            time.sleep(0.05)
+
+        self._terminate()
+        raise PandocServerError("pandoc-server did not become healthy")
+
+    def _terminate(self) -> None:
+        """Stop the managed process if one is running"""
+        if self._process is not None:
+            if self._process.poll() is None:
+                self._process.terminate()
+                try:
+                    self._process.wait(timeout=5)
+                except subprocess.TimeoutExpired:
+                    self._process.kill()
+            self._process = None
+
+    @staticmethod
+    def _command(port: int) -> List[str]:
+        """Build the server command for the installed pandoc"""
+        if shutil.which("pandoc-server"):
+            return ["pandoc-server", "--port", str(port)]
+        return ["pandoc", "server", "--port", str(port)]
+
+    @staticmethod
+    def _free_port() -> int:
+        """Ask the OS for an unused local port"""
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+            sock.bind(("127.0.0.1", 0))
+            return sock.getsockname()[1]
+
+
+_servers: Dict[Optional[str], PandocServer] = {}
+_servers_lock = threading.Lock()
+
+
+def get_server(url: Optional[str] = None) -> PandocServer:
+    """Get the process-wide server client for a URL (None for a managed server)"""
+    with _servers_lock:
+        server = _servers.get(url)
+        if server is None:
+            server = PandocServer(url)
+            _servers[url] = server
+        return server
+
+
+@atexit.register
+def _shutdown_servers() -> None:
+    """Stop managed servers when the interpreter exits"""
+    for server in list(_servers.values()):
+        server.close()
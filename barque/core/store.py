@@ -0,0 +1,617 @@
+"""SQLite metadata store for BARQUE"""
+
+import json
+import math
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    name TEXT PRIMARY KEY,
+    title TEXT,
+    file TEXT,
+    file_size INTEGER NOT NULL DEFAULT 0,
+    word_count INTEGER NOT NULL DEFAULT 0,
+    section_count INTEGER NOT NULL DEFAULT 0,
+    has_math INTEGER NOT NULL DEFAULT 0,
+    modified TEXT,
+    updated_at REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_documents_modified ON documents(modified);
+CREATE INDEX IF NOT EXISTS idx_documents_updated ON documents(updated_at);
+
+-- Running totals kept current by triggers; revision changes with every write
+CREATE TABLE IF NOT EXISTS stats (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    documents INTEGER NOT NULL,
+    file_size INTEGER NOT NULL,
+    word_count INTEGER NOT NULL,
+    revision INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO stats (id, documents, file_size, word_count, revision)
+    SELECT 1, COUNT(*), COALESCE(SUM(file_size), 0), COALESCE(SUM(word_count), 0), 0
+    FROM documents;
+
+CREATE TRIGGER IF NOT EXISTS documents_insert AFTER INSERT ON documents BEGIN
+    UPDATE stats SET
+        documents = documents + 1,
+        file_size = file_size + new.file_size,
+        word_count = word_count + new.word_count,
+        revision = revision + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS documents_update AFTER UPDATE ON documents BEGIN
+    UPDATE stats SET
+        file_size = file_size - old.file_size + new.file_size,
+        word_count = word_count - old.word_count + new.word_count,
+        revision = revision + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS documents_delete AFTER DELETE ON documents BEGIN
+    UPDATE stats SET
+        documents = documents - 1,
+        file_size = file_size - old.file_size,
+        word_count = word_count - old.word_count,
+        revision = revision + 1;
+END;
+
+-- Full-text index over each document's title, summary and markdown, keyed by documents.rowid
+CREATE VIRTUAL TABLE IF NOT EXISTS search USING fts5(
+    title, summary, body, tokenize = 'porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS documents_unindex AFTER DELETE ON documents BEGIN
+    DELETE FROM search WHERE rowid = old.rowid;
+END;
+
+-- Time spent rendering each document, kept apart so timings never move the revision
+CREATE TABLE IF NOT EXISTS renders (
+    name TEXT PRIMARY KEY,
+    seconds REAL NOT NULL,
+    rendered_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TRIGGER IF NOT EXISTS documents_unrender AFTER DELETE ON documents BEGIN
+    DELETE FROM renders WHERE name = old.name;
+END;
+
+-- Source files whose metadata was extracted by a scan, and their stat then
+CREATE TABLE IF NOT EXISTS scanned (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+UPSERT = """
+INSERT INTO documents (
+    name, title, file, file_size, word_count, section_count, has_math, modified, updated_at, data
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(name) DO UPDATE SET
+    title = excluded.title,
+    file = excluded.file,
+    file_size = excluded.file_size,
+    word_count = excluded.word_count,
+    section_count = excluded.section_count,
+    has_math = excluded.has_math,
+    modified = excluded.modified,
+    updated_at = excluded.updated_at,
+    data = excluded.data
+WHERE documents.data IS NOT excluded.data
+"""
+
+# Columns of export_rows() and their types: str, int, float, bool or timestamp
+EXPORT_COLUMNS = [
+    ("name", "str"),
+    ("title", "str"),
+    ("file", "str"),
+    ("file_size", "int"),
+    ("line_count", "int"),
+    ("word_count", "int"),
+    ("section_count", "int"),
+    ("code_blocks", "int"),
+    ("links", "int"),
+    ("images", "int"),
+    ("has_math", "bool"),
+    ("modified", "timestamp"),
+    ("created", "timestamp"),
+    ("render_seconds", "float"),
+]
+
+EXPORT = """
+SELECT
+    documents.name, title, file, file_size,
+    json_extract(data, '$.line_count'), word_count, section_count,
+    json_extract(data, '$.code_blocks'), json_extract(data, '$.links'),
+    json_extract(data, '$.images'), has_math, modified,
+    json_extract(data, '$.created'), renders.seconds
+FROM documents LEFT JOIN renders ON renders.name = documents.name
+ORDER BY documents.name
+"""
+
+# Numeric columns distribution() may summarize, and the table holding each
+DISTRIBUTIONS = {
+    "word_count": "documents",
+    "file_size": "documents",
+    "section_count": "documents",
+    "has_math": "documents",
+    "render_seconds": "renders",
+}
+
+SEARCH = """
+SELECT documents.name, snippet(search, 2, ?, ?, '…', 16), bm25(search, 10.0, 4.0, 1.0), data
+FROM search JOIN documents ON documents.rowid = search.rowid
+WHERE search MATCH ?
+ORDER BY bm25(search, 10.0, 4.0, 1.0)
+LIMIT ?
+"""
+
+# Search text is replaced by the rowid of its document, so neither step scans the index
+UNINDEX = "DELETE FROM search WHERE rowid = (SELECT rowid FROM documents WHERE name = ?)"
+INDEX = """
+INSERT INTO search (rowid, title, summary, body)
+SELECT rowid, ?, ?, ? FROM documents WHERE name = ?
+"""
+
+# Metadata added by rendering rather than by reading the source
+RENDER_FIELDS = ("pdf_files",)
+
+
+class MetadataStore:
+    """
+    Document metadata in a single SQLite database
+
+    The database runs in WAL mode so index builds and other readers never
+    block writers. Writes are buffered and flushed as one transaction per
+    batch; call flush() (or close()) to make buffered records visible.
+    Documents are keyed by name, which is the markdown file stem. Totals
+    are maintained by triggers, and re-recording identical metadata is a
+    no-op, so the revision only moves when the content changed. Documents
+    recorded with their text are also kept in an FTS5 full-text index.
+    A read-only store opens an existing database without touching its
+    schema, for readers such as the service's /search endpoint.
+    """
+
+    def __init__(self, db_file: Path, batch_size: int = 256, read_only: bool = False):
+        self.db_file = db_file
+        self.batch_size = batch_size
+        self.read_only = read_only
+        self._pending: List[tuple] = []
+        self._pending_text: Dict[str, tuple] = {}
+        self._pending_renders: List[tuple] = []
+        self.rejected: List[Tuple[str, str]] = []  # (name, error) of records that could not be written
+        self._lock = threading.Lock()
+
+        if read_only:
+            self._connection = self._connect()
+            return
+        db_file.parent.mkdir(parents=True, exist_ok=True)
+        self._connection = self._connect()
+        self._connection.executescript(SCHEMA)
+
+    def put(
+        self,
+        metadata: Dict[str, Any],
+        text: Optional[str] = None,
+        render_seconds: Optional[float] = None
+    ) -> None:
+        """
+        Queue a document's metadata for the next batched upsert
+
+        Args:
+            metadata: Document metadata (keyed by its name)
+            text: Markdown to (re)index for full-text search; None leaves it as is
+            render_seconds: Time the document took to render; None leaves it as is
+        """
+        # Frontmatter may set any of these to lists, mappings or dates
+        row = (
+            str(metadata["name"]),
+            _text(metadata.get("title")),
+            _text(metadata.get("file")),
+            _integer(metadata.get("file_size")),
+            _integer(metadata.get("word_count")),
+            _integer(metadata.get("section_count")),
+            int(bool(metadata.get("has_math", False))),
+            _text(metadata.get("modified")),
+            time.time(),
+            json.dumps(metadata, ensure_ascii=False, default=_json_default),
+        )
+        with self._lock:
+            self._pending.append(row)
+            if text is not None:
+                self._pending_text[row[0]] = (
+                    row[0], row[1], _text(metadata.get("summary")), text
+                )
+            if render_seconds is not None:
+                self._pending_renders.append((row[0], render_seconds, row[8]))
+            if len(self._pending) >= self.batch_size:
+                self._flush_locked()
+
+    def flush(self) -> None:
+        """Write all queued records in one transaction"""
+        with self._lock:
+            self._flush_locked()
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        """Get a document's metadata by name"""
+        self.flush()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT data FROM documents WHERE name = ?", (name,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete(self, names: List[str]) -> None:
+        """Remove documents by name"""
+        self.flush()
+        with self._lock, self._connection:
+            self._connection.executemany(
+                "DELETE FROM documents WHERE name = ?", [(name,) for name in names]
+            )
+
+    def documents(self, batch_size: int = 500) -> Iterator[Dict[str, Any]]:
+        """
+        Stream all documents, most recently generated first
+
+        Rows are read on a separate connection in batches, so callers can
+        iterate over large stores without loading them into memory.
+        """
+        self.flush()
+        connection = self._connect()
+        try:
+            cursor = connection.execute(
+                "SELECT data FROM documents ORDER BY updated_at DESC, name"
+            )
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for (data,) in rows:
+                    yield json.loads(data)
+        finally:
+            connection.close()
+
+    def search(
+        self,
+        query: str,
+        limit: int = 20,
+        highlight: Tuple[str, str] = ("[", "]")
+    ) -> List[Dict[str, Any]]:
+        """
+        Find documents matching a full-text query, best match first
+
+        Titles weigh most, then summaries, then the body. Each word of the
+        query must match (porter-stemmed); a trailing * makes it a prefix.
+
+        Args:
+            query: Words to search for
+            limit: Maximum number of hits
+            highlight: Markers placed around matched words in the snippet
+
+        Returns:
+            Hits with name, title, snippet, score (higher is better) and pdf_files
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+
+        self.flush()
+        with self._lock:
+            rows = self._connection.execute(
+                SEARCH, (highlight[0], highlight[1], match, limit)
+            ).fetchall()
+
+        hits = []
+        for name, snippet, rank, data in rows:
+            metadata = json.loads(data)
+            hits.append({
+                "name": name,
+                "title": metadata.get("title", name),
+                "snippet": " ".join(snippet.split()),
+                "score": round(-rank, 4),
+                "file": metadata.get("file"),
+                "pdf_files": metadata.get("pdf_files", {}),
+            })
+        return hits
+
+    def unchanged_files(self, states: List[Tuple[str, int, int]]) -> Set[str]:
+        """
+        Find files whose size and mtime match the last scan
+
+        Args:
+            states: (absolute path, size, mtime_ns) of each file
+
+        Returns:
+            Paths that were scanned before and have not changed since
+        """
+        unchanged = set()
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(states), 500):
+                chunk = states[start:start + 500]
+                rows = self._connection.execute(
+                    "SELECT path, size, mtime_ns FROM scanned WHERE path IN ({})".format(
+                        ", ".join("?" * len(chunk))
+                    ),
+                    [path for path, _, _ in chunk]
+                ).fetchall()
+                known = {path: (size, mtime_ns) for path, size, mtime_ns in rows}
+                unchanged.update(
+                    path for path, size, mtime_ns in chunk if known.get(path) == (size, mtime_ns)
+                )
+        return unchanged
+
+    def render_fields(self, names: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Get the fields that rendering added to stored documents
+
+        Scans re-extract metadata from the source only, so they carry these
+        over to keep links to already rendered PDFs.
+
+        Args:
+            names: Document names
+
+        Returns:
+            RENDER_FIELDS of each named document that has any, by name
+        """
+        fields = {}
+        self.flush()
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit
+            for start in range(0, len(names), 500):
+                chunk = names[start:start + 500]
+                rows = self._connection.execute(
+                    "SELECT name, data FROM documents WHERE name IN ({})".format(
+                        ", ".join("?" * len(chunk))
+                    ),
+                    chunk
+                ).fetchall()
+                for name, data in rows:
+                    metadata = json.loads(data)
+                    kept = {key: metadata[key] for key in RENDER_FIELDS if key in metadata}
+                    if kept:
+                        fields[name] = kept
+        return fields
+
+    def record_scanned(self, states: List[Tuple[str, int, int]]) -> None:
+        """Remember the stat of scanned files (after their queued metadata is written)"""
+        with self._lock:
+            self._flush_locked()
+            with self._connection:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO scanned (path, size, mtime_ns) VALUES (?, ?, ?)",
+                    states
+                )
+
+    def totals(self) -> Dict[str, int]:
+        """Document count, source bytes, words and the store revision"""
+        self.flush()
+        with self._lock:
+            count, size, words, revision = self._connection.execute(
+                "SELECT documents, file_size, word_count, revision FROM stats"
+            ).fetchone()
+        return {"documents": count, "file_size": size, "word_count": words, "revision": revision}
+
+    def export_rows(self, batch_size: int = 10000) -> Iterator[List[tuple]]:
+        """
+        Stream every document as flat rows in EXPORT_COLUMNS order
+
+        Rows are read on a separate connection in batches of batch_size;
+        timestamps are ISO strings and has_math is 0 or 1.
+        """
+        self.flush()
+        connection = self._connect()
+        try:
+            cursor = connection.execute(EXPORT)
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                yield rows
+        finally:
+            connection.close()
+
+    def distribution(
+        self,
+        column: str,
+        percentiles: Tuple[float, ...] = (0.5, 0.9, 0.99)
+    ) -> Dict[str, float]:
+        """
+        Summarize a numeric column across all documents
+
+        Args:
+            column: One of DISTRIBUTIONS (render_seconds covers rendered documents only)
+            percentiles: Fractions to report as nearest-rank percentiles
+
+        Returns:
+            count, sum, mean, min, max and one pNN entry per percentile
+        """
+        table = DISTRIBUTIONS[column]
+        field = "seconds" if table == "renders" else column
+        self.flush()
+        with self._lock:
+            count, total, mean, low, high = self._connection.execute(
+                f"SELECT COUNT({field}), TOTAL({field}), AVG({field}), MIN({field}), MAX({field}) "
+                f"FROM {table}"
+            ).fetchone()
+            result = {"count": count, "sum": total, "mean": mean or 0.0,
+                      "min": low or 0, "max": high or 0}
+            for fraction in percentiles:
+                rank = max(0, math.ceil(fraction * count) - 1)
+                row = self._connection.execute(
+                    f"SELECT {field} FROM {table} WHERE {field} IS NOT NULL "
+                    f"ORDER BY {field} LIMIT 1 OFFSET ?",
+                    (rank,)
+                ).fetchone()
+                result[f"p{fraction * 100:g}"] = row[0] if row else 0
+        return result
+
+    def largest(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Documents with the biggest sources"""
+        self.flush()
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT name, title, file_size, word_count FROM documents "
+                "ORDER BY file_size DESC, name LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [
+            {"name": name, "title": title, "file_size": size, "word_count": words}
+            for name, title, size, words in rows
+        ]
+
+    def slowest(self, limit: int = 10) -> List[Dict[str, Any]]:
+        """Documents that took longest to render"""
+        self.flush()
+        with self._lock:
+            rows = self._connection.execute(
+                "SELECT renders.name, title, seconds, word_count "
+                "FROM renders JOIN documents ON documents.name = renders.name "
+                "ORDER BY seconds DESC, renders.name LIMIT ?",
+                (limit,)
+            ).fetchall()
+        return [
+            {"name": name, "title": title, "render_seconds": seconds, "word_count": words}
+            for name, title, seconds, words in rows
+        ]
+
+    def import_json(self, metadata_dir: Path) -> int:
+        """
+        Load per-document JSON files written by earlier versions
+
+        Returns:
+            Number of documents imported
+        """
+        count = 0
+        for meta_file in sorted(metadata_dir.glob("*.json"), key=lambda f: f.stat().st_mtime):
+            try:
+                with open(meta_file, 'r', encoding='utf-8') as f:
+                    metadata = json.load(f)
+            except (OSError, ValueError):
+                continue
+            metadata.setdefault("name", meta_file.stem)
+            self.put(metadata, _read_text(metadata.get("file")))
+            count += 1
+        self.flush()
+        return count
+
+    def export_json(self, output_file: Path) -> Path:
+        """Write every document's metadata to a single JSON array"""
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        with open(output_file, 'w', encoding='utf-8') as f:
+            f.write("[")
+            for i, metadata in enumerate(self.documents()):
+                f.write(",\n" if i else "\n")
+                json.dump(metadata, f, ensure_ascii=False)
+            f.write("\n]\n")
+        return output_file
+
+    def close(self) -> None:
+        """Flush queued records and close the database"""
+        self.flush()
+        with self._lock:
+            self._connection.close()
+
+    def _flush_locked(self) -> None:
+        """
+        Upsert queued records (caller holds the lock)
+
+        The queue is always emptied. If the batch transaction fails, each
+        record is retried on its own and the ones that still fail are
+        recorded in rejected, so one bad record never blocks later flushes.
+        """
+        if not self._pending:
+            return
+        pending, texts, renders = self._pending, self._pending_text, self._pending_renders
+        self._pending, self._pending_text, self._pending_renders = [], {}, []
+
+        try:
+            self._write(pending, list(texts.values()), renders)
+        except sqlite3.Error:
+            for row in pending:
+                name = row[0]
+                try:
+                    self._write(
+                        [row],
+                        [texts[name]] if name in texts else [],
+                        [render for render in renders if render[0] == name]
+                    )
+                except sqlite3.Error as e:
+                    self.rejected.append((name, str(e)))
+
+    def _write(self, rows: List[tuple], texts: List[tuple], renders: List[tuple]) -> None:
+        """Write records, their search text and render times in one transaction"""
+        with self._connection:
+            self._connection.executemany(UPSERT, rows)
+            if texts:
+                self._connection.executemany(UNINDEX, [(text[0],) for text in texts])
+                self._connection.executemany(INDEX, [text[1:] + text[:1] for text in texts])
+            if renders:
+                self._connection.executemany(
+                    "INSERT OR REPLACE INTO renders (name, seconds, rendered_at) VALUES (?, ?, ?)",
+                    renders
+                )
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open a connection configured for concurrent access"""
+        if self.read_only:
+            return sqlite3.connect(
+                f"{self.db_file.resolve().as_uri()}?mode=ro",
+                uri=True, timeout=30, check_same_thread=False
+            )
+        connection = sqlite3.connect(self.db_file, timeout=30, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+
+def _json_default(obj: Any) -> Any:
+    """Serialize dates and other non-JSON values found in frontmatter"""
+    if hasattr(obj, 'isoformat'):
+        return obj.isoformat()
+    return str(obj)
+
+
+def _text(value: Any) -> Optional[str]:
+    """Coerce a metadata value to text for a TEXT column (lists are joined)"""
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(item) for item in value)
+    return _json_default(value)
+
+
+def _integer(value: Any) -> int:
+    """Coerce a metadata value to an INTEGER column value (0 when not a number)"""
+    if isinstance(value, bool):
+        return int(value)
+    try:
+        return int(value or 0)
+    except (TypeError, ValueError):
+        return 0
+
+
+def fts_query(text: str) -> str:
+    """
+    Turn free text into an FTS5 query that matches every word
+
+    Words are quoted so punctuation and FTS5 operators in user input are
+    searched for literally; a trailing * is kept as a prefix match.
+    """
+    terms = []
+    for word in text.split():
+        prefix = word.endswith("*")
+        word = word.rstrip("*").replace('"', '""')
+        if word:
+            terms.append(f'"{word}"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+
+def _read_text(path: Optional[str]) -> Optional[str]:
+    """Read a source document for indexing (None when it is gone)"""
+    if not path:
+        return None
+    try:
+        return Path(path).read_text(encoding='utf-8', errors='replace')
+    except OSError:
+        return None
@@ -1,7 +1,11 @@
 """Theme processing and CSS generation for BARQUE"""
 
+import hashlib
+import json
+import os
+import threading
 from pathlib import Path
-from typing import Dict
+from typing import Dict, Tuple
 from .config import BarqueConfig
 
 
@@ -10,6 +14,69 @@ class ThemeProcessor:
 
     def __init__(self, config: BarqueConfig):
         self.config = config
+        self._compiled: Dict[Tuple[str, str], str] = {}
+        self._files: Dict[Tuple[str, str, Path], Path] = {}
+        self._lock = threading.Lock()
+
+    def fingerprint(self, theme: str) -> str:
+        """Hash the theme colors and typography settings that shape the CSS"""
+        settings = {
+            "theme": theme,
+            "colors": self._get_theme_data(theme),
+            "font_family": self.config.font_family,
+            "base_font_size": self.config.base_font_size,
+            "line_height": self.config.line_height,
+            "max_width": self.config.max_width,
+        }
+        encoded = json.dumps(settings, sort_keys=True, default=str).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def compile_css(self, theme: str) -> str:
+        """Generate CSS for a theme, memoized on its configuration fingerprint"""
+        key = (theme, self.fingerprint(theme))
+        with self._lock:
+            css = self._compiled.get(key)
+            if css is None:
+                css = self.generate_css(theme)
+                self._compiled[key] = css
+        return css
+
+    def theme_css_file(self, theme: str, output_dir: Path) -> Path:
+        """
+        Get a stylesheet file for a theme, writing it at most once
+
+        The file is named after a hash of its content and written atomically,
+        so concurrent workers (threads or processes) share it read-only and
+        never observe a partially written stylesheet.
+
+        Args:
+            theme: Theme name (light or dark)
+            output_dir: Directory holding compiled stylesheets
+
+        Returns:
+            Path of the compiled stylesheet
+        """
+        key = (theme, self.fingerprint(theme), output_dir)
+        with self._lock:
+            css_file = self._files.get(key)
+        if css_file is not None:
+            return css_file
+
+        css = self.compile_css(theme)
+        digest = hashlib.sha256(css.encode("utf-8")).hexdigest()[:16]
+        css_file = output_dir / f"{theme}-{digest}.css"
+
+        if not css_file.exists():
+            output_dir.mkdir(parents=True, exist_ok=True)
+            staging = css_file.with_name(
+                f"{css_file.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+            )
+            staging.write_text(css, encoding='utf-8')
+            os.replace(staging, css_file)
+
+        with self._lock:
+            self._files[key] = css_file
+        return css_file
 
     def generate_css(self, theme: str) -> str:
         """Generate CSS for specified theme (light or dark)"""
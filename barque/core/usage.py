@@ -0,0 +1,230 @@
+"""Per-stage timing and resource accounting for BARQUE renders"""
+
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Tuple, Union
+
+# ru_maxrss is in kilobytes on Linux and in bytes on macOS
+_MAXRSS_SCALE = 1 if sys.platform == "darwin" else 1024
+
+_PAGE_TREE = re.compile(rb"/Type\s*/Pages\b")
+_PAGE_COUNT = re.compile(rb"/Count\s+(\d+)")
+_PAGE = re.compile(rb"/Type\s*/Page\b(?!s)")
+_OBJECT_STREAM = re.compile(rb"/Type\s*/ObjStm\b")
+_STREAM_START = re.compile(rb"stream\r?\n")
+
+_local = threading.local()
+
+
+@dataclass
+class StageUsage:
+    """Time spent in one stage of a render"""
+    wall: float = 0.0  # Elapsed seconds
+    cpu: float = 0.0   # CPU seconds of this thread plus its child processes
+    calls: int = 0
+
+
+@dataclass
+class ResourceUsage:
+    """
+    Stage timings and child process peak memory for one document
+
+    Install it on the rendering thread with recording(); stage() blocks and
+    run() calls on that thread then add to it. Stages do not nest.
+    """
+    stages: Dict[str, StageUsage] = field(default_factory=dict)
+    peak_rss: int = 0  # Largest resident set of any child process, in bytes
+
+    def add_child(self, rusage: Any) -> None:
+        """Account a finished child process to the current stage"""
+        self.peak_rss = max(self.peak_rss, rusage.ru_maxrss * _MAXRSS_SCALE)
+        current = getattr(_local, "stage", None)
+        if current is not None:
+            current.cpu += rusage.ru_utime + rusage.ru_stime
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-friendly form"""
+        return {
+            "stages": {
+                name: {"wall": round(s.wall, 4), "cpu": round(s.cpu, 4), "calls": s.calls}
+                for name, s in self.stages.items()
+            },
+            "peak_rss": self.peak_rss,
+        }
+
+
+@contextmanager
+def recording(usage: ResourceUsage) -> Iterator[ResourceUsage]:
+    """Send this thread's stage timings and child usage to usage"""
+    previous = getattr(_local, "usage", None)
+    _local.usage = usage
+    try:
+        yield usage
+    finally:
+        _local.usage = previous
+
+
+@contextmanager
+def stage(name: str) -> Iterator[None]:
+    """Time a stage of the document being recorded on this thread (no-op otherwise)"""
+    usage = getattr(_local, "usage", None)
+    if usage is None:
+        yield
+        return
+
+    current = usage.stages.setdefault(name, StageUsage())
+    _local.stage = current
+    wall = time.perf_counter()
+    cpu = time.thread_time()
+    try:
+        yield
+    finally:
+        current.wall += time.perf_counter() - wall
+        current.cpu += time.thread_time() - cpu
+        current.calls += 1
+        _local.stage = None
+
+
+def run(
+    args: Any,
+    *,
+    input: Optional[Union[str, bytes]] = None,
+    capture_output: bool = False,
+    check: bool = False,
+    **kwargs: Any
+) -> subprocess.CompletedProcess:
+    """
+    subprocess.run() that accounts the child's CPU time and peak RSS
+
+    Usage is added to the ResourceUsage recorded on this thread, if any.
+    """
+    if input is not None:
+        kwargs["stdin"] = subprocess.PIPE
+    if capture_output:
+        kwargs["stdout"] = subprocess.PIPE
+        kwargs["stderr"] = subprocess.PIPE
+
+    process = subprocess.Popen(args, **kwargs)
+    try:
+        stdout, stderr = _communicate(process, input)
+        rusage = _reap(process)
+    except BaseException:
+        process.kill()
+        process.wait()
+        raise
+
+    usage = getattr(_local, "usage", None)
+    if usage is not None and rusage is not None:
+        usage.add_child(rusage)
+
+    if check and process.returncode:
+        raise subprocess.CalledProcessError(process.returncode, args, stdout, stderr)
+    return subprocess.CompletedProcess(args, process.returncode, stdout, stderr)
+
+
+def _communicate(
+    process: subprocess.Popen,
+    input: Optional[Union[str, bytes]]
+) -> Tuple[Any, Any]:
+    """
+    Exchange data with a child without reaping it
+
+    Popen.communicate() waits for the child itself, which discards its
+    rusage. The output pipes are drained on threads so a child filling one
+    pipe never blocks while its input is being written.
+    """
+    output: Dict[str, Any] = {}
+
+    def drain(name: str, pipe: Any) -> None:
+        with pipe:
+            output[name] = pipe.read()
+
+    readers = [
+        threading.Thread(target=drain, args=(name, pipe), daemon=True)
+        for name, pipe in (("stdout", process.stdout), ("stderr", process.stderr))
+        if pipe is not None
+    ]
+    for reader in readers:
+        reader.start()
+
+    if process.stdin is not None:
+        # A child may exit without reading all of its input
+        try:
+            if input:
+                process.stdin.write(input)
+        except BrokenPipeError:
+            pass
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+
+    for reader in readers:
+        reader.join()
+    return output.get("stdout"), output.get("stderr")
+
+
+def _reap(process: subprocess.Popen) -> Optional[Any]:
+    """Wait for a child with wait4() to keep its rusage (None where unavailable)"""
+    if not hasattr(os, "wait4"):
+        process.wait()
+        return None
+    try:
+        _, status, rusage = os.wait4(process.pid, 0)
+    except ChildProcessError:
+        # Reaped elsewhere (e.g. SIGCHLD ignored): nothing to measure
+        process.wait()
+        return None
+    process.returncode = os.waitstatus_to_exitcode(status)
+    return rusage
+
+
+def pdf_page_count(pdf: Union[bytes, Path]) -> Optional[int]:
+    """
+    Count the pages of a PDF without a PDF library
+
+    Reads the /Count of the page tree root, falling back to counting page
+    objects. Compressed object streams (as WeasyPrint writes them) are
+    inflated first. Returns None when neither is visible.
+    """
+    data = pdf if isinstance(pdf, bytes) else Path(pdf).read_bytes()
+    return _count_pages(data) or _count_pages(b"\n".join(_object_streams(data)))
+
+
+def _count_pages(data: bytes) -> Optional[int]:
+    """Page count from the page tree dictionaries visible in data"""
+    counts = []
+    for match in _PAGE_TREE.finditer(data):
+        # The /Count sits in the same dictionary, before or after /Type
+        start = data.rfind(b"<<", 0, match.start())
+        end = data.find(b">>", match.end())
+        count = _PAGE_COUNT.search(data, max(start, 0), end if end >= 0 else len(data))
+        if count:
+            counts.append(int(count.group(1)))
+    if counts:
+        return max(counts)
+
+    pages = len(_PAGE.findall(data))
+    return pages or None
+
+
+def _object_streams(data: bytes) -> Iterator[bytes]:
+    """Inflated contents of the Flate-compressed object streams in a PDF"""
+    view = memoryview(data)
+    for match in _OBJECT_STREAM.finditer(data):
+        start = _STREAM_START.search(data, match.end())
+        if start is None:
+            continue
+        try:
+            # The decompressor stops at the end of the zlib stream, so /Length is not needed
+            yield zlib.decompressobj().decompress(view[start.end():])
+        except zlib.error:
+            continue
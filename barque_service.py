@@ -8,26 +8,65 @@ Usage:
     uvicorn barque_service:app --host 0.0.0.0 --port 8000
 """
 
-from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi import FastAPI, UploadFile, File, HTTPException, BackgroundTasks, Query, Request
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
+from starlette.datastructures import Headers
 from pydantic import BaseModel, EmailStr, Field
-from typing import List, Optional, Dict, Any
-from pathlib import Path
+from typing import List, Optional, Dict, Any, Callable, AsyncIterator, Iterator, Set, BinaryIO
+from pathlib import Path, PurePosixPath
 from enum import Enum
+from dataclasses import dataclass, field
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import asyncio
+import functools
+import hashlib
+import json
+import os
+import re
+import tarfile
 import tempfile
 import shutil
+import time
 import uuid
+import zipfile
 from datetime import datetime
 
 # Import BARQUE core modules (CLI untouched)
+from barque.core.cache import ResultCache, tool_versions
 from barque.core.generator import PDFGenerator, GenerationResult
+from barque.core.manifest import config_fingerprint
 from barque.core.config import BarqueConfig
 from barque.core.email import EmailSender, EmailConfig, EmailProvider, EmailMessage
+from barque.core.store import MetadataStore
 
 # API Version
 API_VERSION = "1.0.0"
 BARQUE_VERSION = "2.0.0"
 
+# Concurrency: renders run on a pool of worker processes (or threads), email
+# delivery on a thread pool, so blocking work never runs on the event loop
+RENDER_WORKERS = int(os.environ.get("BARQUE_RENDER_WORKERS", os.cpu_count() or 1))
+RENDER_BACKEND = os.environ.get("BARQUE_RENDER_BACKEND", "processes")
+EMAIL_WORKERS = int(os.environ.get("BARQUE_EMAIL_WORKERS", 4))
+
+# Batch renders: documents outstanding per render worker, and the largest
+# markdown file accepted from an uploaded archive
+BATCH_IN_FLIGHT_PER_WORKER = 4
+BATCH_MAX_DOCUMENT = 10 * 1024 * 1024
+MARKDOWN_SUFFIXES = {".md", ".markdown"}
+
+# Asynchronous jobs: unfinished jobs accepted before POST /jobs answers 429,
+# and how long finished jobs (and their files) are kept
+JOB_QUEUE_SIZE = int(os.environ.get("BARQUE_JOB_QUEUE", 64))
+JOB_TTL = int(os.environ.get("BARQUE_JOB_TTL", 3600))
+
+# Rendered PDF cache: location and byte cap (0 disables it)
+CACHE_DIR = Path(os.environ.get(
+    "BARQUE_CACHE_DIR", Path(tempfile.gettempdir()) / "barque-service" / "results"
+))
+CACHE_MAX_BYTES = int(os.environ.get("BARQUE_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+
 # FastAPI app
 app = FastAPI(
     title="BARQUE Microservice API",
@@ -111,6 +150,663 @@ class GenerateAndSendRequest(BaseModel):
         }
 
 
+class JobEmail(BaseModel):
+    """Email delivery for a job's PDFs"""
+    to: List[EmailStr] = Field(..., description="Recipient email addresses")
+    subject: Optional[str] = Field(None, description="Email subject (auto-generated if not provided)")
+    body: Optional[str] = Field(None, description="Email body")
+    from_email: Optional[EmailStr] = Field(None, description="Sender email")
+    provider: ProviderEnum = Field(ProviderEnum.resend, description="Email provider")
+
+
+class JobRequest(BaseModel):
+    """Request model for an asynchronous render (and optional email) job"""
+    markdown_content: str = Field(..., description="Markdown content to convert to PDF")
+    theme: ThemeEnum = Field(ThemeEnum.both, description="PDF theme selection")
+    filename: Optional[str] = Field(None, description="Optional filename (default: auto-generated)")
+    email: Optional[JobEmail] = Field(None, description="Send the PDFs by email once rendered")
+
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "markdown_content": "# Q4 Report\n\nQ4 Results...",
+                "theme": "both",
+                "filename": "q4-report",
+                "email": {"to": ["team@company.com"], "subject": "Q4 Report"}
+            }
+        }
+
+
+# Shared generator for in-memory renders (holds only the compiled theme stylesheets)
+_generator: Optional[PDFGenerator] = None
+
+
+def get_generator() -> PDFGenerator:
+    """Get the process-wide generator used for in-memory rendering"""
+    global _generator
+    if _generator is None:
+        config = BarqueConfig()
+        config.output_dir = Path(tempfile.gettempdir()) / "barque-service"
+        _generator = PDFGenerator(config)
+    return _generator
+
+
+def _render_markdown(markdown: str, theme: str, name: str) -> GenerationResult:
+    """Render markdown on a pool worker (each worker process keeps its own generator)"""
+    return get_generator().render_markdown(markdown, theme=theme, name=name)
+
+
+def _default_name(markdown: str) -> str:
+    """Name for an unnamed document, stable across requests so renders can be cached"""
+    return f"document-{hashlib.sha256(markdown.encode('utf-8')).hexdigest()[:8]}"
+
+
+@functools.lru_cache(maxsize=None)
+def _render_fingerprint() -> str:
+    """Fingerprint the effective configuration and tool versions behind every render"""
+    config = json.dumps(get_generator().config.to_dict(), sort_keys=True, default=str)
+    return config_fingerprint(config, tool_versions(), BARQUE_VERSION)
+
+
+def _init_render_worker() -> None:
+    """Warm a render worker process: load the config and compile theme stylesheets"""
+    generator = get_generator()
+    for theme in ("light", "dark"):
+        generator.theme_processor.theme_css_file(theme, generator.temp_dir)
+
+
+class WorkPool:
+    """
+    Bounded executor for blocking work, awaited from request handlers
+
+    At most `workers` calls run at once; further calls wait in the
+    executor's queue. The executor is created on first use and replaced if
+    a worker process dies.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        workers: int,
+        processes: bool = False,
+        initializer: Optional[Callable[[], None]] = None
+    ):
+        self.name = name
+        self.workers = max(1, workers)
+        self.processes = processes
+        self.initializer = initializer
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.busy_seconds = 0.0
+        self._executor: Optional[Executor] = None
+
+    def executor(self) -> Executor:
+        """Get the pool's executor, starting it if needed"""
+        if self._executor is None:
+            if self.processes:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=self.initializer
+                )
+            else:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers,
+                    thread_name_prefix=self.name,
+                    initializer=self.initializer
+                )
+        return self._executor
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run fn(*args) on the pool without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        executor = self.executor()
+        self.in_flight += 1
+        started = time.perf_counter()
+        try:
+            result = await loop.run_in_executor(executor, fn, *args)
+        except BrokenProcessPool:
+            # A worker crashed (e.g. OOM kill): start a fresh pool next time
+            self.failed += 1
+            if self._executor is executor:
+                self.shutdown()
+            raise
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self.busy_seconds += time.perf_counter() - started
+        self.completed += 1
+        return result
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for /metrics"""
+        return {
+            "backend": "processes" if self.processes else "threads",
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queued": max(0, self.in_flight - self.workers),
+            "completed": self.completed,
+            "failed": self.failed,
+            "busy_seconds": round(self.busy_seconds, 3),
+        }
+
+    def shutdown(self) -> None:
+        """Stop the executor without waiting for running work"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+render_pool = WorkPool(
+    "render",
+    RENDER_WORKERS,
+    processes=RENDER_BACKEND == "processes",
+    initializer=_init_render_worker
+)
+email_pool = WorkPool("email", EMAIL_WORKERS)
+
+result_cache = ResultCache(CACHE_DIR, CACHE_MAX_BYTES) if CACHE_MAX_BYTES > 0 else None
+_renders_in_flight: Dict[str, asyncio.Future] = {}
+
+
+async def render_document(markdown: str, theme: str, name: str) -> GenerationResult:
+    """
+    Render markdown on the render pool, reusing cached PDFs
+
+    Each theme is cached on its own, keyed on the markdown, document name,
+    theme and effective configuration, so only missing themes are rendered.
+    Identical renders already in flight are shared. Results served entirely
+    from the cache have skipped=True.
+    """
+    if result_cache is None:
+        return await render_pool.run(_render_markdown, markdown, theme, name)
+
+    started = time.perf_counter()
+    fingerprint = await asyncio.to_thread(_render_fingerprint)
+    themes = ["light", "dark"] if theme == "both" else [theme]
+    keys = {
+        t: config_fingerprint(fingerprint, t, name, markdown)
+        for t in themes
+    }
+
+    cached = {}
+    for t, key in keys.items():
+        entry = await asyncio.to_thread(result_cache.get, key)
+        if entry is not None:
+            cached[t] = entry
+
+    missing = [t for t in themes if t not in cached]
+    rendered = None
+    if missing:
+        render_theme = missing[0] if len(missing) == 1 else "both"
+        rendered = await _render_shared(markdown, render_theme, name, {t: keys[t] for t in missing})
+        if not rendered.success or not cached:
+            return rendered
+
+    pdf_data, pages = {}, {}
+    for t in themes:
+        if t in cached:
+            pdf_data[t], info = cached[t]
+            page_count = info.get("pages")
+        else:
+            pdf_data[t] = rendered.pdf_data[t]
+            page_count = rendered.pages.get(t)
+        if page_count:
+            pages[t] = page_count
+
+    metadata = dict(rendered.metadata if rendered else cached[themes[0]][1]["metadata"])
+    metadata["pdf_files"] = {
+        t: f"{name}-{t}.pdf" if t in pdf_data else None for t in ("light", "dark")
+    }
+    result = GenerationResult(
+        success=True,
+        files=[],
+        metadata=metadata,
+        skipped=rendered is None,
+        pdf_data=pdf_data,
+        source=name,
+        output_bytes={t: len(pdf) for t, pdf in pdf_data.items()},
+        pages=pages
+    )
+    if rendered is not None:
+        result.usage = rendered.usage
+    result.duration = time.perf_counter() - started
+    return result
+
+
+async def _render_shared(
+    markdown: str,
+    theme: str,
+    name: str,
+    keys: Dict[str, str]
+) -> GenerationResult:
+    """Render and cache the given themes, joining an identical render in flight"""
+    shared_key = "|".join(sorted(keys.values()))
+    future = _renders_in_flight.get(shared_key)
+    if future is None:
+        async def render_and_store() -> GenerationResult:
+            result = await render_pool.run(_render_markdown, markdown, theme, name)
+            if result.success:
+                for t, key in keys.items():
+                    info = {"metadata": result.metadata, "pages": result.pages.get(t)}
+                    await asyncio.to_thread(result_cache.put, key, result.pdf_data[t], info)
+            return result
+
+        future = asyncio.ensure_future(render_and_store())
+        _renders_in_flight[shared_key] = future
+        future.add_done_callback(lambda _: _renders_in_flight.pop(shared_key, None))
+
+    # One waiter giving up must not cancel the render for the others
+    return await asyncio.shield(future)
+
+
+@dataclass
+class Job:
+    """An asynchronous render job and its progress events"""
+    job_id: str
+    request: JobRequest
+    status: str = "queued"  # queued, rendering, sending, done, failed
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    timings: Dict[str, float] = field(default_factory=dict)
+    result: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+    events: List[Dict[str, Any]] = field(default_factory=list)
+    changed: asyncio.Event = field(default_factory=asyncio.Event)
+
+    @property
+    def terminal(self) -> bool:
+        return self.status in ("done", "failed")
+
+    def publish(self, status: str, **data: Any) -> None:
+        """Move to status and wake event stream subscribers"""
+        self.status = status
+        self.events.append({"status": status, "time": time.time(), **data})
+        changed, self.changed = self.changed, asyncio.Event()
+        changed.set()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Job status for GET /jobs/{id}"""
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "created_at": datetime.utcfromtimestamp(self.created).isoformat(),
+            "timings": {name: round(seconds, 4) for name, seconds in self.timings.items()},
+            "events_url": f"/jobs/{self.job_id}/events",
+            "error": self.error,
+            **self.result
+        }
+
+
+class JobQueue:
+    """
+    Bounded registry of asynchronous jobs
+
+    Each job runs as an asyncio task; at most `workers` jobs render at once
+    and the rest wait in the queued state. Submissions beyond `capacity`
+    unfinished jobs are refused. Finished jobs and their files are dropped
+    after `ttl` seconds.
+    """
+
+    def __init__(self, capacity: int, workers: int, ttl: int):
+        self.capacity = capacity
+        self.ttl = ttl
+        self.jobs: Dict[str, Job] = {}
+        self._slots = asyncio.Semaphore(max(1, workers))
+        self._tasks: Set[asyncio.Task] = set()
+
+    def pending(self) -> int:
+        """Number of queued and running jobs"""
+        return sum(1 for job in self.jobs.values() if not job.terminal)
+
+    def submit(self, request: JobRequest) -> Optional[Job]:
+        """Queue a job, or return None when the queue is full"""
+        self.prune()
+        if self.pending() >= self.capacity:
+            return None
+
+        job = Job(job_id=uuid.uuid4().hex[:12], request=request)
+        self.jobs[job.job_id] = job
+        job.publish("queued", position=self.pending())
+
+        task = asyncio.create_task(self._run(job))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return job
+
+    def prune(self) -> None:
+        """Forget expired finished jobs and delete their files"""
+        cutoff = time.time() - self.ttl
+        for job_id, job in list(self.jobs.items()):
+            if job.terminal and job.finished < cutoff:
+                del self.jobs[job_id]
+                downloads.remove(job_id)
+
+    async def _run(self, job: Job) -> None:
+        """Render (and email) a job once a render slot is free"""
+        request = job.request
+        filename = _document_name(request.filename, request.markdown_content)
+        try:
+            async with self._slots:
+                job.started = time.time()
+                job.timings["queued"] = job.started - job.created
+                job.publish("rendering")
+
+                result = await render_document(
+                    request.markdown_content, request.theme.value, filename
+                )
+                job.timings["render"] = result.duration
+                if not result.success:
+                    raise RuntimeError(result.error)
+
+                pdf_files = write_job_files(job.job_id, filename, result)
+                job.result = {
+                    "files": [
+                        {
+                            "filename": pdf_path.name,
+                            "url": f"/download/{job.job_id}/{pdf_path.name}",
+                            "size_bytes": len(result.pdf_data[theme]),
+                            "pages": result.pages.get(theme)
+                        }
+                        for theme, pdf_path in pdf_files.items()
+                    ],
+                    "metadata": result.metadata,
+                    "usage": result.usage.to_dict(),
+                    "cached": result.skipped
+                }
+                job.publish("rendered", files=job.result["files"], seconds=result.duration)
+
+            if request.email:
+                job.publish("sending")
+                sent = time.perf_counter()
+                email_result = await email_pool.run(
+                    _send_job_email, request.email, list(pdf_files.values()), result.metadata
+                )
+                job.timings["email"] = time.perf_counter() - sent
+                if not email_result.success:
+                    raise RuntimeError(email_result.error)
+                job.result["recipients"] = email_result.recipients
+
+            job.finished = time.time()
+            job.timings["total"] = job.finished - job.created
+            job.publish("done")
+        except Exception as e:
+            job.error = str(e)
+            job.finished = time.time()
+            job.timings["total"] = job.finished - job.created
+            job.publish("failed", error=job.error)
+
+    def stats(self) -> Dict[str, Any]:
+        """Counters for /metrics"""
+        statuses: Dict[str, int] = {}
+        for job in self.jobs.values():
+            statuses[job.status] = statuses.get(job.status, 0) + 1
+        return {"capacity": self.capacity, "pending": self.pending(), "jobs": statuses}
+
+
+def _send_job_email(email: JobEmail, pdf_files: List[Path], metadata: Dict[str, Any]):
+    """Deliver a job's PDFs (runs on the email pool)"""
+    sender = EmailSender(EmailConfig(
+        provider=EmailProvider.RESEND if email.provider == ProviderEnum.resend else EmailProvider.SMTP,
+        from_email=email.from_email
+    ))
+    return sender.send_pdf_report(
+        to=email.to,
+        subject=email.subject or f"Report: {metadata.get('title', 'Document')}",
+        pdf_files=pdf_files,
+        body_template=email.body,
+        from_email=email.from_email
+    )
+
+
+job_queue = JobQueue(JOB_QUEUE_SIZE, RENDER_WORKERS, JOB_TTL)
+
+
+def _batch_name(name: str) -> str:
+    """Turn a document name or archive path into a safe PDF file name stem"""
+    parts = PurePosixPath(name.replace("\\", "/")).with_suffix("").parts
+    stem = "-".join(part for part in parts if part.strip("/."))
+    return re.sub(r"[^\w.-]+", "_", stem).strip("._-") or "document"
+
+
+def _document_name(filename: Optional[str], markdown: str) -> str:
+    """File name stem for a rendered document: the client's name made safe, or a default"""
+    return _batch_name(filename) if filename else _default_name(markdown)
+
+
+class _DuplexStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse whose content still reads the request body
+
+    StreamingResponse watches receive() for a client disconnect while it
+    streams, which would swallow the rest of the request body. This one
+    waits until the body has been read before it starts watching.
+    """
+
+    def __init__(self, content: AsyncIterator[str], body_read: asyncio.Event, **kwargs: Any):
+        super().__init__(content, **kwargs)
+        self.body_read = body_read
+
+    async def listen_for_disconnect(self, receive: Callable) -> None:
+        await self.body_read.wait()
+        await super().listen_for_disconnect(receive)
+
+
+async def _ndjson_documents(
+    request: Request,
+    theme: str,
+    body_read: asyncio.Event
+) -> AsyncIterator[Dict[str, Any]]:
+    """Parse GeneratePDFRequest objects from an NDJSON body as it arrives"""
+    buffer = b""
+    index = 0
+    try:
+        async for chunk in request.stream():
+            buffer += chunk
+            *lines, buffer = buffer.split(b"\n")
+            for line in lines:
+                if line.strip():
+                    yield _ndjson_document(index, line, theme)
+                    index += 1
+    finally:
+        body_read.set()
+    if buffer.strip():
+        yield _ndjson_document(index, buffer, theme)
+
+
+def _ndjson_document(index: int, line: bytes, theme: str) -> Dict[str, Any]:
+    """Validate one NDJSON line (theme defaults to the batch theme)"""
+    try:
+        document = json.loads(line)
+        document.setdefault("theme", theme)
+        document = GeneratePDFRequest(**document)
+    except Exception as e:
+        return {"index": index, "name": None, "error": f"Invalid document: {e}"}
+    return {
+        "index": index,
+        "name": document.filename or f"document-{index}",
+        "markdown": document.markdown_content,
+        "theme": document.theme.value
+    }
+
+
+def _archive_members(archive: BinaryIO) -> Iterator[Dict[str, Any]]:
+    """
+    Read markdown files from a zip or tar archive, one member at a time
+
+    Tar archives (optionally compressed) are read as a stream; zip members
+    are decompressed individually. Nothing is extracted to disk.
+    """
+    if zipfile.is_zipfile(archive):
+        archive.seek(0)
+        with zipfile.ZipFile(archive) as zf:
+            for info in zf.infolist():
+                if info.is_dir() or PurePosixPath(info.filename).suffix.lower() not in MARKDOWN_SUFFIXES:
+                    continue
+                if info.file_size > BATCH_MAX_DOCUMENT:
+                    yield {"name": info.filename, "error": "Document too large"}
+                    continue
+                yield {"name": info.filename, "data": zf.read(info)}
+        return
+
+    archive.seek(0)
+    with tarfile.open(fileobj=archive, mode="r|*") as tf:
+        for member in tf:
+            if not member.isfile() or PurePosixPath(member.name).suffix.lower() not in MARKDOWN_SUFFIXES:
+                continue
+            if member.size > BATCH_MAX_DOCUMENT:
+                yield {"name": member.name, "error": "Document too large"}
+                continue
+            yield {"name": member.name, "data": tf.extractfile(member).read()}
+
+
+async def _archive_documents(archive: BinaryIO, theme: str) -> AsyncIterator[Dict[str, Any]]:
+    """Yield the markdown documents of an uploaded archive, read off the event loop"""
+    members = _archive_members(archive)
+    index = 0
+    while True:
+        try:
+            member = await asyncio.to_thread(next, members, None)
+        except (tarfile.TarError, zipfile.BadZipFile) as e:
+            yield {"index": index, "name": None, "error": f"Unreadable archive: {e}"}
+            return
+        if member is None:
+            return
+
+        document = {"index": index, "name": member["name"], "theme": theme}
+        if "error" in member:
+            document["error"] = member["error"]
+        else:
+            try:
+                document["markdown"] = member["data"].decode("utf-8")
+            except UnicodeDecodeError:
+                document["error"] = "Document is not UTF-8 text"
+        yield document
+        index += 1
+
+
+def library_dir() -> Path:
+    """Get the batch output directory served by /search (BARQUE_OUTPUT_DIR or the project config)"""
+    configured = os.environ.get("BARQUE_OUTPUT_DIR")
+    return Path(configured) if configured else BarqueConfig.load().output_dir
+
+
+@functools.lru_cache(maxsize=4)
+def _library_store(db_file: Path) -> MetadataStore:
+    """Read-only metadata store for a library, opened once and shared by requests"""
+    return MetadataStore(db_file, read_only=True)
+
+
+def _search_library(q: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+    """Query the library's search index (None when no batch run has built one)"""
+    db_file = library_dir() / "metadata" / "metadata.db"
+    if not db_file.exists():
+        return None
+    return _library_store(db_file).search(q, limit=limit, highlight=("<mark>", "</mark>"))
+
+
+@dataclass
+class StoredFile:
+    """A downloadable file written by a job"""
+    path: Path
+    etag: str  # Strong ETag: quoted SHA-256 of the content
+    size: int
+
+
+class DownloadRegistry:
+    """
+    Files written by jobs, looked up by job id and file name
+
+    Each job gets its own mkdtemp() directory; /download only serves files
+    registered here, so no path is ever built from request input.
+    """
+
+    def __init__(self):
+        self.files: Dict[str, Dict[str, StoredFile]] = {}
+        self.dirs: Dict[str, Path] = {}
+
+    def add(self, job_id: str, filename: str, data: bytes) -> StoredFile:
+        """Write a job file and register it; the name must not leave the job's directory"""
+        if filename in ("", ".", "..") or "/" in filename or "\\" in filename:
+            raise ValueError(f"Invalid file name: {filename!r}")
+        directory = self.dirs.get(job_id)
+        if directory is None:
+            directory = self.dirs[job_id] = Path(tempfile.mkdtemp(prefix=f"barque-{job_id}-"))
+
+        path = directory / filename
+        path.write_bytes(data)
+        stored = StoredFile(path, f'"{hashlib.sha256(data).hexdigest()}"', len(data))
+        self.files.setdefault(job_id, {})[filename] = stored
+        return stored
+
+    def get(self, job_id: str, filename: str) -> Optional[StoredFile]:
+        """Find a registered job file"""
+        return self.files.get(job_id, {}).get(filename)
+
+    def remove(self, job_id: str) -> None:
+        """Forget a job's files and delete them"""
+        self.files.pop(job_id, None)
+        directory = self.dirs.pop(job_id, None)
+        if directory is not None:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+downloads = DownloadRegistry()
+
+
+def write_job_files(job_id: str, filename: str, result: GenerationResult) -> Dict[str, Path]:
+    """Write in-memory PDFs to the job's download directory, keyed by theme"""
+    return {
+        theme: downloads.add(job_id, f"{filename}-{theme}.pdf", pdf).path
+        for theme, pdf in result.pdf_data.items()
+    }
+
+
+class PDFFileResponse(FileResponse):
+    """
+    FileResponse for registered job files
+
+    Adds a strong content-hash ETag with If-None-Match (304) handling.
+    FileResponse serves Range and If-Range requests against that ETag, and
+    hands the file to the server with the ASGI pathsend extension when the
+    server offers it.
+    """
+
+    def __init__(self, stored: StoredFile, **kwargs: Any):
+        kwargs.setdefault("media_type", "application/pdf")
+        super().__init__(stored.path, stat_result=stored.path.stat(), **kwargs)
+        self.stored = stored
+        self.headers["etag"] = stored.etag
+        self.headers.setdefault("cache-control", f"private, max-age={JOB_TTL}")
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if not _etag_matches(Headers(scope=scope).get("if-none-match"), self.stored.etag):
+            await super().__call__(scope, receive, send)
+            return
+
+        not_modified = Response(status_code=304, headers={
+            "etag": self.stored.etag,
+            "cache-control": self.headers["cache-control"]
+        })
+        await not_modified(scope, receive, send)
+        if self.background is not None:
+            await self.background()
+
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == etag:
+            return True
+    return False
+
+
 class APIResponse(BaseModel):
     """Standard API response"""
     success: bool
@@ -135,6 +831,13 @@ async def root():
     )
 
 
+@app.on_event("shutdown")
+async def shutdown_pools():
+    """Stop the render and email pools"""
+    render_pool.shutdown()
+    email_pool.shutdown()
+
+
 @app.get("/health", response_model=APIResponse)
 async def health_check():
     """Health check endpoint"""
@@ -149,6 +852,21 @@ async def health_check():
     )
 
 
+@app.get("/metrics", response_model=APIResponse)
+async def metrics():
+    """Render and email pool counters"""
+    return APIResponse(
+        success=True,
+        message="Service metrics",
+        data={
+            "render": render_pool.stats(),
+            "email": email_pool.stats(),
+            "jobs": job_queue.stats(),
+            "cache": result_cache.stats() if result_cache is not None else None
+        }
+    )
+
+
 @app.post("/generate", response_model=APIResponse)
 async def generate_pdf(request: GeneratePDFRequest, background_tasks: BackgroundTasks):
     """
@@ -157,39 +875,29 @@ async def generate_pdf(request: GeneratePDFRequest, background_tasks: Background
     Returns URLs to download generated PDFs
     """
     try:
-        # Create temporary file for markdown
-        temp_dir = Path(tempfile.mkdtemp())
         job_id = str(uuid.uuid4())[:8]
-        filename = request.filename or f"document-{job_id}"
-        md_file = temp_dir / f"{filename}.md"
+        filename = _document_name(request.filename, request.markdown_content)
 
-        # Write markdown content
-        md_file.write_text(request.markdown_content, encoding='utf-8')
-
-        # Generate PDF using BARQUE core
-        config = BarqueConfig()
-        config.output_dir = temp_dir / "output"
-        generator = PDFGenerator(config)
-
-        result = generator.generate(
-            input_file=md_file,
-            theme=request.theme.value
+        # Render in memory on the render pool: PDFs come back as bytes
+        result = await render_document(
+            request.markdown_content, request.theme.value, filename
         )
 
         if not result.success:
             raise HTTPException(status_code=500, detail=result.error)
 
-        # Prepare response with file URLs
+        # Keep the PDFs for download and prepare response with file URLs
         files = []
-        for pdf_path in result.files:
+        for theme, pdf_path in write_job_files(job_id, filename, result).items():
             files.append({
-                "filename": Path(pdf_path).name,
-                "url": f"/download/{job_id}/{Path(pdf_path).name}",
-                "size_bytes": Path(pdf_path).stat().st_size
+                "filename": pdf_path.name,
+                "url": f"/download/{job_id}/{pdf_path.name}",
+                "size_bytes": len(result.pdf_data[theme]),
+                "pages": result.pages.get(theme)
             })
 
         # Schedule cleanup after some time
-        background_tasks.add_task(cleanup_temp_dir, temp_dir, delay=3600)
+        background_tasks.add_task(cleanup_job_files, job_id, delay=3600)
 
         return APIResponse(
             success=True,
@@ -197,7 +905,9 @@ async def generate_pdf(request: GeneratePDFRequest, background_tasks: Background
             data={
                 "job_id": job_id,
                 "files": files,
-                "metadata": result.metadata
+                "metadata": result.metadata,
+                "usage": result.usage.to_dict(),
+                "cached": result.skipped
             }
         )
 
@@ -205,6 +915,168 @@ async def generate_pdf(request: GeneratePDFRequest, background_tasks: Background
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.post("/generate/pdf")
+async def generate_pdf_file(request: GeneratePDFRequest, background_tasks: BackgroundTasks):
+    """
+    Generate a PDF from markdown and return it as the response body
+
+    Renders one theme (light or dark). The PDF stays downloadable, with
+    Range support, at the URL in the Content-Location header.
+    """
+    if request.theme == ThemeEnum.both:
+        raise HTTPException(status_code=422, detail="Choose a single theme: light or dark")
+
+    try:
+        job_id = str(uuid.uuid4())[:8]
+        filename = _document_name(request.filename, request.markdown_content)
+
+        result = await render_document(
+            request.markdown_content, request.theme.value, filename
+        )
+        if not result.success:
+            raise HTTPException(status_code=500, detail=result.error)
+
+        pdf_path = write_job_files(job_id, filename, result)[request.theme.value]
+        background_tasks.add_task(cleanup_job_files, job_id, delay=3600)
+
+        headers = {
+            "content-location": f"/download/{job_id}/{pdf_path.name}",
+            "x-barque-cache": "hit" if result.skipped else "miss"
+        }
+        pages = result.pages.get(request.theme.value)
+        if pages:
+            headers["x-barque-pages"] = str(pages)
+        return PDFFileResponse(
+            downloads.get(job_id, pdf_path.name),
+            filename=pdf_path.name,
+            content_disposition_type="inline",
+            headers=headers
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@app.post("/generate/batch")
+async def generate_batch(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    theme: ThemeEnum = Query(ThemeEnum.both, description="Theme for documents that do not set one")
+):
+    """
+    Render many documents in one request
+
+    Send either an NDJSON body (Content-Type: application/x-ndjson) with one
+    /generate request object per line, or a multipart upload whose `archive`
+    field is a zip or tar(.gz) of markdown files. Documents are fanned out
+    to the render pool and one NDJSON result line is streamed per document
+    as it completes, followed by a summary line.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    body_read = asyncio.Event()
+    if content_type in ("application/x-ndjson", "application/jsonl"):
+        # Lines are rendered as they arrive, while the body is still uploading
+        documents = _ndjson_documents(request, theme.value, body_read)
+    elif content_type == "multipart/form-data":
+        form = await request.form()
+        body_read.set()
+        archive = form.get("archive")
+        if archive is None or isinstance(archive, str):
+            raise HTTPException(status_code=422, detail="Upload a zip or tar file as 'archive'")
+        documents = _archive_documents(archive.file, theme.value)
+    else:
+        raise HTTPException(
+            status_code=415,
+            detail="Send application/x-ndjson or a multipart 'archive' upload"
+        )
+
+    batch_id = uuid.uuid4().hex[:12]
+    max_in_flight = render_pool.workers * BATCH_IN_FLIGHT_PER_WORKER
+
+    async def render(document: Dict[str, Any], name: str) -> Dict[str, Any]:
+        entry = {"index": document["index"], "name": document["name"]}
+        try:
+            result = await render_document(
+                document["markdown"], document["theme"], name
+            )
+        except Exception as e:
+            return {**entry, "success": False, "error": str(e)}
+        if not result.success:
+            return {**entry, "success": False, "error": result.error, "seconds": result.duration}
+
+        pdf_files = write_job_files(batch_id, name, result)
+        return {
+            **entry,
+            "success": True,
+            "seconds": round(result.duration, 4),
+            "cached": result.skipped,
+            "title": result.metadata.get("title"),
+            "files": [
+                {
+                    "filename": pdf_path.name,
+                    "url": f"/download/{batch_id}/{pdf_path.name}",
+                    "size_bytes": len(result.pdf_data[pdf_theme]),
+                    "pages": result.pages.get(pdf_theme)
+                }
+                for pdf_theme, pdf_path in pdf_files.items()
+            ]
+        }
+
+    async def stream() -> AsyncIterator[str]:
+        started = time.perf_counter()
+        counts = {"documents": 0, "succeeded": 0, "failed": 0}
+        names: Set[str] = set()
+        pending: Set[asyncio.Task] = set()
+
+        def line(entry: Dict[str, Any]) -> str:
+            counts["documents"] += 1
+            counts["succeeded" if entry["success"] else "failed"] += 1
+            return json.dumps(entry) + "\n"
+
+        try:
+            async for document in documents:
+                if "error" in document:
+                    yield line({
+                        "index": document["index"],
+                        "name": document["name"],
+                        "success": False,
+                        "error": document["error"]
+                    })
+                    continue
+
+                # Archive paths and client names may collide once flattened
+                name = _batch_name(document["name"])
+                if name in names:
+                    name = f"{name}-{document['index']}"
+                names.add(name)
+
+                if len(pending) >= max_in_flight:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    for task in done:
+                        yield line(task.result())
+                pending.add(asyncio.create_task(render(document, name)))
+
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    yield line(task.result())
+
+            yield json.dumps({"summary": {
+                "batch_id": batch_id,
+                **counts,
+                "seconds": round(time.perf_counter() - started, 4)
+            }}) + "\n"
+        finally:
+            # The client went away: drop renders that have not started
+            for task in pending:
+                task.cancel()
+
+    background_tasks.add_task(cleanup_job_files, batch_id, delay=3600)
+    return _DuplexStreamingResponse(stream(), body_read, media_type="application/x-ndjson")
+
+
 @app.post("/send-email", response_model=APIResponse)
 async def send_email(request: SendEmailRequest, files: List[UploadFile] = File(...)):
     """
@@ -219,7 +1091,7 @@ async def send_email(request: SendEmailRequest, files: List[UploadFile] = File(.
 
         # Save uploaded files
         for file in files:
-            file_path = temp_dir / file.filename
+            file_path = temp_dir / (Path(file.filename or "").name.lstrip(".") or "attachment")
             with open(file_path, 'wb') as f:
                 content = await file.read()
                 f.write(content)
@@ -244,7 +1116,7 @@ async def send_email(request: SendEmailRequest, files: List[UploadFile] = File(.
 
         # Send email using BARQUE core
         sender = EmailSender(email_config)
-        result = sender.send(message)
+        result = await email_pool.run(sender.send, message)
 
         # Cleanup
         shutil.rmtree(temp_dir, ignore_errors=True)
@@ -273,29 +1145,19 @@ async def generate_and_send(request: GenerateAndSendRequest, background_tasks: B
     Combines /generate and /send-email into single operation
     """
     try:
-        # Create temporary file for markdown
-        temp_dir = Path(tempfile.mkdtemp())
         job_id = str(uuid.uuid4())[:8]
-        md_file = temp_dir / f"document-{job_id}.md"
-
-        # Write markdown content
-        md_file.write_text(request.markdown_content, encoding='utf-8')
-
-        # Generate PDF
-        config = BarqueConfig()
-        config.output_dir = temp_dir / "output"
-        generator = PDFGenerator(config)
+        filename = _default_name(request.markdown_content)
 
-        gen_result = generator.generate(
-            input_file=md_file,
-            theme=request.theme.value
+        # Render in memory on the render pool
+        gen_result = await render_document(
+            request.markdown_content, request.theme.value, filename
         )
 
         if not gen_result.success:
             raise HTTPException(status_code=500, detail=gen_result.error)
 
-        # Prepare email
-        pdf_files = [Path(f) for f in gen_result.files]
+        # Prepare email (the pop CLI attaches files by path)
+        pdf_files = list(write_job_files(job_id, filename, gen_result).values())
         subject = request.subject or f"Report: {gen_result.metadata.get('title', 'Document')}"
 
         # Configure email
@@ -306,16 +1168,19 @@ async def generate_and_send(request: GenerateAndSendRequest, background_tasks: B
 
         # Send email
         sender = EmailSender(email_config)
-        email_result = sender.send_pdf_report(
-            to=request.to,
-            subject=subject,
-            pdf_files=pdf_files,
-            body_template=request.body,
-            from_email=request.from_email
+        email_result = await email_pool.run(
+            functools.partial(
+                sender.send_pdf_report,
+                to=request.to,
+                subject=subject,
+                pdf_files=pdf_files,
+                body_template=request.body,
+                from_email=request.from_email
+            )
         )
 
         # Schedule cleanup
-        background_tasks.add_task(cleanup_temp_dir, temp_dir, delay=600)
+        background_tasks.add_task(cleanup_job_files, job_id, delay=600)
 
         if not email_result.success:
             raise HTTPException(status_code=500, detail=email_result.error)
@@ -327,7 +1192,8 @@ async def generate_and_send(request: GenerateAndSendRequest, background_tasks: B
                 "job_id": job_id,
                 "recipients": email_result.recipients,
                 "pdf_files": [f.name for f in pdf_files],
-                "metadata": gen_result.metadata
+                "metadata": gen_result.metadata,
+                "usage": gen_result.usage.to_dict()
             }
         )
 
@@ -335,36 +1201,143 @@ async def generate_and_send(request: GenerateAndSendRequest, background_tasks: B
         raise HTTPException(status_code=500, detail=str(e))
 
 
-@app.get("/download/{job_id}/{filename}")
+@app.post("/jobs", response_model=APIResponse, status_code=202)
+async def submit_job(request: JobRequest):
+    """
+    Queue a render (and optional email) job
+
+    Returns at once with the job id; poll /jobs/{job_id} or stream
+    /jobs/{job_id}/events for progress. Answers 429 when the queue is full.
+    """
+    job = job_queue.submit(request)
+    if job is None:
+        raise HTTPException(
+            status_code=429,
+            detail=f"Job queue full ({job_queue.capacity} pending jobs)",
+            headers={"Retry-After": "5"}
+        )
+
+    return APIResponse(
+        success=True,
+        message="Job queued",
+        data=job.to_dict()
+    )
+
+
+@app.get("/jobs/{job_id}", response_model=APIResponse)
+async def get_job(job_id: str):
+    """Get a job's status, timings and (once rendered) file links"""
+    job = job_queue.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+
+    return APIResponse(
+        success=job.status != "failed",
+        message=f"Job {job.status}",
+        data=job.to_dict(),
+        error=job.error
+    )
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    """
+    Stream a job's progress as server-sent events
+
+    Replays the events so far, then sends each new one until the job is done
+    or failed. Each event is named after the job status and carries JSON data.
+    """
+    job = job_queue.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+
+    async def stream() -> AsyncIterator[str]:
+        sent = 0
+        while True:
+            changed = job.changed
+            for event in job.events[sent:]:
+                yield f"event: {event['status']}\ndata: {json.dumps(event)}\n\n"
+            sent = len(job.events)
+            if job.terminal:
+                return
+            try:
+                await asyncio.wait_for(changed.wait(), timeout=15)
+            except asyncio.TimeoutError:
+                # Keep proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.api_route("/download/{job_id}/{filename}", methods=["GET", "HEAD"])
 async def download_file(job_id: str, filename: str):
     """
     Download generated PDF file
 
+    Supports If-None-Match and Range requests.
     Note: Files are temporarily available after generation
     """
-    # In production, use proper file storage (S3, etc.)
-    temp_base = Path(tempfile.gettempdir())
-    file_path = temp_base / job_id / "output" / filename
-
-    if not file_path.exists():
+    stored = downloads.get(job_id, filename)
+    if stored is None or not stored.path.is_file():
         raise HTTPException(status_code=404, detail="File not found or expired")
 
+    return PDFFileResponse(stored, filename=filename)
+
+
+@app.get("/search", response_model=APIResponse)
+async def search_documents(
+    q: str = Query(..., min_length=1, description="Words to search for (all must match)"),
+    limit: int = Query(10, ge=1, le=100, description="Maximum number of results")
+):
+    """
+    Search documents generated by batch runs
+
+    Returns ranked hits with highlighted snippets and PDF download URLs
+    """
+    hits = await asyncio.to_thread(_search_library, q, limit)
+    if hits is None:
+        raise HTTPException(status_code=404, detail="No search index available")
+
+    for hit in hits:
+        hit["urls"] = {
+            theme: f"/documents/{pdf}" for theme, pdf in hit.pop("pdf_files").items() if pdf
+        }
+        hit.pop("file", None)
+
+    return APIResponse(
+        success=True,
+        message=f"{len(hits)} matching documents",
+        data={"query": q, "results": hits}
+    )
+
+
+@app.get("/documents/{path:path}")
+async def download_document(path: str):
+    """Download a PDF from the batch output directory"""
+    root = library_dir().resolve()
+    file_path = (root / path).resolve()
+
+    if file_path.suffix != ".pdf" or not file_path.is_relative_to(root) or not file_path.is_file():
+        raise HTTPException(status_code=404, detail="File not found")
+
     return FileResponse(
         path=file_path,
-        filename=filename,
+        filename=file_path.name,
         media_type="application/pdf"
     )
 
 
 # Helper functions
-async def cleanup_temp_dir(directory: Path, delay: int = 0):
-    """Cleanup temporary directory after delay"""
-    import asyncio
+async def cleanup_job_files(job_id: str, delay: int = 0):
+    """Delete a job's downloadable files after delay"""
     if delay > 0:
         await asyncio.sleep(delay)
 
-    if directory.exists():
-        shutil.rmtree(directory, ignore_errors=True)
+    downloads.remove(job_id)
 
 
 # Exception handlers
@@ -52,9 +52,13 @@ setup(
             "ruff>=0.1",
             "mypy>=1.0",
         ],
+        "analytics": [
+            "pyarrow>=12.0",     # Parquet / Arrow metadata export
+        ],
         "all": [
             "weasyprint>=58.0",  # For advanced PDF rendering
             "pillow>=9.0",       # For image processing
+            "pyarrow>=12.0",
         ]
     },
     entry_points={
@@ -0,0 +1,52 @@
+"""Tests for corpus analytics and metadata export"""
+
+import csv
+
+import pytest
+
+from barque.core import analytics
+from barque.core.store import EXPORT_COLUMNS, MetadataStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = MetadataStore(tmp_path / "metadata.db")
+    store.put({"name": "alpha", "title": "Alpha", "file_size": 300, "word_count": 30,
+               "has_math": True, "modified": "2026-01-02T03:04:05"}, render_seconds=2.0)
+    store.put({"name": "beta", "title": "Beta", "file_size": 100, "word_count": 10},
+              render_seconds=0.5)
+    store.flush()
+    yield store
+    store.close()
+
+
+def test_export_csv(store, tmp_path):
+    written, fmt = analytics.export_metadata(store, tmp_path / "export.csv")
+    assert (written, fmt) == (tmp_path / "export.csv", "csv")
+
+    with open(written, newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    assert list(rows[0]) == [name for name, _ in EXPORT_COLUMNS]
+    assert [row["name"] for row in rows] == ["alpha", "beta"]
+    assert rows[0]["word_count"] == "30"
+    assert rows[0]["render_seconds"] == "2.0"
+
+
+def test_export_falls_back_to_csv_without_pyarrow(store, tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(analytics, "pyarrow", None)
+    written, fmt = analytics.export_metadata(store, tmp_path / "export.parquet")
+
+    assert analytics.export_format(tmp_path / "export.parquet") == "parquet"
+    assert (written, fmt) == (tmp_path / "export.csv", "csv")
+    assert written.exists()
+    assert capsys.readouterr().out == ""
+
+
+def test_corpus_stats(store):
+    stats = analytics.corpus_stats(store, top=1)
+    assert stats["documents"] == 2
+    assert stats["words"] == 40
+    assert stats["size_bytes"] == 400
+    assert stats["with_math"] == 1
+    assert [doc["name"] for doc in stats["largest"]] == ["alpha"]
+    assert [doc["name"] for doc in stats["slowest"]] == ["alpha"]
@@ -0,0 +1,124 @@
+"""Tests for the render caches"""
+
+import os
+
+import pytest
+
+from barque.core.cache import RenderCache, ResultCache
+from barque.core.config import BarqueConfig
+from barque.core.generator import PDFGenerator
+
+
+@pytest.fixture
+def source(tmp_path):
+    (tmp_path / "doc.md").write_text("# Doc\n\n![Figure](figure.png)\n", encoding="utf-8")
+    (tmp_path / "figure.png").write_bytes(b"\x89PNG one")
+    (tmp_path / "light.css").write_text("body { color: black; }", encoding="utf-8")
+    return tmp_path
+
+
+def test_key_is_stable(source):
+    cache = RenderCache(source / "cache")
+    args = ["--toc", "--metadata=title:doc"]
+    assert cache.key(source / "doc.md", source / "light.css", args) == \
+        cache.key(source / "doc.md", source / "light.css", list(args))
+
+
+@pytest.mark.parametrize("change", ["markdown", "image", "css", "args"])
+def test_key_changes_with_every_input(source, change):
+    cache = RenderCache(source / "cache")
+    args = ["--toc"]
+    before = cache.key(source / "doc.md", source / "light.css", args)
+
+    if change == "markdown":
+        (source / "doc.md").write_text("# Doc\n\nEdited.\n", encoding="utf-8")
+    elif change == "image":
+        (source / "figure.png").write_bytes(b"\x89PNG two")
+    elif change == "css":
+        (source / "light.css").write_text("body { color: navy; }", encoding="utf-8")
+    else:
+        args = ["--toc", "--number-sections"]
+
+    assert cache.key(source / "doc.md", source / "light.css", args) != before
+
+
+def test_store_and_fetch(source):
+    cache = RenderCache(source / "cache")
+    key = cache.key(source / "doc.md", source / "light.css", [])
+    output = source / "out" / "doc-light.pdf"
+    assert not cache.fetch(key, output)
+
+    rendered = source / "rendered.pdf"
+    rendered.write_bytes(b"%PDF-1.7 rendered")
+    cache.store(key, rendered)
+    rendered.unlink()
+
+    assert cache.fetch(key, output)
+    assert output.read_bytes() == b"%PDF-1.7 rendered"
+    # Fetching again replaces the previous output
+    assert cache.fetch(key, output)
+    assert output.read_bytes() == b"%PDF-1.7 rendered"
+
+
+@pytest.mark.parametrize("enabled", [True, False])
+def test_generator_honors_cache_enabled(tmp_path, enabled):
+    config = BarqueConfig(output_dir=tmp_path / "out", cache_enabled=enabled)
+    assert (PDFGenerator(config).render_cache is not None) is enabled
+
+
+def test_result_cache_round_trip(tmp_path):
+    cache = ResultCache(tmp_path, max_bytes=1 << 20)
+    assert cache.get("ab12") is None
+    cache.put("ab12", b"%PDF one", {"pages": 3})
+    assert cache.get("ab12") == (b"%PDF one", {"pages": 3})
+
+    stats = cache.stats()
+    assert (stats["entries"], stats["hits"], stats["misses"]) == (1, 1, 1)
+    assert stats["hit_ratio"] == 0.5
+
+
+def test_result_cache_evicts_least_recently_used(tmp_path):
+    pdf = b"x" * 100
+    entry_size = len(pdf) + len(b"{}")
+    cache = ResultCache(tmp_path, max_bytes=3 * entry_size)
+    for key in ("aa", "bb", "cc"):
+        cache.put(key, pdf, {})
+
+    assert cache.get("aa") is not None  # aa is now the most recently used
+    cache.put("dd", pdf, {})
+
+    assert cache.get("bb") is None
+    assert all(cache.get(key) is not None for key in ("aa", "cc", "dd"))
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["bytes"] <= cache.max_bytes
+
+
+def test_result_cache_skips_entries_larger_than_the_cap(tmp_path):
+    cache = ResultCache(tmp_path, max_bytes=10)
+    cache.put("aa", b"x" * 100, {})
+    assert cache.get("aa") is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_result_cache_order_survives_restart(tmp_path):
+    pdf = b"x" * 100
+    entry_size = len(pdf) + len(b"{}")
+    cache = ResultCache(tmp_path, max_bytes=2 * entry_size)
+    cache.put("aa", pdf, {})
+    cache.put("bb", pdf, {})
+    # Recency is mirrored in mtimes, which need not be finer than a second
+    os.utime(cache._files("aa")[0], (1, 1))
+
+    reopened = ResultCache(tmp_path, max_bytes=2 * entry_size)
+    assert reopened.stats()["entries"] == 2
+    reopened.put("cc", pdf, {})
+    assert reopened.get("aa") is None
+    assert reopened.get("bb") is not None
+
+
+def test_result_cache_damaged_entry_is_a_miss(tmp_path):
+    cache = ResultCache(tmp_path, max_bytes=1 << 20)
+    cache.put("aa", b"%PDF", {})
+    cache._files("aa")[1].write_text("{damaged", encoding="utf-8")
+    assert cache.get("aa") is None
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,94 @@
+"""Tests for the command-line interface"""
+
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from barque.cli.commands import main
+from barque.core.store import MetadataStore
+
+
+@pytest.fixture
+def runner(tmp_path, monkeypatch):
+    # Keep BarqueConfig.load() away from the repository's own .barque/config.yaml
+    monkeypatch.chdir(tmp_path)
+    return CliRunner()
+
+
+@pytest.fixture
+def docs(tmp_path):
+    docs = tmp_path / "docs"
+    docs.mkdir()
+    (docs / "harbour.md").write_text(
+        "# Harbour Guide\n\nMooring at the harbour wall.\n", encoding="utf-8"
+    )
+    (docs / "tides.md").write_text("# Tides\n\nHigh water twice a day.\n", encoding="utf-8")
+    return docs
+
+
+def test_scan_records_documents(runner, docs, tmp_path):
+    output = tmp_path / "out"
+    result = runner.invoke(main, ["scan", str(docs), "--output", str(output), "--workers", "1"])
+    assert result.exit_code == 0, result.output
+    assert "Scanned: 2" in result.output
+    assert "Documents in store: 2" in result.output
+
+    rescan = runner.invoke(main, ["scan", str(docs), "--output", str(output), "--workers", "1"])
+    assert "Unchanged: 2" in rescan.output
+
+
+def test_stats_reports_scanned_corpus(runner, docs, tmp_path):
+    output = tmp_path / "out"
+    runner.invoke(main, ["scan", str(docs), "--output", str(output), "--workers", "1"])
+
+    result = runner.invoke(main, ["stats", "--output", str(output), "--json"])
+    assert result.exit_code == 0, result.output
+    corpus = json.loads(result.output)
+    assert corpus["documents"] == 2
+    assert corpus["words"] > 0
+
+
+def test_stats_without_metadata(runner, tmp_path):
+    result = runner.invoke(main, ["stats", "--output", str(tmp_path / "out")])
+    assert result.exit_code == 0
+    assert "No metadata" in result.output
+
+
+def test_search_lists_ranked_hits(runner, tmp_path):
+    output = tmp_path / "out"
+    store = MetadataStore(output / "metadata" / "metadata.db")
+    store.put(
+        {"name": "harbour", "title": "Harbour Guide",
+         "pdf_files": {"light": "light/harbour-light.pdf", "dark": None}},
+        text="# Harbour Guide\n\nMooring at the harbour wall."
+    )
+    store.close()
+
+    result = runner.invoke(main, ["search", "mooring", "--output", str(output)])
+    assert result.exit_code == 0, result.output
+    assert "1. Harbour Guide" in result.output
+    assert f"light: {output / 'light/harbour-light.pdf'}" in result.output
+
+    result = runner.invoke(main, ["search", "anchor", "--output", str(output)])
+    assert "No matching documents." in result.output
+
+
+def test_search_without_index(runner, tmp_path):
+    result = runner.invoke(main, ["search", "harbour", "--output", str(tmp_path / "out")])
+    assert result.exit_code == 0
+    assert "No search index" in result.output
+
+
+def test_clean_removes_every_index_format(runner, tmp_path):
+    output = tmp_path / "out"
+    (output / "light").mkdir(parents=True)
+    (output / ".cache").mkdir()
+    for name in ("INDEX.md", "index.json", "index.html", ".cache/index.json", ".cache/render"):
+        (output / name).write_text("x", encoding="utf-8")
+
+    result = runner.invoke(main, ["clean", "--output", str(output)], input="y\n")
+    assert result.exit_code == 0, result.output
+    assert sorted(path.relative_to(output).as_posix() for path in output.rglob("*")) == [
+        ".cache", ".cache/render"
+    ]
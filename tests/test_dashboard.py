@@ -0,0 +1,65 @@
+"""Tests for the batch progress dashboard"""
+
+from barque.cli.dashboard import BatchDashboard, percentile
+from barque.core.generator import GenerationResult
+from barque.core.usage import StageUsage
+
+
+def result(duration, worker="worker_0", success=True, skipped=False, source="docs/a.md"):
+    return GenerationResult(
+        success=success, files=[], skipped=skipped, source=source,
+        duration=duration, worker=None if skipped else worker
+    )
+
+
+def test_percentile():
+    values = [0.4, 0.1, 0.3, 0.2]
+    assert percentile(values, 0.50) == 0.2
+    assert percentile(values, 0.95) == 0.4
+    assert percentile([], 0.5) == 0.0
+
+
+def test_dashboard_counts_and_latencies(capsys):
+    dashboard = BatchDashboard(total=4, workers=2, interactive=False)
+    dashboard.update(result(1.0, "worker_0"))
+    dashboard.update(result(3.0, "worker_1", source="docs/slow.md"))
+    dashboard.update(result(0.0, skipped=True))
+    dashboard.update(result(2.0, "worker_1", success=False))
+
+    assert (dashboard.done, dashboard.skipped, dashboard.failed) == (4, 1, 1)
+    # Skipped documents never reached a worker
+    assert sorted(dashboard.latencies) == [1.0, 2.0, 3.0]
+    assert dashboard.worker_stats["worker_1"].done == 2
+    assert dashboard.worker_stats["worker_1"].busy == 5.0
+    assert dashboard.slowest[0].source == "docs/slow.md"
+
+    # Redirected output gets plain progress lines, drawn at least on the last document
+    output = capsys.readouterr().out
+    assert "4/4 docs" in output
+    assert "errors 1" in output
+    assert "\x1b[" not in output
+
+    dashboard.finish()
+    output = capsys.readouterr().out
+    assert "p50 2.00s" in output
+    assert "slow.md" in output
+
+
+def test_dashboard_sums_stages_and_output(capsys):
+    dashboard = BatchDashboard(total=2, workers=1, interactive=False)
+    for rss in (50 << 20, 80 << 20):
+        measured = result(1.0)
+        measured.usage.stages["pandoc"] = StageUsage(wall=0.4, cpu=0.3, calls=1)
+        measured.usage.peak_rss = rss
+        measured.output_bytes = {"light": 1000, "dark": 1500}
+        measured.pages = {"light": 3, "dark": 3}
+        dashboard.update(measured)
+
+    assert dashboard.stages["pandoc"].calls == 2
+    assert dashboard.peak_rss == 80 << 20
+    assert (dashboard.output_files, dashboard.output_bytes, dashboard.pages) == (4, 5000, 12)
+
+    dashboard.finish()
+    output = capsys.readouterr().out
+    assert "Peak child RSS" in output
+    assert "Output: 4 PDFs" in output and "12 pages" in output
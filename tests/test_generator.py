@@ -0,0 +1,217 @@
+"""Tests for PDF generation"""
+
+import shutil
+import threading
+from pathlib import Path
+
+import pytest
+
+from barque.core.config import BarqueConfig
+from barque.core.generator import GenerationResult, PDFGenerator, _BatchDedupe
+from barque.core.manifest import BuildManifest
+
+needs_toolchain = pytest.mark.skipif(
+    shutil.which("pandoc") is None or shutil.which("weasyprint") is None,
+    reason="pandoc and weasyprint are required to render"
+)
+
+TEXT = "# Notes\n\nThe same words in every copy.\n"
+
+
+def write(path, text=TEXT):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def test_dedupe_key_is_content_and_name(tmp_path):
+    first = write(tmp_path / "a" / "notes.md")
+    copy = write(tmp_path / "b" / "notes.md")
+    renamed = write(tmp_path / "c" / "other.md")
+    edited = write(tmp_path / "d" / "notes.md", TEXT + "\nMore.\n")
+
+    key = _BatchDedupe._key
+    assert key(first) == key(copy)
+    assert key(first) != key(renamed)
+    assert key(first) != key(edited)
+
+
+def test_dedupe_holds_back_copies_until_original_completes(tmp_path):
+    first = write(tmp_path / "a" / "notes.md")
+    copy = write(tmp_path / "b" / "notes.md")
+    other = write(tmp_path / "c" / "other.md")
+
+    dedupe = _BatchDedupe()
+    assert list(dedupe.unique([first, copy, other])) == [first, other]
+
+    original = GenerationResult(success=True, files=["notes.pdf"], source=str(first))
+    assert dedupe.complete(original) == [(copy, dedupe.finished[_BatchDedupe._key(first)])]
+    assert dedupe.complete() == []
+
+
+def test_dedupe_key_reuses_manifest_hash_for_unchanged_sources(tmp_path, monkeypatch):
+    first = write(tmp_path / "a" / "notes.md")
+    copy = write(tmp_path / "b" / "notes.md")
+    manifest = BuildManifest(tmp_path / "manifest.json")
+    for source in (first, copy):
+        manifest.record(source, manifest.inspect(source), {}, {}, tmp_path / "notes.json")
+
+    def read_bytes(self):
+        raise AssertionError(f"{self} was re-read")
+
+    monkeypatch.setattr(Path, "read_bytes", read_bytes)
+    key = _BatchDedupe._key
+    assert key(first, manifest) == key(copy, manifest)
+
+
+def test_deduplication_is_opt_in():
+    assert BarqueConfig().deduplicate is False
+    assert BarqueConfig._from_dict({}).deduplicate is False
+
+
+@needs_toolchain
+def test_copy_keeps_original_metadata_record(tmp_path):
+    first = write(tmp_path / "src" / "a" / "notes.md")
+    copy = write(tmp_path / "src" / "b" / "notes.md")
+    other = write(tmp_path / "src" / "c" / "other.md")
+
+    config = BarqueConfig(
+        output_dir=tmp_path / "out", workers=1, renderer="subprocess", deduplicate=True
+    )
+    generator = PDFGenerator(config)
+    results = {
+        result.source: result
+        for result in generator.iter_generate([first, copy, other], theme="light")
+    }
+
+    assert all(result.success for result in results.values())
+    assert results[str(copy)].duplicate_of == str(first)
+    assert results[str(other)].duplicate_of is None
+    assert generator.metadata_store.get("notes")["file"] == str(first)
+    assert generator.metadata_store.get("other")["file"] == str(other)
+
+
+def test_weasyprint_stylesheet_is_parsed_once_per_file(tmp_path):
+    from barque.core import generator
+
+    parsed = []
+
+    class FakeWeasyPrint:
+        @staticmethod
+        def CSS(string, font_config):
+            parsed.append(string)
+            return string
+
+    renderer = generator.WeasyPrintRenderer.__new__(generator.WeasyPrintRenderer)
+    renderer._weasyprint = FakeWeasyPrint
+    renderer._font_configuration = object
+    renderer._local = threading.local()
+
+    css_file = write(tmp_path / "light-0123.css", "body { color: black; }")
+    assert renderer._stylesheet(css_file)[1] == "body { color: black; }"
+    css_file.unlink()
+    assert renderer._stylesheet(css_file)[1] == "body { color: black; }"
+    assert len(parsed) == 1
+
+
+def test_renderer_fallback_reason(monkeypatch):
+    from barque.core import generator
+
+    def unavailable():
+        raise OSError("cannot load library 'pango'")
+
+    monkeypatch.setattr(generator, "WeasyPrintRenderer", unavailable)
+    renderer = generator.create_renderer("weasyprint")
+    assert renderer.name == "subprocess"
+    assert "pango" in renderer.fallback_reason
+    assert generator.create_renderer("subprocess").fallback_reason is None
+
+
+def test_scan_extracts_only_changed_files(tmp_path):
+    docs = tmp_path / "docs"
+    for name in ("one", "two", "three"):
+        write(docs / f"{name}.md", f"# {name.title()}\n\nText.\n")
+    generator = PDFGenerator(BarqueConfig(output_dir=tmp_path / "out", workers=2))
+
+    first = generator.scan(docs)
+    assert (first.files, first.scanned, first.cached, first.errors) == (3, 3, 0, [])
+    assert generator.metadata_store.get("two")["title"] == "Two"
+
+    again = generator.scan(docs)
+    assert (again.scanned, again.cached) == (0, 3)
+
+    write(docs / "two.md", "# Second\n\nLonger text than before.\n")
+    changed = generator.scan(docs)
+    assert (changed.scanned, changed.cached) == (1, 2)
+    assert generator.metadata_store.get("two")["title"] == "Second"
+
+
+@needs_toolchain
+def test_scan_after_generate_keeps_pdf_links(tmp_path):
+    docs = tmp_path / "docs"
+    source = write(docs / "notes.md")
+    config = BarqueConfig(output_dir=tmp_path / "out", workers=1, renderer="subprocess")
+    generator = PDFGenerator(config)
+    assert generator.generate(source, theme="light").success
+    generator.metadata_store.flush()
+
+    write(docs / "notes.md", TEXT + "\nScanned after rendering.\n")
+    assert generator.scan(docs).scanned == 1
+    metadata = generator.metadata_store.get("notes")
+    assert metadata["word_count"] > 6
+    assert metadata["pdf_files"] == {"light": "light/notes-light.pdf", "dark": None}
+
+
+def test_scan_reports_unreadable_files(tmp_path):
+    docs = tmp_path / "docs"
+    write(docs / "good.md")
+    (docs / "bad.md").write_bytes(b"# Bad \xff\xfe\n")
+    generator = PDFGenerator(BarqueConfig(output_dir=tmp_path / "out", workers=1))
+
+    result = generator.scan(docs)
+    assert result.scanned == 1
+    assert [path for path, _ in result.errors] == [str(docs / "bad.md")]
+
+
+def instant_build(md_file, theme, output_dir):
+    """Stand-in for PDFGenerator._build that renders nothing"""
+    return GenerationResult(success=True, files=[], source=str(md_file))
+
+
+def test_iter_generate_bounds_work_in_flight(tmp_path, monkeypatch):
+    generator = PDFGenerator(BarqueConfig(output_dir=tmp_path / "out", deduplicate=False))
+    pulled = []
+    in_flight_at_result = []
+
+    def paths():
+        for index in range(20):
+            pulled.append(index)
+            yield tmp_path / f"doc{index}.md"
+
+    monkeypatch.setattr(generator, "_build", instant_build)
+    results = []
+    for result in generator.iter_generate(paths(), workers=2, max_in_flight=4):
+        in_flight_at_result.append(len(pulled) - len(results))
+        results.append(result)
+
+    assert sorted(result.source for result in results) == sorted(
+        str(tmp_path / f"doc{index}.md") for index in range(20)
+    )
+    # Never more than max_in_flight outstanding, plus the path being submitted
+    assert max(in_flight_at_result) <= 5
+
+
+def test_iter_generate_stops_pulling_when_consumer_stops(tmp_path, monkeypatch):
+    generator = PDFGenerator(BarqueConfig(output_dir=tmp_path / "out", deduplicate=False))
+    pulled = []
+
+    def paths():
+        for index in range(1000):
+            pulled.append(index)
+            yield tmp_path / f"doc{index}.md"
+
+    monkeypatch.setattr(generator, "_build", instant_build)
+    stream = generator.iter_generate(paths(), workers=2, max_in_flight=4)
+    next(stream)
+    stream.close()
+    assert len(pulled) <= 5
@@ -0,0 +1,68 @@
+"""Tests for the streaming index builder"""
+
+import json
+
+import pytest
+
+from barque.core.index import IndexBuilder
+from barque.core.store import MetadataStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = MetadataStore(tmp_path / "metadata.db")
+    yield store
+    store.close()
+
+
+def builder(tmp_path, store, formats=("md", "json", "html")):
+    return IndexBuilder(tmp_path, store, "Atlas", list(formats))
+
+
+@pytest.mark.parametrize("documents", [0, 3])
+def test_json_index_is_valid(tmp_path, store, documents):
+    for index in range(documents):
+        store.put({"name": f"doc{index}", "title": f"Doc <{index}>", "word_count": 10})
+    store.flush()
+
+    outputs = builder(tmp_path, store).build()
+    data = json.loads(outputs["json"].read_text(encoding="utf-8"))
+    assert data["project"] == "Atlas"
+    assert data["statistics"]["documents"] == documents
+    assert sorted(doc["name"] for doc in data["documents"]) == [f"doc{i}" for i in range(documents)]
+
+    markdown = outputs["md"].read_text(encoding="utf-8")
+    html = outputs["html"].read_text(encoding="utf-8")
+    assert "<0>" not in html
+    if documents:
+        assert "Doc <0>" in markdown
+        assert "Doc &lt;0&gt;" in html
+
+
+def test_index_rebuilds_only_when_something_changed(tmp_path, store):
+    store.put({"name": "alpha", "title": "Alpha"})
+    store.flush()
+    builder(tmp_path, store).build()
+
+    unchanged = builder(tmp_path, store)
+    unchanged.build()
+    assert not unchanged.rebuilt
+
+    store.put({"name": "beta", "title": "Beta"})
+    store.flush()
+    changed = builder(tmp_path, store)
+    changed.build()
+    assert changed.rebuilt
+
+    (tmp_path / "index.html").unlink()
+    missing = builder(tmp_path, store)
+    missing.build()
+    assert missing.rebuilt
+
+    fewer_formats = builder(tmp_path, store, formats=("md",))
+    fewer_formats.build()
+    assert fewer_formats.rebuilt
+
+    forced = builder(tmp_path, store, formats=("md",))
+    forced.build(force=True)
+    assert forced.rebuilt
@@ -0,0 +1,115 @@
+"""Tests for the incremental build manifest"""
+
+import os
+
+import pytest
+
+from barque.core.manifest import BuildManifest
+
+
+@pytest.fixture
+def project(tmp_path):
+    source = tmp_path / "docs" / "guide.md"
+    source.parent.mkdir()
+    source.write_text("# Guide\n\n![Map](map.png)\n", encoding="utf-8")
+    (source.parent / "map.png").write_bytes(b"\x89PNG map")
+
+    output = tmp_path / "out"
+    output.mkdir()
+    outputs = {"light": output / "guide-light.pdf", "dark": output / "guide-dark.pdf"}
+    for pdf in outputs.values():
+        pdf.write_bytes(b"%PDF")
+    metadata_file = output / "guide.json"
+    metadata_file.write_text("{}", encoding="utf-8")
+    return source, outputs, metadata_file
+
+
+FINGERPRINTS = {"light": "l1", "dark": "d1"}
+
+
+def built(tmp_path, project):
+    source, outputs, metadata_file = project
+    manifest = BuildManifest(tmp_path / "manifest.json")
+    manifest.record(source, manifest.inspect(source), outputs, FINGERPRINTS, metadata_file)
+    return manifest
+
+
+def stale(manifest, project, fingerprints=FINGERPRINTS):
+    source, outputs, metadata_file = project
+    return manifest.stale_themes(
+        source, manifest.inspect(source), outputs, fingerprints, metadata_file
+    )
+
+
+def test_unknown_source_is_stale(tmp_path, project):
+    manifest = BuildManifest(tmp_path / "manifest.json")
+    assert stale(manifest, project) == ["light", "dark"]
+
+
+def test_unchanged_source_is_fresh_after_reload(tmp_path, project):
+    built(tmp_path, project).save()
+    assert stale(BuildManifest.load(tmp_path / "manifest.json"), project) == []
+
+
+def test_touched_but_identical_source_is_fresh(tmp_path, project):
+    manifest = built(tmp_path, project)
+    source = project[0]
+    os.utime(source, ns=(0, source.stat().st_mtime_ns + 10**9))
+    assert stale(manifest, project) == []
+
+
+def test_edited_source_is_stale(tmp_path, project):
+    manifest = built(tmp_path, project)
+    project[0].write_text("# Guide\n\nRewritten.\n", encoding="utf-8")
+    assert stale(manifest, project) == ["light", "dark"]
+
+
+def test_changed_image_is_stale(tmp_path, project):
+    manifest = built(tmp_path, project)
+    (project[0].parent / "map.png").write_bytes(b"\x89PNG new map, larger")
+    assert stale(manifest, project) == ["light", "dark"]
+
+
+def test_missing_output_or_new_fingerprint_rebuilds_that_theme(tmp_path, project):
+    manifest = built(tmp_path, project)
+    project[1]["dark"].unlink()
+    assert stale(manifest, project) == ["dark"]
+    assert stale(manifest, project, {"light": "l2", "dark": "d1"}) == ["light", "dark"]
+
+
+def test_missing_metadata_is_stale(tmp_path, project):
+    manifest = built(tmp_path, project)
+    project[2].unlink()
+    assert stale(manifest, project) == ["light", "dark"]
+
+
+def test_unreadable_manifest_starts_full_build(tmp_path, project):
+    (tmp_path / "manifest.json").write_text("{not json", encoding="utf-8")
+    assert stale(BuildManifest.load(tmp_path / "manifest.json"), project) == ["light", "dark"]
+
+
+def test_prune_removes_outputs_of_deleted_sources(tmp_path, project):
+    manifest = built(tmp_path, project)
+    source, outputs, metadata_file = project
+    source.unlink()
+
+    assert manifest.prune(tmp_path / "elsewhere") == []
+    assert manifest.prune(source.parent) == [os.path.abspath(source)]
+    assert not any(pdf.exists() for pdf in outputs.values())
+    assert not metadata_file.exists()
+
+
+def test_prune_keeps_outputs_shared_with_a_live_source(tmp_path, project):
+    manifest = built(tmp_path, project)
+    source, outputs, metadata_file = project
+
+    # Same stem in another directory writes the same outputs
+    twin = tmp_path / "other" / "guide.md"
+    twin.parent.mkdir()
+    twin.write_text("# Guide\n", encoding="utf-8")
+    manifest.record(twin, manifest.inspect(twin), outputs, FINGERPRINTS, metadata_file)
+
+    source.unlink()
+    assert manifest.prune(tmp_path) == [os.path.abspath(source)]
+    assert all(pdf.exists() for pdf in outputs.values())
+    assert metadata_file.exists()
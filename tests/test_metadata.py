@@ -0,0 +1,74 @@
+"""Tests for markdown metadata extraction"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from barque.core.metadata import FRONTMATTER_LIMIT, MetadataExtractor, _load_frontmatter
+
+GOLDEN = Path(__file__).parent / "golden" / "metadata"
+
+# Output of the whole-file extractor the streaming scanner replaced, minus
+# the path and timestamps: frontmatter, headings, math and line-ending edge cases
+EXPECTED = json.loads((GOLDEN / "expected.json").read_text(encoding="utf-8"))
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 7, 64, MetadataExtractor.CHUNK_SIZE])
+@pytest.mark.parametrize("name", sorted(EXPECTED))
+def test_golden_corpus(name, chunk_size, monkeypatch):
+    monkeypatch.setattr(MetadataExtractor, "CHUNK_SIZE", chunk_size)
+    extractor = MetadataExtractor()
+    metadata = extractor.extract(GOLDEN / name)
+
+    assert metadata.pop("file") == str(GOLDEN / name)
+    metadata.pop("modified")
+    metadata.pop("created")
+    assert extractor._make_json_serializable(metadata) == EXPECTED[name]
+
+
+@pytest.mark.parametrize("name", sorted(EXPECTED))
+def test_extract_text_matches_extract(name):
+    extractor = MetadataExtractor()
+    path = GOLDEN / name
+    with open(path, encoding="utf-8") as f:
+        content = f.read()
+    from_file = extractor.extract(path)
+    from_text = extractor.extract_text(content, name=path.stem)
+
+    for key in ("title", "line_count", "word_count", "section_count", "code_blocks",
+                "links", "images", "has_math", "summary"):
+        assert from_text[key] == from_file[key], key
+
+
+def test_repeated_frontmatter_is_parsed_once(tmp_path):
+    frontmatter = "---\ntitle: Page\ntags: [a, b]\nlayout: post-unique-to-this-test\n---\n"
+    pages = []
+    for index in range(3):
+        page = tmp_path / f"page{index}.md"
+        page.write_text(frontmatter + f"\nBody {index}.\n", encoding="utf-8")
+        pages.append(page)
+
+    extractor = MetadataExtractor()
+    misses = _load_frontmatter.cache_info().misses
+    first, *rest = [extractor.extract(page) for page in pages]
+    assert _load_frontmatter.cache_info().misses == misses + 1
+
+    # Callers get independent copies of the cached value
+    first["tags"].append("c")
+    assert all(metadata["tags"] == ["a", "b"] for metadata in rest)
+
+
+@pytest.mark.parametrize("block", ["just a string", "- a\n- list"])
+def test_non_mapping_frontmatter_is_ignored(tmp_path, block):
+    source = tmp_path / "doc.md"
+    source.write_text(f"---\n{block}\n---\n\n# Heading\n", encoding="utf-8")
+    assert MetadataExtractor().extract(source)["title"] == "Heading"
+
+
+def test_frontmatter_must_close_within_limit(tmp_path):
+    source = tmp_path / "doc.md"
+    filler = "note: " + "x" * 70 + "\n"
+    body = filler * (FRONTMATTER_LIMIT // len(filler) + 1)
+    source.write_text(f"---\ntitle: Late\n{body}---\n\n# Heading\n", encoding="utf-8")
+    assert MetadataExtractor().extract(source)["title"] == "Heading"
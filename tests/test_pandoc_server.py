@@ -0,0 +1,80 @@
+"""Tests for the pandoc-server client"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from barque.core.pandoc_server import PandocServer, PandocServerError
+
+
+class FakePandoc(BaseHTTPRequestHandler):
+    """Answers like pandoc-server: upper-cases the text, or fails on request"""
+
+    def do_GET(self):
+        self.reply(200, b"3.9")
+
+    def do_POST(self):
+        options = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if options["text"] == "crash":
+            self.reply(500, b"internal error")
+        elif options["text"] == "bad":
+            self.reply(200, json.dumps({"error": "unknown reader"}).encode())
+        elif options["text"] == "garbage":
+            self.reply(200, b"<html>502 Bad Gateway</html>")
+        elif options["text"] == "shapeless":
+            self.reply(200, json.dumps({"result": "no output key"}).encode())
+        else:
+            self.reply(200, json.dumps({"output": options["text"].upper()}).encode())
+
+    def reply(self, status, body):
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def url():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), FakePandoc)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_external_server_converts(url):
+    server = PandocServer(url)
+    assert not server.managed
+    assert server.healthy()
+    assert server.convert({"text": "# hi", "from": "markdown", "to": "html5"}) == "# HI"
+
+
+@pytest.mark.parametrize("text", ["crash", "bad", "garbage", "shapeless"])
+def test_server_errors_are_raised(url, text):
+    with pytest.raises(PandocServerError):
+        PandocServer(url).convert({"text": text})
+
+
+def test_unreachable_external_server():
+    server = PandocServer("http://127.0.0.1:9")
+    assert not server.healthy()
+    with pytest.raises(PandocServerError):
+        server.convert({"text": "# hi"})
+
+
+def test_managed_server_that_cannot_start_fails_fast(monkeypatch):
+    server = PandocServer()
+    monkeypatch.setattr(PandocServer, "_command", staticmethod(lambda port: ["false"]))
+    with pytest.raises(PandocServerError):
+        server.convert({"text": "# hi"})
+
+    # Later conversions do not wait for another startup
+    monkeypatch.setattr(PandocServer, "_spawn", lambda self: pytest.fail("respawned"))
+    with pytest.raises(PandocServerError):
+        server.convert({"text": "# hi"})
@@ -0,0 +1,113 @@
+"""End-to-end rendering tests (need pandoc and weasyprint on PATH)"""
+
+import json
+import shutil
+import subprocess
+
+import pytest
+
+from barque.core.config import BarqueConfig
+from barque.core.generator import PDFGenerator
+from barque.core.metadata import MetadataExtractor
+
+pytestmark = pytest.mark.skipif(
+    shutil.which("pandoc") is None or shutil.which("weasyprint") is None,
+    reason="pandoc and weasyprint are required to render"
+)
+
+TRICKY = (
+    "# Pricing\n\n"
+    "```\n# not a heading\n```\n\n"
+    "It costs $5 or $10, see [the list](prices.md).\n\n"
+    "## Details\n"
+)
+
+
+def corpus(root, count=4):
+    root.mkdir()
+    for index in range(count):
+        (root / f"doc{index}.md").write_text(
+            f"# Document {index}\n\nParagraph {index}.\n", encoding="utf-8"
+        )
+    return root
+
+
+def generator(tmp_path, **settings):
+    settings.setdefault("renderer", "subprocess")
+    return PDFGenerator(BarqueConfig(output_dir=tmp_path / "out", **settings))
+
+
+def test_html_pipeline_renders_both_themes(tmp_path):
+    docs = corpus(tmp_path / "docs")
+    results = generator(tmp_path, pipeline="html", workers=2).batch_generate(docs)
+
+    assert len(results) == 4 and all(result.success for result in results)
+    for index in range(4):
+        for theme in ("light", "dark"):
+            pdf = tmp_path / "out" / theme / f"doc{index}-{theme}.pdf"
+            assert pdf.read_bytes().startswith(b"%PDF")
+
+
+def test_process_backend_matches_threads(tmp_path):
+    docs = corpus(tmp_path / "docs")
+    threads = generator(tmp_path / "threads", workers=2).batch_generate(docs, theme="light")
+    processes = generator(tmp_path / "processes", workers=2, backend="processes").batch_generate(
+        docs, theme="light"
+    )
+
+    def outcome(results):
+        return sorted((result.source, result.success, len(result.files)) for result in results)
+
+    assert outcome(processes) == outcome(threads)
+    assert all(result.success for result in processes)
+
+
+def test_render_markdown_in_memory(tmp_path):
+    pdf_generator = generator(tmp_path)
+    result = pdf_generator.render_markdown(TRICKY, theme="both", name="pricing")
+
+    assert result.success, result.error
+    assert set(result.pdf_data) == {"light", "dark"}
+    assert all(pdf.startswith(b"%PDF") for pdf in result.pdf_data.values())
+    assert result.metadata["name"] == "pricing"
+    assert not list((tmp_path / "out").glob("**/*.pdf"))
+
+
+def test_ast_metadata_ignores_code_and_prices(tmp_path):
+    source = tmp_path / "pricing.md"
+    source.write_text(TRICKY, encoding="utf-8")
+    ast = json.loads(subprocess.run(
+        ["pandoc", str(source), "--to", "json"], check=True, capture_output=True, text=True
+    ).stdout)
+
+    metadata = MetadataExtractor().extract_from_ast(ast, TRICKY, md_file=source)
+    assert metadata["title"] == "Pricing"
+    assert metadata["section_count"] == 2
+    assert metadata["code_blocks"] == 1
+    assert metadata["links"] == 1
+    assert metadata["has_math"] is False
+
+    # The regex scanner counts what the AST knows is not there
+    scanned = MetadataExtractor().extract(source)
+    assert scanned["section_count"] == 3
+    assert scanned["has_math"] is True
+
+
+def test_ast_metadata_source_in_builds(tmp_path):
+    source = tmp_path / "pricing.md"
+    source.write_text(TRICKY, encoding="utf-8")
+    result = generator(tmp_path, metadata_source="ast").generate(source, theme="light")
+
+    assert result.success, result.error
+    assert result.metadata["section_count"] == 2
+    assert result.metadata["has_math"] is False
+
+
+def test_unreachable_pandoc_server_falls_back_to_subprocess(tmp_path):
+    source = tmp_path / "doc.md"
+    source.write_text("# Doc\n\nText.\n", encoding="utf-8")
+    pdf_generator = generator(
+        tmp_path, converter="server", pandoc_server_url="http://127.0.0.1:9"
+    )
+    result = pdf_generator.generate(source, theme="light")
+    assert result.success, result.error
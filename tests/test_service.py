@@ -0,0 +1,387 @@
+"""Tests for the REST microservice"""
+
+import asyncio
+import io
+import json
+import sqlite3
+import threading
+import time
+import zipfile
+
+import pytest
+from fastapi.testclient import TestClient
+
+import barque_service
+from barque.core.cache import ResultCache
+from barque.core.generator import GenerationResult
+from barque.core.store import MetadataStore
+
+PDF = b"%PDF-1.4\n" + bytes(range(256)) * 8 + b"\n%%EOF\n"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def render_document(markdown, theme, name):
+        themes = ["light", "dark"] if theme == "both" else [theme]
+        return GenerationResult(
+            success=True, files=[], metadata={"name": name},
+            pdf_data={pdf_theme: PDF for pdf_theme in themes}
+        )
+
+    # Files stay downloadable until the test ends rather than for an hour
+    jobs = []
+
+    async def cleanup_job_files(job_id, delay=0):
+        jobs.append(job_id)
+
+    monkeypatch.setattr(barque_service, "render_document", render_document)
+    monkeypatch.setattr(barque_service, "cleanup_job_files", cleanup_job_files)
+    with TestClient(barque_service.app) as test_client:
+        yield test_client
+    for job_id in jobs:
+        barque_service.downloads.remove(job_id)
+
+
+@pytest.mark.parametrize("name, expected", [
+    ("../../../tmp/x", "tmp-x"),
+    ("/etc/passwd", "etc-passwd"),
+    ("..\\..\\x", "x"),
+    ("..", "document"),
+    ("q4-report", "q4-report"),
+])
+def test_batch_name_is_a_safe_stem(name, expected):
+    assert barque_service._batch_name(name) == expected
+
+
+def test_download_registry_rejects_paths(tmp_path):
+    registry = barque_service.DownloadRegistry()
+    for filename in ("../x.pdf", "a/b.pdf", "..", ""):
+        with pytest.raises(ValueError):
+            registry.add("job", filename, PDF)
+    registry.remove("job")
+
+
+def test_generate_keeps_client_filename_in_job_directory(client, monkeypatch):
+    written = []
+    add = barque_service.downloads.add
+
+    def record(job_id, filename, data):
+        stored = add(job_id, filename, data)
+        written.append(stored.path)
+        return stored
+
+    monkeypatch.setattr(barque_service.downloads, "add", record)
+    response = client.post(
+        "/generate",
+        json={"markdown_content": "# Hi", "theme": "light", "filename": "../../../tmp/x"}
+    )
+    assert response.status_code == 200
+    job_id = response.json()["data"]["job_id"]
+    assert [path.name for path in written] == ["tmp-x-light.pdf"]
+    assert written[0].parent == barque_service.downloads.dirs[job_id]
+
+
+def test_generate_pdf_serves_sanitized_name(client):
+    response = client.post(
+        "/generate/pdf",
+        json={"markdown_content": "# Hi", "theme": "dark", "filename": "../../etc/report"}
+    )
+    assert response.status_code == 200
+    assert response.headers["content-location"].endswith("/etc-report-dark.pdf")
+    assert response.content == PDF
+
+
+@pytest.fixture
+def download(client):
+    response = client.post("/generate", json={"markdown_content": "# Hi", "theme": "light"})
+    url = response.json()["data"]["files"][0]["url"]
+    return url, client.get(url).headers["etag"]
+
+
+def test_download_etag_not_modified(client, download):
+    url, etag = download
+    assert etag.startswith('"') and not etag.startswith('W/')
+
+    response = client.get(url, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    assert client.get(url, headers={"If-None-Match": '"other"'}).status_code == 200
+
+
+def test_download_range(client, download):
+    url, etag = download
+    response = client.get(url, headers={"Range": "bytes=10-19"})
+    assert response.status_code == 206
+    assert response.content == PDF[10:20]
+    assert response.headers["content-range"] == f"bytes 10-19/{len(PDF)}"
+
+    response = client.get(url, headers={"Range": "bytes=-5"})
+    assert response.content == PDF[-5:]
+
+    response = client.get(url, headers={"Range": "bytes=0-3", "If-Range": etag})
+    assert response.status_code == 206
+
+    response = client.get(url, headers={"Range": "bytes=0-3", "If-Range": '"stale"'})
+    assert response.status_code == 200
+    assert response.content == PDF
+
+    response = client.get(url, headers={"Range": f"bytes={len(PDF) + 10}-"})
+    assert response.status_code == 416
+
+
+def test_download_head(client, download):
+    url, etag = download
+    response = client.head(url)
+    assert response.status_code == 200
+    assert response.headers["content-length"] == str(len(PDF))
+    assert response.headers["accept-ranges"] == "bytes"
+    assert response.content == b""
+
+
+class FakeRenderPool:
+    """Render pool stand-in that records which themes were rendered"""
+
+    def __init__(self):
+        self.themes = []
+
+    async def run(self, fn, markdown, theme, name):
+        self.themes.append(theme)
+        await asyncio.sleep(0.01)
+        themes = ["light", "dark"] if theme == "both" else [theme]
+        return GenerationResult(
+            success=True, files=[], metadata={"name": name},
+            pdf_data={t: PDF + t.encode() for t in themes}, pages={t: 2 for t in themes}
+        )
+
+
+@pytest.fixture
+def render_pool(tmp_path, monkeypatch):
+    pool = FakeRenderPool()
+    monkeypatch.setattr(barque_service, "render_pool", pool)
+    monkeypatch.setattr(barque_service, "result_cache", ResultCache(tmp_path, 1 << 20))
+    monkeypatch.setattr(barque_service, "_render_fingerprint", lambda: "config")
+    return pool
+
+
+def render(theme, markdown="# Hi"):
+    return barque_service.render_document(markdown, theme, "doc")
+
+
+def test_render_document_reuses_cached_themes(render_pool):
+    first = asyncio.run(render("light"))
+    assert not first.skipped
+
+    again = asyncio.run(render("light"))
+    assert again.skipped
+    assert again.pdf_data == first.pdf_data
+    assert again.pages == {"light": 2}
+
+    both = asyncio.run(render("both"))
+    assert not both.skipped
+    assert set(both.pdf_data) == {"light", "dark"}
+    assert render_pool.themes == ["light", "dark"]
+
+    asyncio.run(render("light", markdown="# Changed"))
+    assert render_pool.themes == ["light", "dark", "light"]
+
+
+def test_render_document_coalesces_identical_renders(render_pool):
+    async def burst():
+        return await asyncio.gather(*(render("dark") for _ in range(5)))
+
+    results = asyncio.run(burst())
+    assert all(result.success for result in results)
+    assert render_pool.themes == ["dark"]
+
+
+@pytest.fixture
+def jobs(client, monkeypatch):
+    queue = barque_service.JobQueue(capacity=1, workers=1, ttl=60)
+    monkeypatch.setattr(barque_service, "job_queue", queue)
+    yield queue
+    for job_id in list(queue.jobs):
+        barque_service.downloads.remove(job_id)
+
+
+def test_job_runs_and_streams_progress(client, jobs):
+    response = client.post("/jobs", json={"markdown_content": "# Hi", "theme": "both"})
+    assert response.status_code == 202
+    job_id = response.json()["data"]["job_id"]
+
+    # The event stream ends once the job is done
+    events = client.get(f"/jobs/{job_id}/events")
+    assert events.headers["content-type"].startswith("text/event-stream")
+    statuses = [line.split(": ", 1)[1] for line in events.text.splitlines()
+                if line.startswith("event: ")]
+    assert statuses == ["queued", "rendering", "rendered", "done"]
+
+    job = client.get(f"/jobs/{job_id}").json()["data"]
+    assert job["status"] == "done"
+    files = job["files"]
+    assert len(files) == 2
+    assert client.get(files[0]["url"]).content == PDF
+
+
+def test_full_job_queue_answers_429(client, jobs, monkeypatch):
+    async def slow_render(markdown, theme, name):
+        await asyncio.sleep(0.5)
+        return GenerationResult(success=True, files=[], metadata={}, pdf_data={theme: PDF})
+
+    monkeypatch.setattr(barque_service, "render_document", slow_render)
+    first = client.post("/jobs", json={"markdown_content": "# One", "theme": "light"})
+    assert first.status_code == 202
+
+    refused = client.post("/jobs", json={"markdown_content": "# Two", "theme": "light"})
+    assert refused.status_code == 429
+    assert refused.headers["retry-after"] == "5"
+
+
+def test_unknown_job_is_404(client, jobs):
+    assert client.get("/jobs/missing").status_code == 404
+    assert client.get("/jobs/missing/events").status_code == 404
+
+
+def ndjson(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+def test_batch_ndjson(client):
+    body = "\n".join([
+        json.dumps({"markdown_content": "# One", "filename": "one"}),
+        "{not json",
+        json.dumps({"markdown_content": "# Two", "filename": "one", "theme": "dark"}),
+    ]) + "\n"
+    response = client.post(
+        "/generate/batch?theme=light", content=body,
+        headers={"content-type": "application/x-ndjson"}
+    )
+    assert response.status_code == 200
+    *results, summary = ndjson(response)
+
+    assert summary["summary"]["documents"] == 3
+    assert summary["summary"]["succeeded"] == 2
+    by_index = {result["index"]: result for result in results}
+    assert not by_index[1]["success"]
+    # Colliding names are made unique, and each document keeps its own theme
+    assert by_index[0]["files"][0]["filename"] == "one-light.pdf"
+    assert by_index[2]["files"][0]["filename"] == "one-2-dark.pdf"
+    assert client.get(by_index[2]["files"][0]["url"]).content == PDF
+
+
+def test_batch_archive(client):
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as zf:
+        zf.writestr("guide/intro.md", "# Intro\n")
+        zf.writestr("../escape.md", "# Escape\n")
+        zf.writestr("notes.txt", "not markdown")
+    response = client.post(
+        "/generate/batch?theme=dark",
+        files={"archive": ("docs.zip", archive.getvalue(), "application/zip")}
+    )
+    assert response.status_code == 200
+    *results, summary = ndjson(response)
+
+    assert summary["summary"]["documents"] == 2
+    names = sorted(result["files"][0]["filename"] for result in results)
+    assert names == ["escape-dark.pdf", "guide-intro-dark.pdf"]
+
+
+def test_batch_rejects_other_content_types(client):
+    response = client.post("/generate/batch", content="{}", headers={"content-type": "text/plain"})
+    assert response.status_code == 415
+
+
+def test_work_pool_bounds_concurrency():
+    pool = barque_service.WorkPool("test", workers=2)
+    running, peak = [0], [0]
+    lock = threading.Lock()
+
+    def work(seconds):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        time.sleep(seconds)
+        with lock:
+            running[0] -= 1
+        return seconds
+
+    def fail():
+        raise ValueError("boom")
+
+    async def burst():
+        results = await asyncio.gather(*(pool.run(work, 0.05) for _ in range(6)))
+        with pytest.raises(ValueError):
+            await pool.run(fail)
+        return results
+
+    try:
+        assert asyncio.run(burst()) == [0.05] * 6
+    finally:
+        pool.shutdown()
+    assert peak[0] == 2
+    stats = pool.stats()
+    assert (stats["completed"], stats["failed"], stats["in_flight"]) == (6, 1, 0)
+
+
+def test_health_answers_while_renders_are_busy(client, monkeypatch):
+    pool = barque_service.WorkPool("render", workers=1)
+    monkeypatch.setattr(barque_service, "render_pool", pool)
+
+    async def render_document(markdown, theme, name):
+        await pool.run(time.sleep, 0.5)
+        return GenerationResult(success=True, files=[], pdf_data={theme: PDF})
+
+    monkeypatch.setattr(barque_service, "render_document", render_document)
+    worker = threading.Thread(target=client.post, args=("/generate/pdf",), kwargs={
+        "json": {"markdown_content": "# Slow", "theme": "light"}
+    })
+    worker.start()
+    try:
+        time.sleep(0.1)
+        started = time.perf_counter()
+        assert client.get("/health").status_code == 200
+        assert time.perf_counter() - started < 0.4
+    finally:
+        worker.join()
+        pool.shutdown()
+
+
+@pytest.fixture
+def library(tmp_path, monkeypatch):
+    store = MetadataStore(tmp_path / "metadata" / "metadata.db")
+    store.put(
+        {"name": "harbour", "title": "Harbour Guide",
+         "pdf_files": {"light": "light/harbour-light.pdf", "dark": None}},
+        text="# Harbour Guide\n\nMooring at the harbour wall."
+    )
+    store.close()
+    monkeypatch.setenv("BARQUE_OUTPUT_DIR", str(tmp_path))
+    return tmp_path
+
+
+def test_search_returns_hits_with_download_urls(client, library):
+    response = client.get("/search", params={"q": "mooring"})
+    assert response.status_code == 200
+    [hit] = response.json()["data"]["results"]
+    assert hit["name"] == "harbour"
+    assert "<mark>Mooring</mark>" in hit["snippet"]
+    assert hit["urls"] == {"light": "/documents/light/harbour-light.pdf"}
+    assert "file" not in hit
+
+
+def test_search_opens_the_library_read_only_once(client, library):
+    barque_service._library_store.cache_clear()
+    for _ in range(3):
+        assert client.get("/search", params={"q": "harbour"}).status_code == 200
+    assert barque_service._library_store.cache_info().misses == 1
+
+    store = barque_service._library_store(library / "metadata" / "metadata.db")
+    with pytest.raises(sqlite3.OperationalError):
+        store._connection.execute("DELETE FROM documents")
+
+
+def test_search_without_index_is_404(client, tmp_path, monkeypatch):
+    monkeypatch.setenv("BARQUE_OUTPUT_DIR", str(tmp_path))
+    assert client.get("/search", params={"q": "harbour"}).status_code == 404
@@ -0,0 +1,98 @@
+"""Tests for the SQLite metadata store"""
+
+import sqlite3
+
+from barque.core.metadata import MetadataExtractor
+from barque.core.store import MetadataStore
+
+
+def record(name, **fields):
+    metadata = {"name": name, "title": name.title(), "file_size": 100, "word_count": 10}
+    metadata.update(fields)
+    return metadata
+
+
+def test_put_and_get_round_trip(tmp_path):
+    store = MetadataStore(tmp_path / "metadata.db")
+    store.put(record("alpha", has_math=True))
+    assert store.get("alpha")["has_math"] is True
+    assert store.totals()["documents"] == 1
+    store.close()
+
+
+def test_identical_put_keeps_revision(tmp_path):
+    store = MetadataStore(tmp_path / "metadata.db")
+    store.put(record("alpha"))
+    revision = store.totals()["revision"]
+    store.put(record("alpha"))
+    assert store.totals()["revision"] == revision
+    store.put(record("alpha", word_count=11))
+    assert store.totals()["revision"] > revision
+    store.close()
+
+
+def test_non_text_frontmatter_values_are_coerced(tmp_path):
+    store = MetadataStore(tmp_path / "metadata.db")
+    store.put(record("listed", title=["Part", "One"]), text="body")
+    store.put(record("mapped", title={"main": "Report"}, word_count="many"))
+    store.flush()
+
+    assert store.rejected == []
+    titles = {doc["name"]: doc["title"] for doc in store.largest()}
+    assert titles["listed"] == "Part One"
+    assert isinstance(titles["mapped"], str)
+    assert store.get("listed")["title"] == ["Part", "One"]
+    assert [hit["name"] for hit in store.search("part")] == ["listed"]
+    store.close()
+
+
+def test_list_title_from_frontmatter(tmp_path):
+    source = tmp_path / "doc.md"
+    source.write_text("---\ntitle: [Part, One]\n---\n\n# Heading\n\nText.\n", encoding="utf-8")
+    metadata = MetadataExtractor().extract(source)
+
+    store = MetadataStore(tmp_path / "metadata.db")
+    store.put(metadata, text=source.read_text(encoding="utf-8"))
+    store.flush()
+    assert store.rejected == []
+    assert store.get("doc") is not None
+    store.close()
+
+
+def test_failed_record_is_quarantined(tmp_path):
+    store = MetadataStore(tmp_path / "metadata.db")
+    store._connection.execute(
+        "CREATE TRIGGER reject_bad BEFORE INSERT ON documents WHEN new.name = 'bad' "
+        "BEGIN SELECT RAISE(ABORT, 'bad record'); END"
+    )
+    store.put(record("good"))
+    store.put(record("bad"))
+    store.flush()
+
+    assert [name for name, _ in store.rejected] == ["bad"]
+    assert store.get("good") is not None
+    assert store.get("bad") is None
+
+    # Later flushes are not blocked by the rejected record
+    store.put(record("later"))
+    store.flush()
+    assert store.get("later") is not None
+    assert len(store.rejected) == 1
+    store.close()
+
+
+def test_search_ranks_and_reindexes(tmp_path):
+    store = MetadataStore(tmp_path / "metadata.db")
+    store.put(record("alpha", title="Harbour charts"), text="Tides and currents.")
+    store.put(record("beta", title="Engines"), text="Notes on harbour pilots.")
+    store.flush()
+    assert [hit["name"] for hit in store.search("harbour")] == ["alpha", "beta"]
+
+    store.put(record("beta", title="Engines"), text="Diesel maintenance.")
+    store.flush()
+    assert [hit["name"] for hit in store.search("harbour")] == ["alpha"]
+    assert "[diesel]" in store.search("diesel", highlight=("[", "]"))[0]["snippet"].lower()
+
+    store.delete(["alpha"])
+    assert store.search("harbour") == []
+    store.close()
@@ -0,0 +1,40 @@
+"""Tests for theme CSS generation"""
+
+from barque.core.config import BarqueConfig
+from barque.core.themes import ThemeProcessor
+
+
+def test_stylesheet_is_written_once(tmp_path, monkeypatch):
+    processor = ThemeProcessor(BarqueConfig())
+    generated = []
+    generate_css = processor.generate_css
+
+    def counting_generate_css(theme):
+        generated.append(theme)
+        return generate_css(theme)
+
+    monkeypatch.setattr(processor, "generate_css", counting_generate_css)
+
+    first = processor.theme_css_file("light", tmp_path)
+    mtime = first.stat().st_mtime_ns
+    assert processor.theme_css_file("light", tmp_path) == first
+    assert first.stat().st_mtime_ns == mtime
+    assert generated == ["light"]
+
+    # A second processor with the same settings shares the file
+    assert ThemeProcessor(BarqueConfig()).theme_css_file("light", tmp_path) == first
+    assert list(tmp_path.iterdir()) == [first]
+
+
+def test_stylesheet_follows_configuration(tmp_path):
+    config = BarqueConfig()
+    processor = ThemeProcessor(config)
+    light = processor.theme_css_file("light", tmp_path)
+    dark = processor.theme_css_file("dark", tmp_path)
+    assert light != dark
+
+    config.light_theme = {**config.light_theme, "accent": "#ff0000"}
+    recolored = processor.theme_css_file("light", tmp_path)
+    assert recolored != light
+    assert "#ff0000" in recolored.read_text(encoding="utf-8")
+    assert processor.theme_css_file("dark", tmp_path) == dark
@@ -0,0 +1,80 @@
+"""Tests for render resource accounting"""
+
+import io
+import subprocess
+import sys
+
+import pytest
+
+from barque.core.usage import ResourceUsage, pdf_page_count, recording, run, stage
+
+
+def make_pdf(pages: int, compress: bool) -> bytes:
+    pydyf = pytest.importorskip("pydyf")  # Installed with WeasyPrint
+    pdf = pydyf.PDF()
+    for _ in range(pages):
+        contents = pydyf.Stream()
+        pdf.add_object(contents)
+        pdf.add_page(pydyf.Dictionary({
+            "Type": "/Page",
+            "Parent": pdf.pages.reference,
+            "MediaBox": pydyf.Array([0, 0, 200, 200]),
+            "Contents": contents.reference,
+        }))
+    output = io.BytesIO()
+    pdf.write(output, compress=compress)
+    return output.getvalue()
+
+
+@pytest.mark.parametrize("compress", [False, True])
+def test_pdf_page_count(compress, tmp_path):
+    pdf = make_pdf(3, compress)
+    assert pdf_page_count(pdf) == 3
+
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(pdf)
+    assert pdf_page_count(path) == 3
+
+
+def test_pdf_page_count_unknown():
+    assert pdf_page_count(b"not a pdf") is None
+
+
+def test_stages_are_recorded():
+    usage = ResourceUsage()
+    with recording(usage):
+        with stage("pandoc"):
+            pass
+        with stage("pandoc"):
+            pass
+    assert usage.stages["pandoc"].calls == 2
+    assert "pandoc" in usage.to_dict()["stages"]
+
+
+def test_child_processes_are_measured():
+    usage = ResourceUsage()
+    with recording(usage):
+        with stage("child"):
+            completed = run(
+                [sys.executable, "-c", "buffer = bytearray(64 << 20)"], check=True
+            )
+    assert completed.returncode == 0
+    assert usage.stages["child"].calls == 1
+    assert usage.stages["child"].cpu > 0
+    assert usage.peak_rss >= 64 << 20
+
+
+def test_run_exchanges_data_like_subprocess_run():
+    script = (
+        "import sys; data = sys.stdin.read(); "
+        "sys.stdout.write(data * 2); sys.stderr.write('x' * (1 << 20)); sys.exit(3)"
+    )
+    completed = run(
+        [sys.executable, "-c", script], input="ab" * (1 << 19), capture_output=True, text=True
+    )
+    assert completed.returncode == 3
+    assert completed.stdout == "ab" * (1 << 20)
+    assert len(completed.stderr) == 1 << 20
+
+    with pytest.raises(subprocess.CalledProcessError):
+        run([sys.executable, "-c", "raise SystemExit(1)"], check=True)